@@ -1,19 +1,43 @@
 """
 FastAPI endpoints for Text2SQL Assistant - Core Requirements Only
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from app.models.schemas import (
     GenerateSQLRequest, GenerateSQLResponse,
     ExecuteSQLRequest, ExecuteSQLResponse,
-    QueryRequest, QueryResponse
+    QueryRequest, QueryResponse,
+    ConfirmExampleRequest, ExportRequest, NextPageRequest
 )
 from app.services.text2sql_service import text2sql_service
+from app.services.export_service import export_service, ExportError, MEDIA_TYPES as EXPORT_MEDIA_TYPES
+from app.services.query_log import query_log
 from app.database.connection import db_manager
+from app.utils.metrics import metrics
+from app.utils.startup import startup_timer
+from app.utils.result_formats import ROWS, encode_payload, format_available, negotiate_format
 
 # Create API router
 router = APIRouter()
 
 
+def _response_format(requested, http_request: Request) -> str:
+    """Response format from the request body or Accept header; 406 if it cannot be produced"""
+    fmt = negotiate_format(requested, http_request.headers.get("accept"))
+    if not format_available(fmt):
+        raise HTTPException(status_code=406, detail=f"Response format '{fmt}' is not available on this server")
+    return fmt
+
+
+def _render(result, fmt: str) -> Response:
+    """Encode the response model as JSON rows or in the requested format, timed as the serialize stage"""
+    with metrics.span("serialize"):
+        if fmt == ROWS:
+            return Response(content=result.model_dump_json(), media_type="application/json")
+        body, media_type = encode_payload(result.model_dump(), fmt)
+        return Response(content=body, media_type=media_type)
+
+
 @router.post("/generate-sql", response_model=GenerateSQLResponse)
 async def generate_sql(request: GenerateSQLRequest) -> GenerateSQLResponse:
     """
@@ -34,16 +58,23 @@ async def generate_sql(request: GenerateSQLRequest) -> GenerateSQLResponse:
 
 
 @router.post("/execute-sql", response_model=ExecuteSQLResponse)
-async def execute_sql(request: ExecuteSQLRequest) -> ExecuteSQLResponse:
+async def execute_sql(request: ExecuteSQLRequest, http_request: Request) -> ExecuteSQLResponse:
     """
     Execute SQL query safely
     
     Executes a SQL query against the database with safety validations.
     Only SELECT queries are allowed, and results are limited to prevent resource exhaustion.
+    
+    Results are row objects by default. ``format`` (or an Accept header of
+    application/msgpack or application/vnd.apache.arrow.stream) selects a
+    columnar layout: column metadata once, then one array per column.
     """
+    fmt = _response_format(request.format, http_request)
     try:
-        result = await text2sql_service.execute_sql_query(request.sql_query)
-        return result
+        result = await text2sql_service.execute_sql_query(
+            request.sql_query, timeout_ms=request.timeout_ms, response_format=fmt
+        )
+        return _render(result, fmt)
         
     except Exception as e:
         raise HTTPException(
@@ -53,19 +84,24 @@ async def execute_sql(request: ExecuteSQLRequest) -> ExecuteSQLResponse:
 
 
 @router.post("/query", response_model=QueryResponse)
-async def process_query(request: QueryRequest) -> QueryResponse:
+async def process_query(request: QueryRequest, http_request: Request) -> QueryResponse:
     """
     Complete Text-to-SQL Pipeline - Main Endpoint
     
     Takes a natural language query, converts it to SQL using AI, executes the query,
-    and returns the results with comprehensive metadata.
+    and returns the results with comprehensive metadata. Supports the same
+    response formats as /execute-sql.
     """
+    fmt = _response_format(request.format, http_request)
     try:
         result = await text2sql_service.process_natural_language_query(
             natural_query=request.query,
-            include_sql_in_response=request.include_sql
+            include_sql_in_response=request.include_sql,
+            timeout_ms=request.timeout_ms,
+            response_format=fmt,
+            include_timings=request.include_timings
         )
-        return result
+        return _render(result, fmt)
         
     except Exception as e:
         raise HTTPException(
@@ -74,6 +110,65 @@ async def process_query(request: QueryRequest) -> QueryResponse:
         )
 
 
+@router.post("/next-page", response_model=ExecuteSQLResponse)
+async def next_page(request: NextPageRequest, http_request: Request) -> ExecuteSQLResponse:
+    """
+    Fetch the next page of a truncated /execute-sql or /query result
+    
+    Pass the ``next_cursor`` of the previous page; the response carries the
+    cursor for the page after it until the result is exhausted.
+    """
+    fmt = _response_format(request.format, http_request)
+    try:
+        result = await text2sql_service.fetch_next_page(
+            request.cursor, timeout_ms=request.timeout_ms, response_format=fmt
+        )
+        return _render(result, fmt)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch page: {str(e)}"
+        )
+
+
+@router.post("/export")
+async def export_results(request: ExportRequest) -> StreamingResponse:
+    """
+    Stream the full result of a SELECT query as NDJSON or CSV
+    
+    Unlike /execute-sql there is no row limit: rows are read from SQLite a
+    batch at a time as the client consumes them. Safety validation and the
+    deadline (time spent in SQLite) follow /execute-sql.
+    """
+    try:
+        body = await export_service.open_export(
+            request.sql_query, fmt=request.format, timeout_ms=request.timeout_ms, compress=request.gzip
+        )
+    except ExportError as e:
+        status_code = {"EXPORT_BUSY": 429, "QUERY_TIMEOUT": 504}.get(e.error_code, 400)
+        raise HTTPException(status_code=status_code, detail={"error_message": str(e), "error_code": e.error_code})
+    
+    filename = f"export.{request.format}" + (".gz" if request.gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if request.gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[request.format], headers=headers)
+
+
+@router.post("/examples/confirm")
+async def confirm_example(request: ConfirmExampleRequest):
+    """
+    Confirm that a SQL query answers a question
+    
+    Confirmed pairs are added to the few-shot example store used to build
+    future prompts. Generated SQL is only learned automatically when
+    EXAMPLE_STORE_LEARN_FROM_HISTORY is enabled.
+    """
+    stored, message = await text2sql_service.confirm_example(request.query, request.sql_query)
+    return {"success": stored, "message": message}
+
+
 # Debug endpoint to check database status
 @router.get("/debug/database-status")
 async def check_database_status():
@@ -117,6 +212,8 @@ async def check_database_status():
             except Exception as e:
                 status["data_error"] = str(e)
         
+        status["connection_pool"] = db_manager.get_pool_stats()
+        status["tuning"] = db_manager.get_tuning_info()
         return status
     except Exception as e:
         return {
@@ -126,12 +223,61 @@ async def check_database_status():
         }
 
 
+# Connection pool metrics
+@router.get("/debug/pool-stats")
+async def get_pool_stats():
+    """Connection pool size, utilization and wait times"""
+    return db_manager.get_pool_stats()
+
+
+# SQL execution metrics (timeouts, failures, deadlines)
+@router.get("/debug/execution-stats")
+async def get_execution_stats():
+    """SQL execution counts, timeouts and configured deadlines"""
+    return text2sql_service.sql.get_stats()
+
+
+# Streaming traffic analytics
+@router.get("/analytics")
+async def get_analytics():
+    """Query counts, success rates and p50/p95/p99 latency per endpoint and per pipeline stage"""
+    return text2sql_service.get_traffic_analytics()
+
+
+# Prometheus scrape endpoint
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Per-stage latency histograms and cache, error and timeout counters in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+# Per-template execution metrics
+@router.get("/debug/query-templates")
+async def get_query_templates(limit: int = 50):
+    """Most executed statement templates with execution counts and latency percentiles"""
+    return {"templates": text2sql_service.sql.get_template_stats(limit)}
+
+
+# Streaming export metrics
+@router.get("/debug/export-stats")
+async def get_export_stats():
+    """Export counts, rows and bytes streamed and active exports"""
+    return export_service.get_stats()
+
+
+# Query log writer metrics
+@router.get("/debug/query-log-stats")
+async def get_query_log_stats():
+    """Query log records queued, written, dropped and rotations"""
+    return query_log.get_stats()
+
+
 # Manual database initialization endpoint
 @router.post("/debug/init-database")
 async def initialize_database():
     """Manually initialize the database with schema and data"""
     try:
-        success = db_manager.initialize_database()
+        success = await db_manager.initialize_database_async()
         if success:
             tables = await db_manager.get_table_names()
             return {
@@ -148,4 +294,11 @@ async def initialize_database():
         raise HTTPException(
             status_code=500,
             detail=f"Failed to initialize database: {str(e)}"
-        ) 
\ No newline at end of file
+        ) 
+
+
+# Startup timing report
+@router.get("/debug/startup")
+async def get_startup_timing():
+    """Report how long each startup phase took"""
+    return startup_timer.report()
@@ -2,21 +2,62 @@
 Database connection and management for Text2SQL Assistant
 """
 import aiosqlite
+import asyncio
 import sqlite3
-from typing import Optional, Dict, List, Any
+import threading
+import time
+from typing import Optional, Dict, List, Any, Tuple, AsyncIterator
 from contextlib import asynccontextmanager
 from pathlib import Path
 import os
 from app.utils.config import get_settings
+from app.database.pool import ConnectionPool
+from app.database.tuning import TuningProfile, profile_from_settings
+
+
+# SQLite VM instructions between deadline checks
+PROGRESS_HANDLER_INTERVAL = 1000
+
+
+class QueryTimeoutError(Exception):
+    """Raised when a query is interrupted for exceeding its deadline"""
+    
+    def __init__(self, timeout_seconds: float, elapsed_ms: float):
+        self.timeout_seconds = timeout_seconds
+        self.elapsed_ms = elapsed_ms
+        super().__init__(
+            f"Query exceeded the {timeout_seconds:g}s time limit and was cancelled after {elapsed_ms:.0f} ms"
+        )
+
+
+def estimate_row_bytes(row: Dict[str, Any]) -> int:
+    """Approximate in-memory size of a result row (text/blob lengths, 8 bytes per number)"""
+    size = 0
+    for key, value in row.items():
+        size += len(key)
+        if isinstance(value, (str, bytes)):
+            size += len(value)
+        else:
+            size += 8
+    return size
 
 
 class DatabaseManager:
     """Database connection and query manager"""
     
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None, tuning: Optional[TuningProfile] = None):
         self.settings = get_settings()
-        self.db_path = self._get_db_path()
+        self.db_path = db_path or self._get_db_path()
+        self.tuning = tuning or profile_from_settings(self.settings)
         self._ensure_db_directory()
+        self._pool: Optional[ConnectionPool] = None
+        # Per-connection deadline slots read by the SQLite progress handler
+        self._deadlines: Dict[int, List[Optional[float]]] = {}
+        # Data version tracking for result caching
+        self._write_generation = 0
+        self._version_conn: Optional[sqlite3.Connection] = None
+        self._version_inode: Optional[int] = None
+        self._version_lock = threading.Lock()
     
     def _get_db_path(self) -> str:
         """Extract database file path from DATABASE_URL"""
@@ -31,13 +72,143 @@ class DatabaseManager:
         if db_dir:
             Path(db_dir).mkdir(parents=True, exist_ok=True)
     
+    @property
+    def pool(self) -> ConnectionPool:
+        """Connection pool, created on first use"""
+        if self._pool is None:
+            self._pool = ConnectionPool(
+                self.db_path,
+                min_size=self.settings.DB_POOL_MIN_SIZE,
+                max_size=self.settings.DB_POOL_MAX_SIZE,
+                acquire_timeout=self.settings.DB_POOL_ACQUIRE_TIMEOUT_SECONDS,
+                health_check_interval=self.settings.DB_POOL_HEALTH_CHECK_INTERVAL_SECONDS,
+                on_connect=self._configure_connection,
+                connect_kwargs={"cached_statements": self.settings.DB_CACHED_STATEMENTS}
+            )
+        return self._pool
+    
+    async def _configure_connection(self, db: aiosqlite.Connection, read_only: bool = True):
+        """Apply the tuning profile; pooled connections are read-only"""
+        for statement in self.tuning.pragmas(read_only=read_only):
+            await db.execute(statement)
+        if read_only:
+            await self._install_deadline_handler(db)
+    
+    async def _install_deadline_handler(self, db: aiosqlite.Connection):
+        """
+        Install a progress handler that interrupts the running statement once
+        the connection's deadline passes; setting a deadline is then just an
+        assignment, with no extra round trip to the connection thread
+        """
+        slot: List[Optional[float]] = [None]
+        
+        def check_deadline() -> int:
+            deadline = slot[0]
+            return 1 if deadline is not None and time.monotonic() > deadline else 0
+        
+        await db.set_progress_handler(check_deadline, PROGRESS_HANDLER_INTERVAL)
+        self._deadlines[id(db)] = slot
+    
+    @asynccontextmanager
+    async def _deadline(self, db: aiosqlite.Connection, timeout: Optional[float]):
+        """Apply a deadline to the statements run inside the block"""
+        slot = self._deadlines.get(id(db)) if timeout else None
+        started = time.monotonic()
+        if slot is not None:
+            slot[0] = started + timeout
+        try:
+            yield
+        except sqlite3.OperationalError as e:
+            if slot is not None and "interrupted" in str(e):
+                raise QueryTimeoutError(timeout, (time.monotonic() - started) * 1000) from e
+            raise
+        finally:
+            if slot is not None:
+                slot[0] = None
+    
+    def _connect_sync(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a tuned synchronous connection"""
+        conn = sqlite3.connect(self.db_path)
+        for statement in self.tuning.pragmas(read_only=read_only):
+            conn.execute(statement)
+        return conn
+    
     @asynccontextmanager
     async def get_connection(self):
-        """Async context manager for database connections"""
+        """Async context manager for pooled database connections"""
+        async with self.pool.acquire() as db:
+            yield db
+    
+    @asynccontextmanager
+    async def get_writer_connection(self):
+        """Dedicated read-write connection for scripts; pooled connections are query_only"""
         async with aiosqlite.connect(self.db_path) as db:
             db.row_factory = aiosqlite.Row
+            await self._configure_connection(db, read_only=False)
             yield db
     
+    async def open(self):
+        """Open the pool's minimum connections"""
+        await self.pool.initialize()
+    
+    async def close(self):
+        """Close pooled connections; a new pool is created on next use"""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await pool.close()
+            self._deadlines.clear()
+        with self._version_lock:
+            self._close_version_conn()
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool metrics"""
+        if self._pool is None:
+            return {"size": 0, "in_use": 0, "utilization": 0.0}
+        return self._pool.get_stats()
+    
+    def data_version(self) -> Tuple[int, int, int, int]:
+        """
+        Token that changes whenever the database content may have changed
+        
+        Combines writes made through this manager, SQLite's PRAGMA data_version
+        on a dedicated connection (which changes when any other connection or
+        process commits) and the file's inode and mtime, which catch the file
+        being replaced.
+        """
+        try:
+            stat = os.stat(self.db_path)
+            inode, mtime_ns = stat.st_ino, stat.st_mtime_ns
+        except OSError:
+            inode, mtime_ns = 0, 0
+        
+        with self._version_lock:
+            try:
+                if self._version_conn is None or self._version_inode != inode:
+                    self._close_version_conn()
+                    self._version_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                    self._version_inode = inode
+                pragma_version = self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error:
+                self._close_version_conn()
+                pragma_version = -1
+        return self._write_generation, pragma_version, inode, mtime_ns
+    
+    async def get_data_version(self) -> Tuple[int, int, int, int]:
+        """data_version() without blocking the event loop (it stats the file and queries SQLite)"""
+        return await asyncio.to_thread(self.data_version)
+    
+    def _close_version_conn(self):
+        if self._version_conn is not None:
+            try:
+                self._version_conn.close()
+            except sqlite3.Error:
+                pass
+            self._version_conn = None
+    
+    def get_tuning_info(self) -> Dict[str, Any]:
+        """Get the active tuning profile"""
+        return self.tuning.to_dict()
+    
     async def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
         """Execute a SELECT query and return results as list of dictionaries"""
         async with self.get_connection() as db:
@@ -53,9 +224,118 @@ class DatabaseManager:
             except Exception as e:
                 raise Exception(f"Query execution failed: {str(e)}")
     
+    async def execute_query_limited(
+        self,
+        query: str,
+        max_rows: int,
+        max_bytes: Optional[int] = None,
+        params: Optional[tuple] = None,
+        batch_size: int = 256,
+        timeout: Optional[float] = None
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Execute a SELECT query, fetching in batches and stopping at the row or byte cap
+        
+        Args:
+            timeout: seconds before SQLite interrupts the query (QueryTimeoutError)
+        
+        Returns:
+            Tuple of (rows, truncated); truncated is True when more rows were available
+        """
+        async with self.get_connection() as db, self._deadline(db, timeout):
+            try:
+                cursor = await db.execute(query, params or ())
+                try:
+                    rows: List[Dict[str, Any]] = []
+                    size = 0
+                    # Fetch one row past the cap to learn whether the result was cut short
+                    while len(rows) <= max_rows:
+                        batch = await cursor.fetchmany(min(batch_size, max_rows + 1 - len(rows)))
+                        if not batch:
+                            return rows, False
+                        for row in batch:
+                            if len(rows) >= max_rows:
+                                return rows, True
+                            item = dict(row)
+                            if max_bytes:
+                                size += estimate_row_bytes(item)
+                                if size > max_bytes and rows:
+                                    return rows, True
+                            rows.append(item)
+                    return rows, True
+                finally:
+                    await cursor.close()
+            
+            except sqlite3.OperationalError as e:
+                if "interrupted" in str(e):
+                    raise  # Turned into QueryTimeoutError by _deadline
+                raise Exception(f"Query execution failed: {str(e)}")
+            except Exception as e:
+                raise Exception(f"Query execution failed: {str(e)}")
+    
+    async def stream_query(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: int = 1000,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[List[Any]]:
+        """
+        Stream a SELECT query's rows from a pooled connection in batches
+        
+        The first item yielded is the list of column names, so statement
+        errors surface before any rows are sent; each following item is a
+        batch of at most ``batch_size`` rows. The next batch is only fetched
+        when the consumer asks for it, so memory stays at one batch however
+        large the result. Only time spent inside SQLite counts towards
+        ``timeout``; time the consumer takes between batches does not. The
+        connection is held until the generator is exhausted or closed.
+        
+        Raises:
+            QueryTimeoutError: once the SQLite time exceeds timeout
+        """
+        async with self.get_connection() as db:
+            slot = self._deadlines.get(id(db)) if timeout else None
+            remaining = timeout
+            
+            async def step(operation):
+                nonlocal remaining
+                started = time.monotonic()
+                if slot is not None:
+                    slot[0] = started + remaining
+                try:
+                    return await operation
+                except sqlite3.OperationalError as e:
+                    if slot is not None and "interrupted" in str(e):
+                        elapsed = timeout - remaining + time.monotonic() - started
+                        raise QueryTimeoutError(timeout, elapsed * 1000) from e
+                    raise
+                finally:
+                    if slot is not None:
+                        slot[0] = None
+                        remaining -= time.monotonic() - started
+            
+            cursor = await step(db.execute(query, params or ()))
+            try:
+                yield [column[0] for column in cursor.description or ()]
+                while True:
+                    batch = await step(cursor.fetchmany(batch_size))
+                    if not batch:
+                        return
+                    yield batch
+            finally:
+                await cursor.close()
+    
+    async def count_query_rows(self, query: str, timeout: Optional[float] = None) -> int:
+        """Count the rows a SELECT query returns without materializing them"""
+        async with self.get_connection() as db, self._deadline(db, timeout):
+            cursor = await db.execute(f"SELECT COUNT(*) AS total_rows FROM ({query})")
+            row = await cursor.fetchone()
+            return row["total_rows"]
+    
     async def execute_script(self, script: str) -> bool:
         """Execute a SQL script (multiple statements)"""
-        async with self.get_connection() as db:
+        async with self.get_writer_connection() as db:
             try:
                 await db.executescript(script)
                 await db.commit()
@@ -63,10 +343,12 @@ class DatabaseManager:
             except Exception as e:
                 print(f"Script execution failed: {str(e)}")
                 return False
+            finally:
+                self._write_generation += 1
     
     def execute_sync_query(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
         """Synchronous query execution for initialization"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect_sync(read_only=True) as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -84,7 +366,7 @@ class DatabaseManager:
     
     def execute_sync_script(self, script: str) -> bool:
         """Synchronous script execution for initialization"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect_sync() as conn:
             try:
                 conn.executescript(script)
                 conn.commit()
@@ -92,6 +374,8 @@ class DatabaseManager:
             except Exception as e:
                 print(f"Script execution failed: {str(e)}")
                 return False
+            finally:
+                self._write_generation += 1
     
     async def validate_sql(self, sql_query: str) -> tuple[bool, Optional[str]]:
         """Validate SQL query without executing it"""
@@ -114,12 +398,16 @@ class DatabaseManager:
         rows = await self.execute_query(query)
         return [row['name'] for row in rows]
     
+    async def initialize_database_async(self) -> bool:
+        """Initialize the database without blocking the event loop"""
+        return await asyncio.to_thread(self.initialize_database)
+    
     def initialize_database(self) -> bool:
         """Initialize database with schema and seed data"""
         try:
-            # Check if database already has data
+            # Check if database already has data (the writer connection also switches the journal mode)
             try:
-                with sqlite3.connect(self.db_path) as conn:
+                with self._connect_sync() as conn:
                     cursor = conn.cursor()
                     cursor.execute("SELECT COUNT(*) FROM customers")
                     customer_count = cursor.fetchone()[0]
@@ -164,7 +452,7 @@ class DatabaseManager:
                 print("Seed data executed successfully!")
                 
                 # Verify data was inserted
-                with sqlite3.connect(self.db_path) as conn:
+                with self._connect_sync(read_only=True) as conn:
                     cursor = conn.cursor()
                     cursor.execute("SELECT COUNT(*) FROM customers")
                     customer_count = cursor.fetchone()[0]
@@ -0,0 +1,250 @@
+"""
+Async connection pool for aiosqlite
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import aiosqlite
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available within the acquire timeout"""
+
+
+class ConnectionPool:
+    """
+    Pool of long-lived aiosqlite connections
+
+    Each aiosqlite connection owns a background thread, so reusing them
+    avoids a thread start plus SQLite open per query. Connections are
+    created on demand up to ``max_size`` and handed to waiters in FIFO
+    order. A connection idle for longer than ``health_check_interval``
+    is pinged before reuse and replaced if the ping fails.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        min_size: int = 1,
+        max_size: int = 8,
+        acquire_timeout: float = 10.0,
+        health_check_interval: float = 30.0,
+        on_connect: Optional[Callable[[aiosqlite.Connection], Awaitable[None]]] = None,
+        connect_kwargs: Optional[Dict[str, Any]] = None
+    ):
+        self.db_path = db_path
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.on_connect = on_connect
+        self.connect_kwargs = connect_kwargs or {}
+
+        self._idle: Deque[aiosqlite.Connection] = deque()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_used: Dict[int, float] = {}
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self.stats = {
+            "acquisitions": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "connections_created": 0,
+            "connections_closed": 0,
+            "health_check_failures": 0,
+            "peak_in_use": 0,
+        }
+
+    async def _connect(self) -> aiosqlite.Connection:
+        conn = aiosqlite.connect(self.db_path, **self.connect_kwargs)
+        # Each connection runs on its own thread. Make it a daemon so a pool
+        # that is never closed cannot keep the process alive at exit (atexit
+        # hooks run only after non-daemon threads have been joined).
+        conn._thread.daemon = True
+        await conn
+        try:
+            conn.row_factory = aiosqlite.Row
+            if self.on_connect is not None:
+                await self.on_connect(conn)
+        except Exception:
+            await conn.close()
+            raise
+        self._last_used[id(conn)] = time.monotonic()
+        self.stats["connections_created"] += 1
+        return conn
+
+    async def _discard(self, conn: aiosqlite.Connection):
+        self._size -= 1
+        self._last_used.pop(id(conn), None)
+        self.stats["connections_closed"] += 1
+        try:
+            await conn.close()
+        except Exception:
+            pass
+
+    async def _healthy(self, conn: aiosqlite.Connection) -> bool:
+        idle_for = time.monotonic() - self._last_used.get(id(conn), 0.0)
+        if idle_for < self.health_check_interval:
+            return True
+        try:
+            await conn.execute("SELECT 1")
+            return True
+        except Exception:
+            self.stats["health_check_failures"] += 1
+            return False
+
+    async def initialize(self):
+        """Open the minimum number of connections"""
+        while self._size < self.min_size and not self._closed:
+            self._size += 1
+            try:
+                self._idle.append(await self._connect())
+            except Exception:
+                self._size -= 1
+                raise
+
+    async def _acquire(self) -> aiosqlite.Connection:
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        started = time.perf_counter()
+        conn = None
+        while conn is None:
+            if self._idle:
+                candidate = self._idle.pop()
+                if await self._healthy(candidate):
+                    conn = candidate
+                else:
+                    await self._discard(candidate)
+            elif self._size < self.max_size:
+                self._size += 1
+                try:
+                    conn = await self._connect()
+                except Exception:
+                    self._size -= 1
+                    raise
+            else:
+                conn = await self._wait(started)
+
+        waited_ms = (time.perf_counter() - started) * 1000
+        self.stats["acquisitions"] += 1
+        self.stats["total_wait_ms"] += waited_ms
+        self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], waited_ms)
+        self._in_use += 1
+        self.stats["peak_in_use"] = max(self.stats["peak_in_use"], self._in_use)
+        return conn
+
+    async def _wait(self, started: float) -> aiosqlite.Connection:
+        """Queue for the next released connection (FIFO)"""
+        self.stats["waits"] += 1
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        remaining = self.acquire_timeout - (time.perf_counter() - started)
+        try:
+            return await asyncio.wait_for(waiter, max(remaining, 0))
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return waiter.result()
+            self.stats["timeouts"] += 1
+            raise PoolTimeoutError(
+                f"No database connection available within {self.acquire_timeout:.1f}s "
+                f"(pool size {self.max_size})"
+            )
+        except BaseException:
+            # Cancelled after a connection was handed over: give it back
+            if waiter.done() and not waiter.cancelled():
+                self._in_use += 1
+                await self._release(waiter.result())
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    async def _release(self, conn: aiosqlite.Connection):
+        self._in_use -= 1
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+        except Exception:
+            await self._discard(conn)
+            await self._replace_for_waiter()
+            return
+
+        self._last_used[id(conn)] = time.monotonic()
+        if self._closed:
+            await self._discard(conn)
+            return
+
+        if not self._give_to_waiter(conn):
+            self._idle.append(conn)
+
+    def _give_to_waiter(self, conn: aiosqlite.Connection) -> bool:
+        """Hand the connection straight to the oldest waiter, if any"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            loop = waiter.get_loop()
+            if loop is asyncio.get_running_loop():
+                waiter.set_result(conn)
+            else:
+                loop.call_soon_threadsafe(self._hand_over, waiter, conn)
+            return True
+        return False
+
+    async def _replace_for_waiter(self):
+        """Open a connection for the oldest waiter after one was discarded"""
+        if self._closed or self._size >= self.max_size or not any(not w.done() for w in self._waiters):
+            return
+        self._size += 1
+        try:
+            conn = await self._connect()
+        except Exception as e:
+            self._size -= 1
+            print(f"Failed to replace discarded connection: {e}")
+            return
+        if not self._give_to_waiter(conn):
+            self._idle.append(conn)
+
+    def _hand_over(self, waiter: asyncio.Future, conn: aiosqlite.Connection):
+        """Complete a waiter owned by another event loop, or return the connection to idle"""
+        if waiter.done():
+            self._idle.append(conn)
+        else:
+            waiter.set_result(conn)
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Async context manager yielding a pooled connection"""
+        conn = await self._acquire()
+        try:
+            yield conn
+        finally:
+            await self._release(conn)
+
+    async def close(self):
+        """Close idle connections; in-use connections close when released"""
+        self._closed = True
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool size, utilization and wait-time metrics"""
+        acquisitions = self.stats["acquisitions"]
+        return {
+            **self.stats,
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "waiting": len(self._waiters),
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "utilization": self._in_use / self.max_size,
+            "average_wait_ms": self.stats["total_wait_ms"] / acquisitions if acquisitions else 0.0,
+        }
@@ -0,0 +1,115 @@
+"""
+SQLite tuning profiles applied to every database connection
+"""
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class TuningProfile:
+    """PRAGMA settings for a database connection"""
+    name: str
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size_kb: int = 2000
+    mmap_size_mb: int = 0
+    temp_store: str = "DEFAULT"
+    busy_timeout_ms: int = 5000
+
+    def pragmas(self, read_only: bool = False) -> List[str]:
+        """PRAGMA statements for a connection; reader connections also get query_only"""
+        statements = []
+        if not read_only:
+            # WAL is persistent in the file, so only writers need to switch it
+            statements.append(f"PRAGMA journal_mode = {self.journal_mode}")
+        statements += [
+            f"PRAGMA synchronous = {self.synchronous}",
+            # Negative cache_size is a size in KiB rather than a page count
+            f"PRAGMA cache_size = -{self.cache_size_kb}",
+            f"PRAGMA mmap_size = {self.mmap_size_mb * 1024 * 1024}",
+            f"PRAGMA temp_store = {self.temp_store}",
+            f"PRAGMA busy_timeout = {self.busy_timeout_ms}",
+            "PRAGMA foreign_keys = ON",
+        ]
+        if read_only:
+            statements.append("PRAGMA query_only = ON")
+        return statements
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Profile settings as a plain dict"""
+        return {
+            "name": self.name,
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "cache_size_kb": self.cache_size_kb,
+            "mmap_size_mb": self.mmap_size_mb,
+            "temp_store": self.temp_store,
+            "busy_timeout_ms": self.busy_timeout_ms,
+        }
+
+
+PRESETS: Dict[str, TuningProfile] = {
+    # WAL so readers never block on the writer, moderate cache and mapping
+    "default": TuningProfile(
+        name="default", cache_size_kb=16384, mmap_size_mb=64, temp_store="MEMORY"
+    ),
+    # Analytical workloads: large page cache, map the whole file, sorts in memory
+    "read-heavy": TuningProfile(
+        name="read-heavy", cache_size_kb=131072, mmap_size_mb=1024, temp_store="MEMORY"
+    ),
+    # Small containers: SQLite's own cache size, no mapping, temp data on disk
+    "low-memory": TuningProfile(
+        name="low-memory", cache_size_kb=2000, mmap_size_mb=0, temp_store="FILE"
+    ),
+}
+
+_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SYNCHRONOUS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+_TEMP_STORES = {"DEFAULT", "FILE", "MEMORY"}
+
+
+def build_profile(
+    preset: str = "default",
+    journal_mode: Optional[str] = None,
+    synchronous: Optional[str] = None,
+    cache_size_kb: Optional[int] = None,
+    mmap_size_mb: Optional[int] = None,
+    temp_store: Optional[str] = None,
+    busy_timeout_ms: Optional[int] = None
+) -> TuningProfile:
+    """Resolve a named preset plus individual overrides into a profile"""
+    if preset not in PRESETS:
+        raise ValueError(f"Unknown database tuning profile '{preset}'. Choose from: {', '.join(PRESETS)}")
+
+    overrides: Dict[str, Any] = {}
+    for field_name, value, allowed in (
+        ("journal_mode", journal_mode, _JOURNAL_MODES),
+        ("synchronous", synchronous, _SYNCHRONOUS),
+        ("temp_store", temp_store, _TEMP_STORES),
+    ):
+        if value:
+            value = value.upper()
+            if value not in allowed:
+                raise ValueError(f"Invalid {field_name} '{value}'. Choose from: {', '.join(sorted(allowed))}")
+            overrides[field_name] = value
+    for field_name, value in (
+        ("cache_size_kb", cache_size_kb),
+        ("mmap_size_mb", mmap_size_mb),
+        ("busy_timeout_ms", busy_timeout_ms),
+    ):
+        if value is not None:
+            overrides[field_name] = max(0, int(value))
+    return replace(PRESETS[preset], **overrides)
+
+
+def profile_from_settings(settings) -> TuningProfile:
+    """Build the tuning profile configured in Settings"""
+    return build_profile(
+        settings.DB_TUNING_PROFILE,
+        journal_mode=settings.DB_JOURNAL_MODE,
+        synchronous=settings.DB_SYNCHRONOUS,
+        cache_size_kb=settings.DB_CACHE_SIZE_KB,
+        mmap_size_mb=settings.DB_MMAP_SIZE_MB,
+        temp_store=settings.DB_TEMP_STORE,
+        busy_timeout_ms=settings.DB_BUSY_TIMEOUT_MS
+    )
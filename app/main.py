@@ -1,30 +1,56 @@
 """
 Main FastAPI application for Text2SQL Assistant - Core Requirements Only
 """
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from contextlib import asynccontextmanager
+import asyncio
 import os
 
 from app.api.endpoints import router
 from app.utils.config import get_settings
+from app.utils.startup import startup_timer
 from app.database.connection import db_manager
+from app.services.llm_service import llm_service
+from app.services.example_store import example_store
+from app.services.query_log import query_log
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager"""
-    # Startup - Initialize database
+    # Startup - Initialize database and services without blocking the event loop
     print("🚀 Starting Text2SQL Assistant...")
-    db_manager.initialize_database()
+    with startup_timer.phase("database_init"):
+        await db_manager.initialize_database_async()
     print("✅ Database initialized successfully")
+    with startup_timer.phase("connection_pool"):
+        await db_manager.open()
+    
+    with startup_timer.phase("schema_context"):
+        await llm_service.ensure_schema_loaded()
+    with startup_timer.phase("example_index"):
+        await asyncio.to_thread(example_store.load)
+    
+    # The LLM SDK import is slow; warm it up in the background so the first
+    # request finds it ready without holding up startup
+    warm_up = asyncio.create_task(llm_service.ensure_model())
+    startup_timer.print_report()
     
     yield
     
     # Shutdown
     print("⏹️ Shutting down...")
+    warm_up.cancel()
+    llm_service.client.shutdown()
+    await asyncio.to_thread(query_log.close)
+    await db_manager.close()
 
 
 def create_app() -> FastAPI:
@@ -70,6 +96,7 @@ def create_app() -> FastAPI:
 
 # Create the app instance
 app = create_app()
+startup_timer.record("import_and_create_app", (time.perf_counter() - _import_started) * 1000)
 
 
 # For development server
@@ -4,6 +4,16 @@ Pydantic models for API request/response schemas
 from typing import Optional, List, Dict, Any, Union
 from pydantic import BaseModel, Field, validator
 from datetime import datetime
+from app.utils.result_formats import RESPONSE_FORMATS
+
+
+def _validate_response_format(v):
+    if v is None:
+        return v
+    v = v.strip().lower()
+    if v not in RESPONSE_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(RESPONSE_FORMATS)}")
+    return v
 
 
 # Request Models
@@ -21,6 +31,12 @@ class GenerateSQLRequest(BaseModel):
 class ExecuteSQLRequest(BaseModel):
     """Request model for /execute-sql endpoint"""
     sql_query: str = Field(..., min_length=1, max_length=5000, description="SQL query to execute")
+    timeout_ms: Optional[int] = Field(None, ge=1, description="Query deadline in milliseconds (server default when omitted)")
+    format: Optional[str] = Field(
+        None, description="Response format: rows (default), columnar, msgpack or arrow; Accept is used when omitted"
+    )
+    
+    _validate_format = validator('format', allow_reuse=True)(_validate_response_format)
     
     @validator('sql_query')
     def validate_sql_query(cls, v):
@@ -35,10 +51,63 @@ class ExecuteSQLRequest(BaseModel):
         return v.strip()
 
 
+class ExportRequest(BaseModel):
+    """Request model for /export endpoint"""
+    sql_query: str = Field(..., min_length=1, max_length=5000, description="SELECT query to export")
+    format: str = Field("ndjson", description="Export format: ndjson or csv")
+    gzip: bool = Field(False, description="Compress the stream (Content-Encoding: gzip)")
+    timeout_ms: Optional[int] = Field(
+        None, ge=1, description="Deadline for time spent in SQLite in milliseconds (server default when omitted)"
+    )
+    
+    @validator('sql_query')
+    def validate_sql_query(cls, v):
+        if not v.strip():
+            raise ValueError('SQL query cannot be empty')
+        return v.strip()
+    
+    @validator('format')
+    def validate_format(cls, v):
+        v = v.strip().lower()
+        if v not in ("ndjson", "csv"):
+            raise ValueError("format must be 'ndjson' or 'csv'")
+        return v
+
+
+class NextPageRequest(BaseModel):
+    """Request model for /next-page endpoint"""
+    cursor: str = Field(..., min_length=1, max_length=20000, description="next_cursor from the previous page")
+    timeout_ms: Optional[int] = Field(None, ge=1, description="Query deadline in milliseconds (the first page's when omitted)")
+    format: Optional[str] = Field(
+        None, description="Response format: rows (default), columnar, msgpack or arrow; Accept is used when omitted"
+    )
+    
+    _validate_format = validator('format', allow_reuse=True)(_validate_response_format)
+
+
+class ConfirmExampleRequest(BaseModel):
+    """Request model for /examples/confirm endpoint"""
+    query: str = Field(..., min_length=1, max_length=1000, description="Natural language question")
+    sql_query: str = Field(..., min_length=1, max_length=5000, description="SQL confirmed to answer the question")
+    
+    @validator('query', 'sql_query')
+    def validate_not_blank(cls, v):
+        if not v.strip():
+            raise ValueError('Value cannot be empty')
+        return v.strip()
+
+
 class QueryRequest(BaseModel):
     """Request model for /query endpoint (combined)"""
     query: str = Field(..., min_length=1, max_length=1000, description="Natural language query")
     include_sql: bool = Field(False, description="Whether to include generated SQL in response")
+    include_timings: bool = Field(False, description="Whether to include the per-stage timing breakdown in the response")
+    timeout_ms: Optional[int] = Field(None, ge=1, description="Query deadline in milliseconds (server default when omitted)")
+    format: Optional[str] = Field(
+        None, description="Response format: rows (default), columnar, msgpack or arrow; Accept is used when omitted"
+    )
+    
+    _validate_format = validator('format', allow_reuse=True)(_validate_response_format)
     
     @validator('query')
     def validate_query(cls, v):
@@ -54,6 +123,10 @@ class GenerateSQLResponse(BaseModel):
     confidence: Optional[float] = Field(None, ge=0.0, le=1.0, description="Confidence score of generation")
     explanation: Optional[str] = Field(None, description="Explanation of the SQL query")
     estimated_rows: Optional[int] = Field(None, ge=0, description="Estimated number of result rows")
+    query_plan: Optional[Dict[str, Any]] = Field(
+        None, description="Structured query plan with estimated cost and rows (when SQLite can plan the query)"
+    )
+    within_budget: Optional[bool] = Field(None, description="Whether the estimated cost is within the query cost budget")
 
 
 class ExecuteSQLResponse(BaseModel):
@@ -63,6 +136,16 @@ class ExecuteSQLResponse(BaseModel):
     row_count: int = Field(..., ge=0, description="Number of rows returned")
     execution_time_ms: Optional[float] = Field(None, ge=0, description="Query execution time in milliseconds")
     error_message: Optional[str] = Field(None, description="Error message if query failed")
+    error_code: Optional[str] = Field(None, description="Machine-readable error code, e.g. QUERY_TIMEOUT")
+    truncated: bool = Field(False, description="Whether rows were cut off by the result limits")
+    total_rows: Optional[int] = Field(None, ge=0, description="Total rows the query produced, when known")
+    columns: Optional[List[Dict[str, Any]]] = Field(
+        None, description="Column name, type and display format (non-row response formats)"
+    )
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page of a truncated result (POST /next-page)")
+    summary: Optional[Dict[str, Any]] = Field(
+        None, description="Column types and statistics (null count, min, max, mean, sum, percentiles) of the returned rows"
+    )
 
 
 class QueryResponse(BaseModel):
@@ -75,6 +158,19 @@ class QueryResponse(BaseModel):
     explanation: Optional[str] = Field(None, description="Explanation of the query and results")
     execution_time_ms: Optional[float] = Field(None, ge=0, description="Total execution time in milliseconds")
     error_message: Optional[str] = Field(None, description="Error message if process failed")
+    error_code: Optional[str] = Field(None, description="Machine-readable error code, e.g. QUERY_TIMEOUT")
+    truncated: bool = Field(False, description="Whether rows were cut off by the result limits")
+    total_rows: Optional[int] = Field(None, ge=0, description="Total rows the query produced, when known")
+    columns: Optional[List[Dict[str, Any]]] = Field(
+        None, description="Column name, type and display format (non-row response formats)"
+    )
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page of a truncated result (POST /next-page)")
+    summary: Optional[Dict[str, Any]] = Field(
+        None, description="Column types and statistics (null count, min, max, mean, sum, percentiles) of the returned rows"
+    )
+    timings_ms: Optional[Dict[str, float]] = Field(
+        None, description="Milliseconds spent per pipeline stage and in total (when include_timings is set)"
+    )
 
 
 # Database Schema Models (for context sharing)
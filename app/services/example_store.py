@@ -0,0 +1,305 @@
+"""
+Few-shot example store with a NumPy-vectorized TF-IDF character n-gram index
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.generation_cache import normalize_question
+from app.utils.config import get_settings
+
+
+# Examples that used to be hard-coded in the prompt
+SEED_EXAMPLES = [
+    ("Show all customers from Mumbai",
+     "SELECT customer_id, first_name, last_name, email, phone FROM customers WHERE city = 'Mumbai';"),
+    ("What are the top 5 most expensive products?",
+     "SELECT product_id, product_name, brand, price_inr, category FROM products ORDER BY price_inr DESC LIMIT 5;"),
+    ("Show all orders from the last 30 days with customer details",
+     """SELECT o.order_id, o.order_date, o.total_amount_inr, c.first_name, c.last_name, c.city
+     FROM orders o
+     JOIN customers c ON o.customer_id = c.customer_id
+     WHERE o.order_date >= datetime('now', '-30 days')
+     ORDER BY o.order_date DESC;"""),
+    ("Which products have never been ordered?",
+     """SELECT p.product_id, p.product_name, p.brand, p.category, p.price_inr
+     FROM products p
+     LEFT JOIN order_items oi ON p.product_id = oi.product_id
+     WHERE oi.product_id IS NULL;"""),
+    ("Show total sales by category",
+     """SELECT p.category, COUNT(oi.order_item_id) as total_orders, SUM(oi.total_price_inr) as total_sales_inr
+     FROM products p
+     JOIN order_items oi ON p.product_id = oi.product_id
+     JOIN orders o ON oi.order_id = o.order_id
+     WHERE o.order_status = 'delivered'
+     GROUP BY p.category
+     ORDER BY total_sales_inr DESC;"""),
+    ("Find customers who spent more than 50000 INR",
+     """SELECT c.customer_id, c.first_name, c.last_name, c.email, c.city, SUM(o.total_amount_inr) as total_spent_inr
+     FROM customers c
+     JOIN orders o ON c.customer_id = o.customer_id
+     WHERE o.payment_status = 'completed'
+     GROUP BY c.customer_id, c.first_name, c.last_name, c.email, c.city
+     HAVING SUM(o.total_amount_inr) > 50000
+     ORDER BY total_spent_inr DESC;"""),
+]
+
+
+@dataclass(frozen=True)
+class Example:
+    """A stored (question, SQL) pair"""
+    question: str
+    sql_query: str
+    source: str = "seed"
+
+
+class NGramIndex:
+    """
+    Inverted TF-IDF index over hashed character n-grams
+
+    Postings live in a feature-sorted main segment plus a small unsorted
+    tail. New documents are appended to the tail and merged into the main
+    segment once the tail outgrows a quarter of the main segment (or
+    ``merge_threshold`` postings), so additions never rebuild the whole
+    index and merging stays amortized O(log n) per posting.
+
+    Queries gather the postings of the query's n-grams and accumulate
+    scores with ``np.bincount``. N-grams are visited rarest first and the
+    most common ones are skipped once ``posting_budget`` postings have been
+    gathered: their IDF weight is close to zero, so they barely change the
+    ranking but dominate the work on large stores.
+    """
+
+    def __init__(self, ngram: int = 3, dims: int = 1 << 20, merge_threshold: int = 4096,
+                 posting_budget: int = 20000):
+        self.ngram = ngram
+        self.dims = dims
+        self.merge_threshold = merge_threshold
+        self.posting_budget = posting_budget
+        self.doc_count = 0
+        self._df = np.zeros(dims, dtype=np.int32)
+        # Main segment, sorted by feature
+        self._features = np.empty(0, dtype=np.int64)
+        self._docs = np.empty(0, dtype=np.int32)
+        self._weights = np.empty(0, dtype=np.float32)
+        self._keys = np.empty(0, dtype=np.int64)
+        self._starts = np.empty(0, dtype=np.int64)
+        self._ends = np.empty(0, dtype=np.int64)
+        # Unsorted tail of recent postings
+        self._tail_features: List[np.ndarray] = []
+        self._tail_docs: List[np.ndarray] = []
+        self._tail_weights: List[np.ndarray] = []
+        self._tail_size = 0
+
+    def _vectorize(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (feature ids, L2-normalized term frequencies) for a text"""
+        padded = f" {normalize_question(text)} "
+        counts: Dict[int, int] = {}
+        for i in range(len(padded) - self.ngram + 1):
+            feature = zlib.crc32(padded[i:i + self.ngram].encode("utf-8")) % self.dims
+            counts[feature] = counts.get(feature, 0) + 1
+        if not counts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        features = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        tf = 1.0 + np.log(tf)
+        return features, tf / np.linalg.norm(tf)
+
+    def add(self, text: str) -> int:
+        """Index a document and return its id"""
+        doc_id = self.doc_count
+        features, weights = self._vectorize(text)
+        self.doc_count += 1
+        self._df[features] += 1
+        self._tail_features.append(features)
+        self._tail_docs.append(np.full(len(features), doc_id, dtype=np.int32))
+        self._tail_weights.append(weights)
+        self._tail_size += len(features)
+        if self._tail_size >= max(self.merge_threshold, len(self._features) // 4):
+            self._merge()
+        return doc_id
+
+    def _tail_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Tail postings as flat arrays, concatenated once per change"""
+        if len(self._tail_features) > 1:
+            self._tail_features = [np.concatenate(self._tail_features)]
+            self._tail_docs = [np.concatenate(self._tail_docs)]
+            self._tail_weights = [np.concatenate(self._tail_weights)]
+        return self._tail_features[0], self._tail_docs[0], self._tail_weights[0]
+
+    def _merge(self):
+        """Fold the tail into the sorted main segment"""
+        if not self._tail_size:
+            return
+        features = np.concatenate([self._features, *self._tail_features])
+        docs = np.concatenate([self._docs, *self._tail_docs])
+        weights = np.concatenate([self._weights, *self._tail_weights])
+        order = np.argsort(features, kind="stable")
+        self._features, self._docs, self._weights = features[order], docs[order], weights[order]
+
+        self._keys, self._starts = np.unique(self._features, return_index=True)
+        self._ends = np.append(self._starts[1:], len(self._features))
+        self._tail_features, self._tail_docs, self._tail_weights = [], [], []
+        self._tail_size = 0
+
+    def search(self, text: str, k: int) -> List[Tuple[int, float]]:
+        """Return up to k (doc_id, score) pairs by descending similarity"""
+        if not self.doc_count or k <= 0:
+            return []
+        features, tf = self._vectorize(text)
+        if not len(features):
+            return []
+
+        idf = np.log((1.0 + self.doc_count) / (1.0 + self._df[features])) + 1.0
+        query_weights = tf * idf * idf
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+
+        if len(self._keys):
+            pos = np.searchsorted(self._keys, features)
+            pos = np.minimum(pos, len(self._keys) - 1)
+            found = np.flatnonzero(self._keys[pos] == features)
+            if len(found):
+                starts, ends = self._starts[pos[found]], self._ends[pos[found]]
+                lengths = ends - starts
+                # Rarest n-grams first; drop the common tail beyond the budget
+                order = np.argsort(lengths, kind="stable")
+                keep = order[np.cumsum(lengths[order]) <= max(self.posting_budget, lengths[order[0]])]
+                starts, lengths, found = starts[keep], lengths[keep], found[keep]
+                total = int(lengths.sum())
+                # Concatenate the posting ranges without a Python loop
+                offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+                idx = offsets + np.arange(total)
+                contrib = self._weights[idx] * np.repeat(query_weights[found], lengths)
+                scores += np.bincount(self._docs[idx], weights=contrib, minlength=self.doc_count)
+
+        if self._tail_size:
+            tail_features, tail_docs, tail_weights = self._tail_arrays()
+            order = np.argsort(features)
+            sorted_features = features[order]
+            pos = np.minimum(np.searchsorted(sorted_features, tail_features), len(features) - 1)
+            mask = sorted_features[pos] == tail_features
+            if mask.any():
+                contrib = tail_weights[mask] * query_weights[order[pos[mask]]]
+                scores += np.bincount(tail_docs[mask], weights=contrib, minlength=self.doc_count)
+
+        k = min(k, self.doc_count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(doc), float(scores[doc])) for doc in top if scores[doc] > 0]
+
+
+class ExampleStore:
+    """Persistent store of (question, SQL) examples with similarity search"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.examples: List[Example] = []
+        self.index = NGramIndex()
+        self._normalized: Dict[str, int] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _get_conn(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS examples (
+                    example_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    question TEXT NOT NULL,
+                    normalized_question TEXT UNIQUE NOT NULL,
+                    sql_query TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def load(self):
+        """Load stored examples (seeding an empty store) and build the index"""
+        if self._loaded:
+            return
+        self._loaded = True
+
+        rows = []
+        with self._lock:
+            conn = self._get_conn()
+            if conn is not None:
+                rows = conn.execute(
+                    "SELECT question, sql_query, source FROM examples ORDER BY example_id"
+                ).fetchall()
+
+        if rows:
+            for question, sql_query, source in rows:
+                self._add_in_memory(Example(question, sql_query, source))
+        else:
+            for question, sql_query in SEED_EXAMPLES:
+                example = Example(question, sql_query, "seed")
+                if self._add_in_memory(example):
+                    self._persist(example)
+        self.index._merge()
+
+    def _add_in_memory(self, example: Example) -> bool:
+        normalized = normalize_question(example.question)
+        if not normalized or normalized in self._normalized:
+            return False
+        self._normalized[normalized] = self.index.add(example.question)
+        self.examples.append(example)
+        return True
+
+    def _persist(self, example: Example):
+        with self._lock:
+            conn = self._get_conn()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR IGNORE INTO examples (question, normalized_question, sql_query, source, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (example.question, normalize_question(example.question), example.sql_query,
+                 example.source, time.time())
+            )
+            conn.commit()
+
+    async def add(self, question: str, sql_query: str, source: str = "history") -> bool:
+        """Add an example; the index updates immediately and the write happens off the event loop"""
+        self.load()
+        example = Example(question, sql_query, source)
+        if not self._add_in_memory(example):
+            return False
+        if self.path:
+            try:
+                await asyncio.to_thread(self._persist, example)
+            except Exception as e:
+                print(f"Failed to persist example: {e}")
+        return True
+
+    def top_k(self, question: str, k: int = 3) -> List[Example]:
+        """Return the k stored examples most similar to the question"""
+        self.load()
+        return [self.examples[doc_id] for doc_id, _ in self.index.search(question, k)]
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self.examples)
+
+
+def _create_example_store() -> ExampleStore:
+    settings = get_settings()
+    return ExampleStore(settings.EXAMPLE_STORE_PATH or None)
+
+
+# Global example store instance
+example_store = _create_example_store()
@@ -0,0 +1,173 @@
+"""
+Streaming export of full query results as NDJSON or CSV
+"""
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.database.connection import db_manager, QueryTimeoutError
+from app.services.sql_service import sql_service
+from app.utils.config import get_settings
+
+EXPORT_FORMATS = ("ndjson", "csv")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+
+class ExportError(Exception):
+    """Raised when an export cannot be started"""
+
+    def __init__(self, message: str, error_code: str):
+        self.error_code = error_code
+        super().__init__(message)
+
+
+def encode_ndjson(columns: List[str], rows: List[Any]) -> str:
+    """One JSON object per row, newline terminated"""
+    return "".join(
+        json.dumps(dict(zip(columns, row)), default=str, ensure_ascii=False) + "\n" for row in rows
+    )
+
+
+class _CSVEncoder:
+    """Incremental CSV writer reusing one buffer"""
+
+    def __init__(self):
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer, lineterminator="\n")
+
+    def __call__(self, rows: List[Any]) -> str:
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        self.writer.writerows(rows)
+        return self.buffer.getvalue()
+
+
+class ExportService:
+    """
+    Stream query results without the /execute-sql row and byte limits
+
+    Exports use the same safety validation and deadline rules as
+    /execute-sql (the deadline counts SQLite time only) and are fetched
+    batch by batch as the client reads, so memory use does not grow with
+    the size of the result. At most EXPORT_MAX_CONCURRENT exports run at
+    once, since each holds a pooled connection while it streams.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.sql = sql_service
+        self.batch_size = self.settings.EXPORT_BATCH_SIZE
+        self.max_concurrent = self.settings.EXPORT_MAX_CONCURRENT
+        self.active = 0
+        self.stats = {
+            "exports": 0,
+            "completed": 0,
+            "rejected": 0,
+            "busy": 0,
+            "timeouts": 0,
+            "failures": 0,
+            "disconnects": 0,
+            "rows_exported": 0,
+            "bytes_sent": 0,
+        }
+
+    async def open_export(
+        self,
+        sql_query: str,
+        fmt: str = "ndjson",
+        timeout_ms: Optional[int] = None,
+        compress: bool = False
+    ) -> AsyncIterator[bytes]:
+        """
+        Validate and start an export, returning an iterator of encoded chunks
+
+        The statement is prepared before this returns, so unsafe or invalid
+        SQL raises ExportError instead of failing mid-stream. A deadline hit
+        while streaming ends an NDJSON export with an ``{"error": ...}`` line;
+        a CSV export has no in-band error, so the stream is aborted.
+
+        Raises:
+            ExportError: UNSAFE_QUERY, EXPORT_BUSY, QUERY_TIMEOUT or EXECUTION_FAILED
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ExportError(f"Unknown export format '{fmt}'", "INVALID_FORMAT")
+        is_safe, safety_error = self.sql._validate_query_safety(sql_query)
+        if not is_safe:
+            self.stats["rejected"] += 1
+            raise ExportError(safety_error, "UNSAFE_QUERY")
+        if self.active >= self.max_concurrent:
+            self.stats["busy"] += 1
+            raise ExportError(f"Too many exports in progress (limit {self.max_concurrent})", "EXPORT_BUSY")
+
+        timeout = self.sql.resolve_timeout("export", timeout_ms)
+        rows = db_manager.stream_query(
+            self.sql._clean_sql_query(sql_query), batch_size=self.batch_size, timeout=timeout
+        )
+        self.active += 1
+        try:
+            columns = await rows.__anext__()
+        except QueryTimeoutError as e:
+            self.active -= 1
+            self.stats["timeouts"] += 1
+            raise ExportError(str(e), "QUERY_TIMEOUT")
+        except Exception as e:
+            self.active -= 1
+            self.stats["failures"] += 1
+            raise ExportError(f"Query execution failed: {str(e)}", "EXECUTION_FAILED")
+
+        self.stats["exports"] += 1
+        return self._encode(rows, columns, fmt, compress)
+
+    async def _encode(self, rows, columns: List[str], fmt: str, compress: bool) -> AsyncIterator[bytes]:
+        """Encode row batches, optionally gzip-compressed, releasing the connection when done"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        encode_csv = _CSVEncoder() if fmt == "csv" else None
+        outcome = "disconnects"  # Client went away, unless the stream ends or fails
+
+        def chunk(text: str) -> bytes:
+            data = text.encode("utf-8")
+            if compressor is not None:
+                data = compressor.compress(data)
+            self.stats["bytes_sent"] += len(data)
+            return data
+
+        try:
+            if encode_csv is not None:
+                yield chunk(encode_csv([columns]))
+            try:
+                async for batch in rows:
+                    self.stats["rows_exported"] += len(batch)
+                    data = chunk(encode_csv(batch) if encode_csv is not None else encode_ndjson(columns, batch))
+                    if data:
+                        yield data
+            except QueryTimeoutError as e:
+                outcome = "timeouts"
+                if encode_csv is not None:
+                    raise
+                yield chunk(json.dumps({"error": str(e), "error_code": "QUERY_TIMEOUT"}) + "\n")
+            if compressor is not None:
+                tail = compressor.flush()
+                self.stats["bytes_sent"] += len(tail)
+                yield tail
+            if outcome != "timeouts":
+                outcome = "completed"
+        except QueryTimeoutError:
+            raise
+        except Exception as e:
+            outcome = "failures"
+            print(f"Export failed: {e}")
+            raise
+        finally:
+            self.stats[outcome] += 1
+            self.active -= 1
+            await rows.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get export counts, rows and bytes streamed and the active export count"""
+        return {**self.stats, "active": self.active, "max_concurrent": self.max_concurrent}
+
+
+# Global export service instance
+export_service = ExportService()
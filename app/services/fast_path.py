@@ -0,0 +1,193 @@
+"""
+Rule-based fast path: answer common question shapes with SQL templates, without calling the LLM
+"""
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.generation_cache import normalize_question
+from app.services.schema_linker import SchemaCatalog
+
+
+FAST_PATH_CONFIDENCE = 0.95
+
+_LEAD = r"(?:(?:please )?(?:show|list|find|get|give|display|fetch|what are|which are|who are)(?: me)?(?: all)?(?: the)? )?"
+
+_PRODUCT_ORDERINGS = {
+    "most expensive": ("price_inr", "DESC"),
+    "costliest": ("price_inr", "DESC"),
+    "priciest": ("price_inr", "DESC"),
+    "cheapest": ("price_inr", "ASC"),
+    "least expensive": ("price_inr", "ASC"),
+    "highest rated": ("rating", "DESC"),
+    "best rated": ("rating", "DESC"),
+    "top rated": ("rating", "DESC"),
+    "lowest rated": ("rating", "ASC"),
+    "worst rated": ("rating", "ASC"),
+}
+_ORDER_BY_WORDS = {"price": "price_inr", "rating": "rating", "stock": "stock_quantity"}
+_COUNT_TABLES = {"customer": "customers", "product": "products", "order": "orders"}
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+@dataclass
+class FastPathResult:
+    """SQL produced by a template"""
+    rule: str
+    sql_query: str
+    confidence: float = FAST_PATH_CONFIDENCE
+
+
+class FastPathEngine:
+    """Match questions against templates built from the schema catalog"""
+
+    def __init__(self, catalog: Optional[SchemaCatalog]):
+        self.catalog = catalog
+        self._values: Dict[Tuple[str, str], Dict[str, str]] = {}
+        if catalog is not None:
+            for key, values in {**catalog.column_values, **catalog.enum_values}.items():
+                self._values[key] = {normalize_question(v): v for v in values}
+
+        orderings = "|".join(sorted(_PRODUCT_ORDERINGS, key=len, reverse=True))
+        self.rules: List[Tuple[str, re.Pattern, Callable[[re.Match], Optional[str]]]] = [
+            ("customers_by_location", re.compile(
+                _LEAD + r"customers? (?:who are |who live |living |located |based )?(?:from|in) (?P<place>.+)"
+            ), self._customers_by_location),
+            ("top_products", re.compile(
+                _LEAD + r"(?:top (?P<n>\d+) |(?P<n2>\d+) )(?P<ordering>" + orderings + r")? ?"
+                r"(?P<category>.+? )?products?(?: by (?P<by>price|rating|stock))?"
+            ), self._top_products),
+            ("orders_by_status", re.compile(
+                _LEAD + r"(?:orders? (?:with|having|in) (?:order )?status (?P<status>\w+)"
+                r"|orders? (?:that are|which are|that were|which were|currently) (?P<status2>\w+)"
+                r"|(?P<status3>\w+) orders?)"
+            ), self._orders_by_status),
+            ("sales_by_category", re.compile(
+                r"(?:(?:show|what is|what are|get|give)(?: me)?(?: the)? )?total (?:sales|revenue) "
+                r"(?:by|per|for each|for every) (?:product )?category"
+            ), self._sales_by_category),
+            ("count_table", re.compile(
+                r"(?:how many|count(?: of)?(?: the)?|number of|total number of) (?:all )?"
+                r"(?P<table>customer|product|order)s?(?: are there| do we have| in total| exist)?"
+            ), self._count_table),
+        ]
+        self.stats: Dict[str, Any] = {
+            "attempts": 0,
+            "hits": 0,
+            "hit_time_us": 0.0,
+            "miss_time_us": 0.0,
+            "rules": {name: 0 for name, _, _ in self.rules},
+        }
+
+    def _lookup(self, key: Tuple[str, str], phrase: str) -> Optional[str]:
+        return self._values.get(key, {}).get(phrase.strip())
+
+    def _customers_by_location(self, match: re.Match) -> Optional[str]:
+        place = match.group("place")
+        for column in ("city", "state"):
+            value = self._lookup(("customers", column), place)
+            if value is not None:
+                return (
+                    "SELECT customer_id, first_name, last_name, email, phone, city, state "
+                    f"FROM customers WHERE {column} = {_sql_literal(value)};"
+                )
+        return None
+
+    def _top_products(self, match: re.Match) -> Optional[str]:
+        limit = int(match.group("n") or match.group("n2"))
+        if limit <= 0:
+            return None
+
+        ordering, by = match.group("ordering"), match.group("by")
+        if ordering and by:
+            return None
+        if ordering:
+            column, direction = _PRODUCT_ORDERINGS[ordering]
+        elif by:
+            column, direction = _ORDER_BY_WORDS[by], "DESC"
+        else:
+            return None
+
+        where = ""
+        category = (match.group("category") or "").strip()
+        if category:
+            for key in (("products", "category"), ("products", "subcategory"), ("products", "brand")):
+                value = self._lookup(key, category)
+                if value is not None:
+                    where = f" WHERE {key[1]} = {_sql_literal(value)}"
+                    break
+            else:
+                return None
+
+        return (
+            "SELECT product_id, product_name, brand, category, price_inr, rating FROM products"
+            f"{where} ORDER BY {column} {direction} LIMIT {limit};"
+        )
+
+    def _orders_by_status(self, match: re.Match) -> Optional[str]:
+        status = match.group("status") or match.group("status2") or match.group("status3")
+        value = self._lookup(("orders", "order_status"), status)
+        if value is None:
+            return None
+        return (
+            "SELECT order_id, customer_id, order_date, order_status, total_amount_inr, payment_method "
+            f"FROM orders WHERE order_status = {_sql_literal(value)} ORDER BY order_date DESC;"
+        )
+
+    def _sales_by_category(self, match: re.Match) -> Optional[str]:
+        return (
+            "SELECT p.category, COUNT(oi.order_item_id) AS total_orders, SUM(oi.total_price_inr) AS total_sales_inr "
+            "FROM products p JOIN order_items oi ON p.product_id = oi.product_id "
+            "JOIN orders o ON oi.order_id = o.order_id WHERE o.order_status = 'delivered' "
+            "GROUP BY p.category ORDER BY total_sales_inr DESC;"
+        )
+
+    def _count_table(self, match: re.Match) -> Optional[str]:
+        table = _COUNT_TABLES[match.group("table")]
+        if self.catalog is not None and table not in self.catalog.tables:
+            return None
+        return f"SELECT COUNT(*) AS total_{table} FROM {table};"
+
+    def match(self, natural_query: str) -> Optional[FastPathResult]:
+        """Return template SQL for a recognized question shape, or None to fall through to the LLM"""
+        start = time.perf_counter()
+        self.stats["attempts"] += 1
+        question = normalize_question(natural_query)
+
+        result = None
+        if self.catalog is not None and self.catalog.tables:
+            for name, pattern, build in self.rules:
+                matched = pattern.fullmatch(question)
+                if matched is None:
+                    continue
+                sql_query = build(matched)
+                if sql_query is not None:
+                    result = FastPathResult(rule=name, sql_query=sql_query)
+                    break
+
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        if result is None:
+            self.stats["miss_time_us"] += elapsed_us
+            return None
+
+        self.stats["hits"] += 1
+        self.stats["hit_time_us"] += elapsed_us
+        self.stats["rules"][result.rule] += 1
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fast-path hit rate and latency"""
+        attempts, hits = self.stats["attempts"], self.stats["hits"]
+        misses = attempts - hits
+        return {
+            "attempts": attempts,
+            "hits": hits,
+            "hit_rate": hits / attempts if attempts else 0.0,
+            "average_hit_latency_us": self.stats["hit_time_us"] / hits if hits else 0.0,
+            "average_miss_latency_us": self.stats["miss_time_us"] / misses if misses else 0.0,
+            "rules": dict(self.stats["rules"]),
+        }
@@ -0,0 +1,247 @@
+"""
+Two-tier cache for natural language to SQL generations
+
+Tier 1 is an in-memory LRU with TTL, tier 2 a small SQLite file that survives
+restarts. Keys combine the normalized question with a fingerprint of the
+schema context, and a schema change purges entries built for the old schema.
+"""
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.utils.config import get_settings
+from app.utils.lru import LRUCache
+
+
+# Sentence punctuation and quotes only: comparison operators, signs, percent
+# and decimal points change a question's meaning and are kept
+_PUNCTUATION_RE = re.compile(r"[?;:\"'`()]|!(?!=)|,(?!\d)|\.(?!\d)")
+_OPERATOR_RE = re.compile(r"\s*(<=|>=|!=|<>|==|[<>=])\s*")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a natural language question (case, whitespace, sentence punctuation)"""
+    normalized = _PUNCTUATION_RE.sub(" ", question.lower())
+    normalized = _OPERATOR_RE.sub(r" \1 ", normalized)
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+def schema_fingerprint(schema_context: str) -> str:
+    """Stable fingerprint of the schema context used to build prompts"""
+    return hashlib.sha256(schema_context.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class CachedGeneration:
+    """A cached SQL generation result"""
+    sql_query: str
+    explanation: Optional[str]
+    confidence: Optional[float]
+
+
+class GenerationCache:
+    """In-memory LRU in front of a persistent SQLite tier"""
+
+    def __init__(
+        self,
+        maxsize: int = 512,
+        ttl_seconds: Optional[float] = 3600,
+        disk_path: Optional[str] = None,
+        disk_ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        enabled: bool = True
+    ):
+        self.enabled = enabled
+        self.memory = LRUCache(maxsize=maxsize, ttl_seconds=ttl_seconds)
+        self.disk_path = disk_path
+        self.disk_ttl_seconds = disk_ttl_seconds
+        self._disk_conn: Optional[sqlite3.Connection] = None
+        self._disk_lock = threading.Lock()
+        self._schema_hash: Optional[str] = None
+        self.stats = {
+            "disk_hits": 0,
+            "disk_misses": 0,
+            "disk_errors": 0,
+            "stores": 0,
+            "invalidations": 0,
+        }
+
+    # Keys and invalidation
+
+    def make_key(self, question: str, schema_hash: str) -> str:
+        """Build the cache key for a question under a schema fingerprint"""
+        raw = f"{schema_hash}\x00{normalize_question(question)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _check_schema(self, schema_hash: str) -> bool:
+        """Purge entries built for another schema; returns True if a purge is needed on disk"""
+        if self._schema_hash == schema_hash:
+            return False
+
+        previous = self._schema_hash
+        self._schema_hash = schema_hash
+        if previous is not None:
+            self.memory.clear()
+            self.stats["invalidations"] += 1
+        return True
+
+    # Disk tier
+
+    def _get_disk_conn(self) -> Optional[sqlite3.Connection]:
+        if not self.disk_path:
+            return None
+        if self._disk_conn is None:
+            db_dir = Path(self.disk_path).parent
+            db_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.disk_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS generation_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    schema_hash TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    sql_query TEXT NOT NULL,
+                    explanation TEXT,
+                    confidence REAL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL
+                )
+            """)
+            conn.commit()
+            self._disk_conn = conn
+        return self._disk_conn
+
+    def _disk_get(self, key: str, schema_hash: str, purge: bool) -> Optional[CachedGeneration]:
+        with self._disk_lock:
+            conn = self._get_disk_conn()
+            if conn is None:
+                return None
+            if purge:
+                conn.execute("DELETE FROM generation_cache WHERE schema_hash != ?", (schema_hash,))
+                conn.commit()
+            row = conn.execute(
+                "SELECT sql_query, explanation, confidence, expires_at FROM generation_cache WHERE cache_key = ?",
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[3] and row[3] < time.time():
+                conn.execute("DELETE FROM generation_cache WHERE cache_key = ?", (key,))
+                conn.commit()
+                return None
+            return CachedGeneration(sql_query=row[0], explanation=row[1], confidence=row[2])
+
+    def _disk_put(self, key: str, schema_hash: str, question: str, value: CachedGeneration):
+        with self._disk_lock:
+            conn = self._get_disk_conn()
+            if conn is None:
+                return
+            now = time.time()
+            expires_at = now + self.disk_ttl_seconds if self.disk_ttl_seconds else None
+            conn.execute(
+                "INSERT OR REPLACE INTO generation_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, schema_hash, question, value.sql_query, value.explanation,
+                 value.confidence, now, expires_at)
+            )
+            conn.commit()
+
+    # Public API
+
+    async def get(self, question: str, schema_context: str) -> Optional[CachedGeneration]:
+        """Look up a generation, checking memory first and then disk"""
+        if not self.enabled:
+            return None
+
+        schema_hash = schema_fingerprint(schema_context)
+        purge = self._check_schema(schema_hash)
+        key = self.make_key(question, schema_hash)
+
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+
+        if not self.disk_path:
+            return None
+
+        try:
+            cached = await asyncio.to_thread(self._disk_get, key, schema_hash, purge)
+        except Exception as e:
+            self.stats["disk_errors"] += 1
+            print(f"Generation cache disk lookup failed: {e}")
+            return None
+
+        if cached is None:
+            self.stats["disk_misses"] += 1
+            return None
+
+        self.stats["disk_hits"] += 1
+        self.memory.set(key, cached)
+        return cached
+
+    async def put(
+        self,
+        question: str,
+        schema_context: str,
+        sql_query: str,
+        explanation: Optional[str],
+        confidence: Optional[float]
+    ):
+        """Store a generation in both tiers"""
+        if not self.enabled:
+            return
+
+        schema_hash = schema_fingerprint(schema_context)
+        self._check_schema(schema_hash)
+        key = self.make_key(question, schema_hash)
+        value = CachedGeneration(sql_query=sql_query, explanation=explanation, confidence=confidence)
+        self.memory.set(key, value)
+        self.stats["stores"] += 1
+
+        if self.disk_path:
+            try:
+                await asyncio.to_thread(self._disk_put, key, schema_hash, question, value)
+            except Exception as e:
+                self.stats["disk_errors"] += 1
+                print(f"Generation cache disk write failed: {e}")
+
+    def clear(self):
+        """Drop every cached generation from both tiers"""
+        self.memory.clear()
+        with self._disk_lock:
+            conn = self._get_disk_conn()
+            if conn is not None:
+                conn.execute("DELETE FROM generation_cache")
+                conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters for both tiers"""
+        memory_stats = self.memory.get_stats()
+        lookups = memory_stats["hits"] + memory_stats["misses"]
+        total_hits = memory_stats["hits"] + self.stats["disk_hits"]
+        return {
+            "enabled": self.enabled,
+            "memory": memory_stats,
+            **self.stats,
+            "hit_rate": total_hits / lookups if lookups else 0.0,
+        }
+
+
+def _create_generation_cache() -> GenerationCache:
+    settings = get_settings()
+    return GenerationCache(
+        maxsize=settings.GENERATION_CACHE_SIZE,
+        ttl_seconds=settings.GENERATION_CACHE_TTL_SECONDS,
+        disk_path=settings.GENERATION_CACHE_PATH or None,
+        disk_ttl_seconds=settings.GENERATION_CACHE_DISK_TTL_SECONDS,
+        enabled=settings.GENERATION_CACHE_ENABLED
+    )
+
+
+# Global generation cache instance
+generation_cache = _create_generation_cache()
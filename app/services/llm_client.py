@@ -0,0 +1,131 @@
+"""
+Async LLM client layer with bounded concurrency, per-call timeouts and cancellation
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+
+class LLMTimeoutError(Exception):
+    """Raised when an LLM call exceeds its timeout"""
+
+    def __init__(self, timeout_seconds: float):
+        self.timeout_seconds = timeout_seconds
+        super().__init__(f"LLM call timed out after {timeout_seconds:.1f} seconds")
+
+
+class AsyncLLMClient:
+    """
+    Non-blocking wrapper around a text generation model
+
+    Models exposing ``generate_content_async`` are awaited directly. Synchronous
+    models (``generate_content``) run on a dedicated thread pool so a slow
+    generation never blocks the event loop. A semaphore bounds the number of
+    in-flight calls; callers beyond the limit wait in FIFO order. A timed out
+    synchronous call cannot be interrupted, but the pool size keeps the number
+    of abandoned worker threads bounded as well.
+    """
+
+    def __init__(self, model: Any = None, max_concurrency: int = 8, timeout_seconds: float = 30.0):
+        self.model = model
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout_seconds = timeout_seconds
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight = 0
+        self.stats = {
+            "calls": 0,
+            "completed": 0,
+            "timeouts": 0,
+            "cancelled": 0,
+            "errors": 0,
+            "total_wait_ms": 0.0,
+            "total_call_ms": 0.0,
+        }
+
+    def set_model(self, model: Any):
+        """Swap the underlying model (used at init and by tests/benchmarks)"""
+        self.model = model
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores are bound to the loop they first block on
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="llm-client"
+            )
+        return self._executor
+
+    async def _call_model(self, prompt: str) -> Any:
+        """Invoke the model without blocking the event loop"""
+        if hasattr(self.model, "generate_content_async"):
+            return await self.model.generate_content_async(prompt)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.model.generate_content, prompt)
+
+    async def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """
+        Generate text for a prompt
+
+        Raises:
+            LLMTimeoutError: if the call (including queueing) exceeds the timeout
+            asyncio.CancelledError: if the caller is cancelled
+        """
+        if self.model is None:
+            raise RuntimeError("No LLM model configured")
+
+        timeout = self.timeout_seconds if timeout is None else timeout
+        self.stats["calls"] += 1
+        queued_at = time.perf_counter()
+
+        async def bounded_call():
+            async with self._get_semaphore():
+                started_at = time.perf_counter()
+                self.stats["total_wait_ms"] += (started_at - queued_at) * 1000
+                self._in_flight += 1
+                try:
+                    return await self._call_model(prompt)
+                finally:
+                    self._in_flight -= 1
+                    self.stats["total_call_ms"] += (time.perf_counter() - started_at) * 1000
+
+        try:
+            response = await asyncio.wait_for(bounded_call(), timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            raise LLMTimeoutError(timeout)
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            raise
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+
+        self.stats["completed"] += 1
+        return getattr(response, "text", response) or ""
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get client usage statistics"""
+        completed = self.stats["completed"]
+        return {
+            **self.stats,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "average_call_ms": self.stats["total_call_ms"] / completed if completed else 0.0,
+        }
+
+    def shutdown(self):
+        """Release the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
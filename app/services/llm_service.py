@@ -1,29 +1,88 @@
 """
 LLM Service for Text-to-SQL conversion using Gemini API
 """
-import google.generativeai as genai
+import asyncio
 from typing import Optional, Tuple, Dict, Any
 import json
 import re
 import time
 from app.utils.config import get_settings
 from app.database.connection import db_manager
+from app.services.llm_client import AsyncLLMClient, LLMTimeoutError
+from app.services.generation_cache import generation_cache
+from app.services.example_store import example_store, Example, SEED_EXAMPLES
+from app.services.schema_linker import SchemaCatalog, SchemaLinker, estimate_tokens
+from app.services.fast_path import FastPathEngine
+from app.utils.metrics import metrics
+from app.utils.singleflight import SingleFlight
+from app.utils.sql_analysis import SQLAnalysis, analyze_sql
+
+
+# Token count of the fixed few-shot block every prompt used to carry
+_SEED_EXAMPLES_TOKENS = estimate_tokens("\n\n".join(
+    f'Natural: "{question}"\nSQL: {sql_query}' for question, sql_query in SEED_EXAMPLES
+))
 
 
 class LLMService:
-    """Service for integrating with Large Language Models for text-to-SQL conversion"""
+    """
+    Service for integrating with Large Language Models for text-to-SQL conversion
+    
+    Construction is cheap: the Gemini SDK is imported and configured on first
+    use (or by the lifespan warm-up), and the schema context is loaded
+    asynchronously the first time it is needed.
+    """
     
     def __init__(self):
         self.settings = get_settings()
         self.model = None
-        self._initialize_llm()
+        self.client = AsyncLLMClient(
+            max_concurrency=self.settings.LLM_MAX_CONCURRENCY,
+            timeout_seconds=self.settings.LLM_TIMEOUT_SECONDS
+        )
+        self._model_initialized = False
+        self._schema_loaded = False
+        self._init_flight = SingleFlight("llm-init")
+        self.cache = generation_cache
+        self.examples = example_store
         self.schema_context = ""
-        self._load_schema_context()
+        self.catalog: Optional[SchemaCatalog] = None
+        self.linker: Optional[SchemaLinker] = None
+        self.fast_path = FastPathEngine(None)
+        self.prompt_stats = {
+            "prompts": 0,
+            "pruned_prompts": 0,
+            "prompt_tokens": 0,
+            "full_prompt_tokens": 0,
+            "last_prompt_tokens": 0,
+            "last_full_prompt_tokens": 0
+        }
+    
+    async def initialize(self):
+        """Load the schema context and the LLM client without blocking the event loop"""
+        await asyncio.gather(self.ensure_schema_loaded(), self.ensure_model())
+    
+    async def ensure_schema_loaded(self):
+        """Load the schema context once, off the event loop"""
+        if not self._schema_loaded:
+            await self._init_flight.do("schema", lambda: asyncio.to_thread(self._load_schema_context))
+    
+    async def ensure_model(self):
+        """Import and configure the LLM SDK once, off the event loop"""
+        if not self._model_initialized:
+            await self._init_flight.do("model", lambda: asyncio.to_thread(self._initialize_llm))
     
     def _initialize_llm(self):
         """Initialize the LLM (Gemini) with API key"""
+        if self._model_initialized:
+            return
+        self._model_initialized = True
+        
         if self.settings.GEMINI_API_KEY:
             try:
+                # Deferred: importing the SDK takes longer than the rest of startup combined
+                import google.generativeai as genai
+                
                 genai.configure(api_key=self.settings.GEMINI_API_KEY)
                 
                 # Try different model names in order of preference
@@ -38,6 +97,7 @@ class LLMService:
                 for model_name in model_names:
                     try:
                         self.model = genai.GenerativeModel(model_name)
+                        self.client.set_model(self.model)
                         print(f"Gemini API initialized successfully with model: {model_name}")
                         return
                     except Exception as model_error:
@@ -57,52 +117,83 @@ class LLMService:
     def _load_schema_context(self):
         """Load database schema context for prompt engineering"""
         try:
-            # Get table information
-            tables_info = []
             table_names = ['customers', 'products', 'orders', 'order_items']
+            catalog = SchemaCatalog.load(db_manager.execute_sync_query, table_names)
+            self.catalog = catalog
+            self.linker = SchemaLinker(catalog) if catalog.tables else None
+            self.fast_path = FastPathEngine(catalog)
             
-            for table_name in table_names:
-                try:
-                    columns_info = db_manager.execute_sync_query(f"PRAGMA table_info({table_name})")
-                    if columns_info:
-                        columns = [f"{col['name']} ({col['type']})" for col in columns_info]
-                        tables_info.append(f"Table: {table_name}\nColumns: {', '.join(columns)}")
-                except:
-                    continue
-            
-            # Create comprehensive schema context
-            self.schema_context = f"""
-DATABASE SCHEMA:
-=================
-
-{chr(10).join(tables_info)}
-
-TABLE RELATIONSHIPS:
-===================
-- customers.customer_id -> orders.customer_id (One-to-Many)
-- orders.order_id -> order_items.order_id (One-to-Many)  
-- products.product_id -> order_items.product_id (One-to-Many)
-
-KEY BUSINESS RULES:
-==================
-- All prices are in Indian Rupees (INR)
-- Order status: pending, processing, shipped, delivered, cancelled
-- Payment methods: credit_card, debit_card, upi, wallet, cod
-- Payment status: pending, completed, failed, refunded
-- Product categories include: Electronics, Clothing, Books, Home & Kitchen, Health & Fitness, Beauty & Personal Care, Toys & Games
-- Customers are primarily from Indian cities
-"""
+            # Full schema context; also fingerprints the generation cache
+            self.schema_context = catalog.render()
+            # An empty database is retried on the next request
+            self._schema_loaded = bool(catalog.tables)
         except Exception as e:
             print(f"Failed to load schema context: {e}")
             self.schema_context = "Schema context not available"
     
+    def _select_schema_block(self, natural_query: str) -> str:
+        """Pick the schema block for a question: pruned when linking succeeds, full otherwise"""
+        if self.linker is None or not self.settings.SCHEMA_PRUNING_ENABLED:
+            return self.schema_context
+        
+        try:
+            linked = self.linker.link(natural_query)
+        except Exception as e:
+            print(f"Schema linking failed: {e}")
+            return self.schema_context
+        
+        return linked.schema_block if linked else self.schema_context
+    
+    def _select_examples_block(self, natural_query: str) -> str:
+        """Render the few-shot examples most similar to the question"""
+        try:
+            examples = self.examples.top_k(natural_query, self.settings.FEW_SHOT_EXAMPLES)
+        except Exception as e:
+            print(f"Example retrieval failed: {e}")
+            examples = []
+        
+        if not examples:
+            examples = [Example(question, sql_query) for question, sql_query in SEED_EXAMPLES]
+        
+        return "\n\n".join(
+            f'Natural: "{example.question}"\nSQL: {example.sql_query}' for example in examples
+        )
+    
+    def _record_prompt_stats(self, prompt: str, schema_block: str, examples_block: str):
+        """Track prompt token counts before and after schema pruning and example selection"""
+        prompt_tokens = estimate_tokens(prompt)
+        full_tokens = prompt_tokens
+        if schema_block is not self.schema_context:
+            full_tokens += estimate_tokens(self.schema_context) - estimate_tokens(schema_block)
+            self.prompt_stats["pruned_prompts"] += 1
+        full_tokens += _SEED_EXAMPLES_TOKENS - estimate_tokens(examples_block)
+        
+        self.prompt_stats["prompts"] += 1
+        self.prompt_stats["prompt_tokens"] += prompt_tokens
+        self.prompt_stats["full_prompt_tokens"] += full_tokens
+        self.prompt_stats["last_prompt_tokens"] = prompt_tokens
+        self.prompt_stats["last_full_prompt_tokens"] = full_tokens
+    
+    def get_prompt_stats(self) -> Dict[str, Any]:
+        """Get prompt token counts with and without schema pruning"""
+        stats = dict(self.prompt_stats)
+        prompts = stats["prompts"]
+        full = stats["full_prompt_tokens"]
+        stats["average_prompt_tokens"] = stats["prompt_tokens"] / prompts if prompts else 0.0
+        stats["average_full_prompt_tokens"] = full / prompts if prompts else 0.0
+        stats["token_reduction"] = 1 - stats["prompt_tokens"] / full if full else 0.0
+        return stats
+    
     def _create_text_to_sql_prompt(self, natural_query: str) -> str:
         """Create a comprehensive prompt for text-to-SQL conversion"""
         
+        schema_block = self._select_schema_block(natural_query)
+        examples_block = self._select_examples_block(natural_query)
+        
         prompt = f"""
 You are an expert SQL query generator for an e-commerce database. Your task is to convert natural language queries into valid SQL SELECT statements.
 
-{self.schema_context}
+{schema_block}
 
 IMPORTANT RULES:
 ===============
@@ -120,42 +211,7 @@ IMPORTANT RULES:
 EXAMPLE QUERIES AND THEIR SQL:
 ==============================
 
-Natural: "Show all customers from Mumbai"
-SQL: SELECT customer_id, first_name, last_name, email, phone FROM customers WHERE city = 'Mumbai';
-
-Natural: "What are the top 5 most expensive products?"
-SQL: SELECT product_id, product_name, brand, price_inr, category FROM products ORDER BY price_inr DESC LIMIT 5;
-
-Natural: "Show all orders from the last 30 days with customer details"
-SQL: SELECT o.order_id, o.order_date, o.total_amount_inr, c.first_name, c.last_name, c.city 
-     FROM orders o 
-     JOIN customers c ON o.customer_id = c.customer_id 
-     WHERE o.order_date >= datetime('now', '-30 days') 
-     ORDER BY o.order_date DESC;
-
-Natural: "Which products have never been ordered?"
-SQL: SELECT p.product_id, p.product_name, p.brand, p.category, p.price_inr
-     FROM products p
-     LEFT JOIN order_items oi ON p.product_id = oi.product_id
-     WHERE oi.product_id IS NULL;
-
-Natural: "Show total sales by category"
-SQL: SELECT p.category, COUNT(oi.order_item_id) as total_orders, SUM(oi.total_price_inr) as total_sales_inr
-     FROM products p
-     JOIN order_items oi ON p.product_id = oi.product_id
-     JOIN orders o ON oi.order_id = o.order_id
-     WHERE o.order_status = 'delivered'
-     GROUP BY p.category
-     ORDER BY total_sales_inr DESC;
-
-Natural: "Find customers who spent more than 50000 INR"
-SQL: SELECT c.customer_id, c.first_name, c.last_name, c.email, c.city, SUM(o.total_amount_inr) as total_spent_inr
-     FROM customers c
-     JOIN orders o ON c.customer_id = o.customer_id
-     WHERE o.payment_status = 'completed'
-     GROUP BY c.customer_id, c.first_name, c.last_name, c.email, c.city
-     HAVING SUM(o.total_amount_inr) > 50000
-     ORDER BY total_spent_inr DESC;
+{examples_block}
 
 NOW CONVERT THIS NATURAL LANGUAGE QUERY TO SQL:
 ===============================================
@@ -166,56 +222,107 @@ Generate ONLY the SQL query without any explanation, comments, or formatting. Th
 
 SQL:"""
         
+        self._record_prompt_stats(prompt, schema_block, examples_block)
         return prompt
     
+    def set_model(self, model):
+        """Replace the generation model (e.g. with a local fake for tests and benchmarks)"""
+        self.model = model
+        self._model_initialized = True
+        self.client.set_model(model)
+    
     async def generate_sql(self, natural_query: str) -> Tuple[Optional[str], Optional[str], Optional[float]]:
         """
         Generate SQL query from natural language
         
+        The LLM call goes through the async client, so concurrent requests
+        overlap their generation latency instead of blocking the event loop.
+        Validated generations are cached per normalized question and schema.
+        Common question shapes are answered from templates without the LLM.
+        
         Returns:
             Tuple of (sql_query, explanation, confidence_score)
         """
+        await self.ensure_schema_loaded()
+        
+        if self.settings.FAST_PATH_ENABLED:
+            with metrics.span("fast_path"):
+                fast = self.fast_path.match(natural_query)
+            if fast is not None:
+                metrics.cache_hit("fast_path")
+                explanation = self._generate_explanation(
+                    fast.sql_query, natural_query, analyze_sql(fast.sql_query)
+                )
+                return fast.sql_query, explanation, fast.confidence
+        
+        with metrics.span("generation_cache"):
+            cached = await self.cache.get(natural_query, self.schema_context)
+        if cached is not None:
+            metrics.cache_hit("generation")
+            return cached.sql_query, cached.explanation, cached.confidence
+        metrics.cache_miss("generation")
+        
+        await self.ensure_model()
         if not self.model:
+            metrics.inc("text2sql_errors_total", stage="llm_call", error_code="LLM_UNAVAILABLE")
             return None, "LLM not available. Please check GEMINI_API_KEY configuration.", 0.0
         
         try:
             start_time = time.time()
             
             # Create prompt with schema context
-            prompt = self._create_text_to_sql_prompt(natural_query)
+            with metrics.span("prompt_build"):
+                prompt = self._create_text_to_sql_prompt(natural_query)
             
             # Generate SQL using Gemini
-            response = self.model.generate_content(prompt)
+            with metrics.span("llm_call"):
+                response_text = await self.client.generate(prompt)
             
-            if not response.text:
+            if not response_text:
+                metrics.inc("text2sql_errors_total", stage="llm_call", error_code="EMPTY_RESPONSE")
                 return None, "Failed to generate response from LLM", 0.0
             
             # Extract SQL query from response
-            sql_query = self._extract_sql_from_response(response.text)
+            with metrics.span("sql_extract"):
+                sql_query = self._extract_sql_from_response(response_text)
             
             if not sql_query:
+                metrics.inc("text2sql_errors_total", stage="sql_extract", error_code="NO_SQL")
                 return None, "Could not extract valid SQL from LLM response", 0.0
             
             # Validate the generated SQL
-            is_valid, validation_error = await db_manager.validate_sql(sql_query)
+            with metrics.span("sql_validate"):
+                is_valid, validation_error = await db_manager.validate_sql(sql_query)
             
             if not is_valid:
+                metrics.inc("text2sql_errors_total", stage="sql_validate", error_code="INVALID_SQL")
                 # Return the generated SQL even if invalid, so user can see what was generated
                 explanation = f"Generated SQL is invalid: {validation_error}. Generated SQL was: {sql_query}"
                 return sql_query, explanation, 0.1  # Low confidence since invalid
             
-            # Calculate confidence based on response quality
-            confidence = self._calculate_confidence(sql_query, natural_query)
-            
-            # Generate explanation
-            explanation = self._generate_explanation(sql_query, natural_query)
+            with metrics.span("sql_analyze"):
+                # Parse once; confidence and explanation read the same analysis
+                analysis = analyze_sql(sql_query)
+                
+                # Calculate confidence based on response quality
+                confidence = self._calculate_confidence(sql_query, natural_query, analysis)
+                
+                # Generate explanation
+                explanation = self._generate_explanation(sql_query, natural_query, analysis)
             
             generation_time = time.time() - start_time
             print(f"SQL generated in {generation_time:.2f} seconds")
             
+            await self.cache.put(natural_query, self.schema_context, sql_query, explanation, confidence)
+            
             return sql_query, explanation, confidence
             
+        except LLMTimeoutError as e:
+            metrics.inc("text2sql_timeouts_total", stage="llm_call")
+            print(f"Error generating SQL: {str(e)}")
+            return None, f"LLM request timed out: {str(e)}", 0.0
         except Exception as e:
+            metrics.inc("text2sql_errors_total", stage="generate", error_code="GENERATION_FAILED")
             print(f"Error generating SQL: {str(e)}")
             return None, f"Error during SQL generation: {str(e)}", 0.0
     
@@ -239,16 +346,17 @@ SQL:"""
             if cleaned_response.lower().startswith('sql:'):
                 cleaned_response = cleaned_response[4:].strip()
             
-            # Remove any trailing semicolon and whitespace
-            cleaned_response = cleaned_response.rstrip(';').strip()
+            # Remove any trailing semicolon and whitespace, then terminate once
+            cleaned_response = cleaned_response.rstrip(';').strip() + ';'
             
-            # Basic validation - must start with SELECT (case insensitive)
-            if not cleaned_response.upper().startswith('SELECT'):
+            # Basic validation - must be a SELECT statement. SQL that does not
+            # tokenize is still returned so validation can report the error.
+            analysis = analyze_sql(cleaned_response)
+            if analysis.error is not None:
+                if not cleaned_response.upper().startswith('SELECT'):
+                    return None
+            elif not analysis.is_select:
                 return None
-            
-            # Add semicolon if not present
-            if not cleaned_response.endswith(';'):
-                cleaned_response += ';'
                 
             return cleaned_response
             
@@ -256,19 +364,22 @@ SQL:"""
             print(f"Error extracting SQL: {e}")
             return None
     
-    def _calculate_confidence(self, sql_query: str, natural_query: str) -> float:
+    def _calculate_confidence(
+        self, sql_query: str, natural_query: str, analysis: Optional[SQLAnalysis] = None
+    ) -> float:
         """Calculate confidence score for generated SQL"""
         try:
+            analysis = analysis or analyze_sql(sql_query)
             confidence = 0.7  # Base confidence
             
             # Increase confidence for specific patterns
-            if 'JOIN' in sql_query.upper():
+            if analysis.join_count:
                 confidence += 0.1
-            if 'WHERE' in sql_query.upper():
+            if analysis.has_where:
                 confidence += 0.1
-            if any(agg in sql_query.upper() for agg in ['SUM', 'COUNT', 'AVG', 'MAX', 'MIN']):
+            if analysis.aggregates:
                 confidence += 0.05
-            if 'ORDER BY' in sql_query.upper():
+            if analysis.has_order_by:
                 confidence += 0.05
             
             # Check for common keywords in natural query
@@ -283,30 +394,32 @@ SQL:"""
         except:
             return 0.7
     
-    def _generate_explanation(self, sql_query: str, natural_query: str) -> str:
+    def _generate_explanation(
+        self, sql_query: str, natural_query: str, analysis: Optional[SQLAnalysis] = None
+    ) -> str:
         """Generate human-readable explanation of the SQL query"""
         try:
             explanation_parts = []
             
             # Analyze query structure
-            sql_upper = sql_query.upper()
+            analysis = analysis or analyze_sql(sql_query)
             
-            if 'JOIN' in sql_upper:
+            if analysis.join_count:
                 explanation_parts.append("This query combines data from multiple tables")
             
-            if 'WHERE' in sql_upper:
+            if analysis.has_where:
                 explanation_parts.append("includes filtering conditions")
                 
-            if 'GROUP BY' in sql_upper:
+            if analysis.has_group_by:
                 explanation_parts.append("groups results by specific columns")
                 
-            if 'ORDER BY' in sql_upper:
+            if analysis.has_order_by:
                 explanation_parts.append("sorts the results")
                 
-            if any(agg in sql_upper for agg in ['SUM', 'COUNT', 'AVG', 'MAX', 'MIN']):
+            if analysis.aggregates:
                 explanation_parts.append("calculates aggregate values")
             
-            if 'LIMIT' in sql_upper:
+            if analysis.limit is not None:
                 explanation_parts.append("limits the number of results returned")
             
             base_explanation = f"This SQL query retrieves data from the e-commerce database to answer: '{natural_query}'"
@@ -319,14 +432,26 @@ SQL:"""
         except:
             return f"SQL query generated to answer: '{natural_query}'"
     
+    def get_stats(self) -> Dict[str, Any]:
+        """Get generation statistics: fast path, cache, prompt size and LLM client"""
+        return {
+            "fast_path": self.fast_path.get_stats(),
+            "generation_cache": self.cache.get_stats(),
+            "prompt_tokens": self.get_prompt_stats(),
+            "llm_client": self.client.get_stats()
+        }
+    
     def is_available(self) -> bool:
         """Check if LLM service is available"""
+        self._initialize_llm()
         return self.model is not None
     
     def list_available_models(self):
         """List available Gemini models for debugging"""
         try:
             if self.settings.GEMINI_API_KEY:
+                import google.generativeai as genai
+                
                 genai.configure(api_key=self.settings.GEMINI_API_KEY)
                 models = genai.list_models()
                 print("Available Gemini models:")
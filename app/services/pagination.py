@@ -0,0 +1,303 @@
+"""
+Cursor pagination for results cut off by the row or byte limits
+
+A cursor is an opaque, HMAC-signed token. When the query orders by a
+unique, NOT NULL key that starts with an indexed column, the next page is
+a keyset query: the statement wrapped as ``SELECT * FROM (<sql>) WHERE
+(key...) > (?...) ORDER BY key...``. SQLite flattens the wrapper
+into an index seek, so page N costs the same as page 1. Any other query
+falls back to a snapshot: the full result is materialized once, on the
+first next-page request, in a short-lived byte-bounded cache, and pages
+are slices of it.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.database.connection import estimate_row_bytes
+from app.utils.lru import LRUCache
+from app.utils.sql_analysis import SQLAnalysis, analyze_sql
+
+KEYSET = "keyset"
+SNAPSHOT = "snapshot"
+
+
+class CursorError(Exception):
+    """Raised for a cursor that is invalid, expired or can no longer be served"""
+
+    def __init__(self, message: str, error_code: str = "INVALID_CURSOR"):
+        self.error_code = error_code
+        super().__init__(message)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text: str) -> bytes:
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def encode_cursor(payload: Dict[str, Any], secret: str) -> str:
+    """Serialize and sign a cursor payload"""
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    signature = hmac.new(secret.encode("utf-8"), body.encode("ascii"), hashlib.sha256).digest()[:16]
+    return f"{body}.{_b64encode(signature)}"
+
+
+def decode_cursor(cursor: str, secret: str) -> Dict[str, Any]:
+    """
+    Verify and deserialize a cursor
+
+    Raises:
+        CursorError: INVALID_CURSOR for a malformed or tampered cursor, CURSOR_EXPIRED past its expiry
+    """
+    try:
+        body, signature = cursor.split(".")
+        expected = hmac.new(secret.encode("utf-8"), body.encode("ascii"), hashlib.sha256).digest()[:16]
+        if not hmac.compare_digest(_b64decode(signature), expected):
+            raise CursorError("Cursor signature does not match")
+        payload = json.loads(_b64decode(body))
+    except CursorError:
+        raise
+    except Exception:
+        raise CursorError("Malformed cursor")
+    if payload.get("e") and payload["e"] < time.time():
+        raise CursorError("Cursor has expired; re-run the query", "CURSOR_EXPIRED")
+    return payload
+
+
+@dataclass
+class Page:
+    """One page of a paginated result"""
+    rows: List[Dict[str, Any]]
+    next_cursor: Optional[str]
+    mode: str
+    truncated: bool = False   # more rows exist but cannot be paged (snapshot row limit)
+
+
+@dataclass
+class KeysetSpec:
+    """Output columns forming a unique sort key, and the sort direction"""
+    columns: List[str]
+    descending: bool
+
+
+@dataclass
+class TableKeys:
+    """Column constraints and indexes of one table, as needed for keyset pagination"""
+    not_null: set
+    rowid_alias: Optional[str]
+    unique_keys: List[frozenset]
+    leading_index_columns: set
+
+
+def keyset_query(sql_query: str, spec: KeysetSpec) -> str:
+    """Wrap a statement to return the rows after a key, in key order"""
+    columns = ", ".join('"{}"'.format(column.replace('"', '""')) for column in spec.columns)
+    direction = "DESC" if spec.descending else "ASC"
+    order = ", ".join('"{}" {}'.format(column.replace('"', '""'), direction) for column in spec.columns)
+    placeholders = ", ".join("?" for _ in spec.columns)
+    operator = "<" if spec.descending else ">"
+    return (f"SELECT * FROM ({sql_query}) WHERE ({columns}) {operator} ({placeholders}) "
+            f"ORDER BY {order}")
+
+
+class Paginator:
+    """
+    Issue and follow cursors for truncated results
+
+    Table metadata used to decide on keyset pagination is cached per data
+    version, like the planner's table sizes.
+    """
+
+    def __init__(self, manager, secret: str, cursor_ttl: float = 3600.0, snapshot_ttl: float = 300.0,
+                 snapshot_max_rows: int = 100000, snapshot_max_bytes: int = 67108864):
+        self.manager = manager
+        self.secret = secret
+        self.cursor_ttl = cursor_ttl
+        self.snapshot_max_rows = snapshot_max_rows
+        self.snapshot_max_bytes = snapshot_max_bytes
+        self.snapshots = LRUCache(maxsize=64, ttl_seconds=snapshot_ttl, max_bytes=snapshot_max_bytes)
+        self._table_keys: Dict[str, Optional[TableKeys]] = {}
+        self._table_keys_version = None
+        self.stats = {"keyset_cursors": 0, "snapshot_cursors": 0, "keyset_pages": 0, "snapshot_pages": 0,
+                      "snapshots_built": 0}
+
+    async def _get_table_keys(self, table: str, data_version) -> Optional[TableKeys]:
+        """Constraints and indexes of a table, None if it does not exist"""
+        if data_version != self._table_keys_version:
+            self._table_keys, self._table_keys_version = {}, data_version
+        if table in self._table_keys:
+            return self._table_keys[table]
+
+        quoted = table.replace('"', '""')
+        columns = await self.manager.execute_query(f'PRAGMA table_info("{quoted}")')
+        if not columns:
+            self._table_keys[table] = None
+            return None
+        primary_key = [c for c in columns if c["pk"]]
+        rowid_alias = None
+        if len(primary_key) == 1 and primary_key[0]["type"].upper() == "INTEGER":
+            rowid_alias = primary_key[0]["name"].lower()
+        keys = TableKeys(
+            not_null={c["name"].lower() for c in columns if c["notnull"] or c["pk"]},
+            rowid_alias=rowid_alias,
+            unique_keys=[frozenset({rowid_alias})] if rowid_alias else [],
+            leading_index_columns={rowid_alias} if rowid_alias else set(),
+        )
+        for index in await self.manager.execute_query(f'PRAGMA index_list("{quoted}")'):
+            index_name = index["name"].replace('"', '""')
+            index_columns = [
+                (c["name"] or "").lower()
+                for c in await self.manager.execute_query(f'PRAGMA index_info("{index_name}")')
+            ]
+            if not index_columns or "" in index_columns:
+                continue  # Expression index
+            keys.leading_index_columns.add(index_columns[0])
+            if index["unique"] and not index["partial"]:
+                keys.unique_keys.append(frozenset(index_columns))
+        self._table_keys[table] = keys
+        return keys
+
+    async def keyset_spec(self, analysis: SQLAnalysis, data_version) -> Optional[KeysetSpec]:
+        """
+        The keyset for a statement, or None when it needs a snapshot
+
+        Requires a single-table SELECT without grouping, DISTINCT, LIMIT,
+        OFFSET or subqueries, ordered in one direction by plain columns that
+        include a unique NOT NULL key, start with an indexed column and all
+        appear unaliased in the output.
+        """
+        if (not analysis.is_select or len(analysis.tables) != 1 or analysis.join_count
+                or analysis.outer_group_by or analysis.outer_aggregates or analysis.has_distinct
+                or analysis.has_union or analysis.subquery_count or "LIMIT" in analysis.words
+                or "OFFSET" in analysis.words or not analysis.order_by):
+            return None
+        if len({direction for _, _, direction in analysis.order_by}) != 1:
+            return None
+        table = analysis.tables[0]
+        names = {table} | {alias for alias, target in analysis.aliases.items() if target == table}
+        columns = []
+        for qualifier, column, _ in analysis.order_by:
+            if column is None or (qualifier is not None and qualifier not in names):
+                return None
+            columns.append(column)
+
+        # Each key column must be output under its own name, and no other output may take that name
+        for column in columns:
+            exposed = False
+            for qualifier, item, alias in analysis.select_items:
+                if item == "*" and (qualifier is None or qualifier in names):
+                    exposed = True
+                elif item == column and alias in (None, column):
+                    exposed = True
+                elif alias == column or (alias is None and item == column):
+                    return None
+            if not exposed:
+                return None
+
+        keys = await self._get_table_keys(table, data_version)
+        if keys is None or columns[0] not in keys.leading_index_columns:
+            return None
+        if not all(column in keys.not_null for column in columns):
+            return None
+        if not any(unique <= set(columns) for unique in keys.unique_keys):
+            return None
+        return KeysetSpec(columns, analysis.order_by[0][2] == "DESC")
+
+    async def first_cursor(self, sql_query: str, analysis: SQLAnalysis, rows: List[Dict[str, Any]],
+                           timeout_ms: Optional[int] = None) -> Optional[str]:
+        """Cursor for the page after ``rows``, the truncated first page of ``sql_query``"""
+        if not rows:
+            return None
+        data_version = await self.manager.get_data_version()
+        spec = await self.keyset_spec(analysis, data_version)
+        payload = {"q": sql_query, "t": timeout_ms, "e": int(time.time() + self.cursor_ttl)}
+        if spec is not None:
+            self.stats["keyset_cursors"] += 1
+            payload.update(self._keyset_position(spec, rows[-1]))
+        else:
+            self.stats["snapshot_cursors"] += 1
+            payload.update({"m": SNAPSHOT, "o": len(rows), "v": list(data_version)})
+        return encode_cursor(payload, self.secret)
+
+    def _keyset_position(self, spec: KeysetSpec, last_row: Dict[str, Any]) -> Dict[str, Any]:
+        names = {name.lower(): name for name in last_row}
+        output_columns = [names.get(column, column) for column in spec.columns]
+        return {"m": KEYSET, "c": output_columns, "d": spec.descending,
+                "k": [last_row[name] for name in output_columns]}
+
+    def decode(self, cursor: str) -> Dict[str, Any]:
+        """Verify a cursor and return its payload (``q`` is the statement); raises CursorError"""
+        return decode_cursor(cursor, self.secret)
+
+    async def next_page(self, payload: Dict[str, Any], page_size: int, max_bytes: Optional[int] = None,
+                        timeout: Optional[float] = None) -> Page:
+        """
+        Fetch the page a decoded cursor points at
+
+        Raises:
+            CursorError: for a malformed cursor, or a snapshot whose data changed
+            QueryTimeoutError: when the page query exceeds timeout
+        """
+        sql_query = payload["q"]
+        follow = {"q": sql_query, "t": payload.get("t"), "e": int(time.time() + self.cursor_ttl)}
+
+        if payload.get("m") == KEYSET:
+            spec = KeysetSpec(payload["c"], payload["d"])
+            rows, more = await self.manager.execute_query_limited(
+                keyset_query(sql_query, spec), max_rows=page_size, max_bytes=max_bytes,
+                params=tuple(payload["k"]), timeout=timeout
+            )
+            self.stats["keyset_pages"] += 1
+            if more and rows:
+                follow.update({"m": KEYSET, "c": spec.columns, "d": spec.descending,
+                               "k": [rows[-1][column] for column in spec.columns]})
+                return Page(rows, encode_cursor(follow, self.secret), KEYSET)
+            return Page(rows, None, KEYSET)
+
+        if payload.get("m") == SNAPSHOT:
+            rows, complete = await self._get_snapshot(sql_query, tuple(payload["v"]), timeout)
+            offset = payload["o"]
+            page, size = [], 0
+            for row in rows[offset:offset + page_size]:
+                if max_bytes:
+                    size += estimate_row_bytes(row)
+                    if size > max_bytes and page:
+                        break
+                page.append(row)
+            self.stats["snapshot_pages"] += 1
+            next_offset = offset + len(page)
+            if next_offset < len(rows):
+                follow.update({"m": SNAPSHOT, "o": next_offset, "v": payload["v"]})
+                return Page(page, encode_cursor(follow, self.secret), SNAPSHOT)
+            return Page(page, None, SNAPSHOT, truncated=not complete)
+
+        raise CursorError("Malformed cursor")
+
+    async def _get_snapshot(self, sql_query: str, data_version: Tuple,
+                            timeout: Optional[float]) -> Tuple[List[Dict[str, Any]], bool]:
+        """Materialized result for a snapshot cursor, built on first use while the data is unchanged"""
+        key = (analyze_sql(sql_query).fingerprint, data_version)
+        snapshot = self.snapshots.get(key)
+        if snapshot is not None:
+            return snapshot
+        if tuple(await self.manager.get_data_version()) != data_version:
+            raise CursorError("The data changed since the first page; re-run the query", "RESULTS_CHANGED")
+
+        rows, truncated = await self.manager.execute_query_limited(
+            sql_query, max_rows=self.snapshot_max_rows, max_bytes=self.snapshot_max_bytes, timeout=timeout
+        )
+        snapshot = (rows, not truncated)
+        self.snapshots.set(key, snapshot, size=sum(estimate_row_bytes(row) for row in rows))
+        self.stats["snapshots_built"] += 1
+        return snapshot
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cursor and page counts and snapshot cache statistics"""
+        return {**self.stats, "snapshot_cache": self.snapshots.get_stats()}
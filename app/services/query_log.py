@@ -0,0 +1,185 @@
+"""
+Durable append-only log of pipeline runs
+
+Each /query run is appended as one JSON line (question, generated SQL,
+per-stage timings, row count, outcome and cache hits). Requests only put
+the record on a queue; a background thread writes batches and rotates the
+file, so the request path never waits on disk. ``iter_query_log`` streams
+the log back, oldest record first, for offline analysis and replay.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.utils.config import get_settings
+
+_STOP = object()
+
+
+class QueryLog:
+    """
+    Batched JSONL writer with size-based rotation
+
+    When ``path`` exceeds ``max_bytes`` it is renamed to ``path.1`` (older
+    files shift to ``.2`` ... ``.backups``, the oldest is dropped). Records
+    beyond ``max_pending`` unwritten ones are dropped and counted rather
+    than blocking requests.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        max_bytes: int = 50 * 1024 * 1024,
+        backups: int = 5,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000
+    ):
+        self.path = path
+        self.enabled = bool(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.stats = {
+            "records": 0,
+            "written": 0,
+            "dropped": 0,
+            "batches": 0,
+            "rotations": 0,
+            "write_errors": 0,
+        }
+
+    def append(self, record: Dict[str, Any]) -> bool:
+        """Queue a record for writing; False if the log is disabled or the queue is full"""
+        if not self.enabled:
+            return False
+        if self._queue.qsize() >= self.max_pending:
+            self.stats["dropped"] += 1
+            return False
+        self._ensure_writer()
+        self.stats["records"] += 1
+        self._queue.put(record)
+        return True
+
+    def _ensure_writer(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+                self._thread = threading.Thread(target=self._run, name="query-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Writer thread: collect up to batch_size records or flush_interval, then write"""
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch: List[Dict[str, Any]] = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        lines = "".join(json.dumps(record, default=str, ensure_ascii=False) + "\n" for record in batch)
+        try:
+            self._rotate_if_needed()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except OSError as e:
+            self.stats["write_errors"] += 1
+            print(f"Failed to write query log: {e}")
+
+    def _rotate_if_needed(self):
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except FileNotFoundError:
+            return
+        if self.backups <= 0:
+            os.remove(self.path)
+        else:
+            for index in range(self.backups - 1, 0, -1):
+                older = f"{self.path}.{index}"
+                if os.path.exists(older):
+                    os.replace(older, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self.stats["rotations"] += 1
+
+    def close(self, timeout: float = 5.0):
+        """Write out pending records and stop the writer thread"""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get record, write, drop and rotation counts"""
+        return {"enabled": self.enabled, "path": self.path, "pending": self._queue.qsize(), **self.stats}
+
+
+def iter_query_log(path: str, include_rotated: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Stream records from a query log, oldest first
+
+    Rotated files (``path.N`` ... ``path.1``) come before ``path``. Lines
+    that are not valid JSON (e.g. a write cut short by a crash) are skipped.
+    """
+    files = []
+    if include_rotated:
+        index = 1
+        while os.path.exists(f"{path}.{index}"):
+            files.append(f"{path}.{index}")
+            index += 1
+        files.reverse()
+    if os.path.exists(path):
+        files.append(path)
+    for name in files:
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def _create_query_log() -> QueryLog:
+    settings = get_settings()
+    return QueryLog(
+        settings.QUERY_LOG_PATH if settings.QUERY_LOG_ENABLED else None,
+        max_bytes=settings.QUERY_LOG_MAX_BYTES,
+        backups=settings.QUERY_LOG_BACKUPS,
+        batch_size=settings.QUERY_LOG_BATCH_SIZE,
+        flush_interval=settings.QUERY_LOG_FLUSH_INTERVAL_SECONDS,
+        max_pending=settings.QUERY_LOG_MAX_PENDING
+    )
+
+
+# Global query log instance
+query_log = _create_query_log()
@@ -0,0 +1,285 @@
+"""
+Query planner: structured EXPLAIN QUERY PLAN output and a row-count based cost estimate
+"""
+import math
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.utils.lru import LRUCache
+from app.utils.sql_analysis import SQLAnalysis, analyze_sql
+
+# Cost model assumptions (the plan says how tables are read, not how many rows match)
+WHERE_SELECTIVITY = 0.25     # fraction of scanned rows assumed to pass a WHERE clause
+RANGE_SELECTIVITY = 0.25     # fraction of rows matched by an index range search
+EQUALITY_FANOUT = 10         # rows matched per key by a non-unique index equality search
+DEFAULT_TABLE_ROWS = 1000    # for tables whose size is unknown
+
+# Plan step operations
+SCAN = "scan"
+SEARCH = "search"
+TEMP_BTREE = "temp_btree"
+SUBQUERY = "subquery"
+MATERIALIZE = "materialize"
+OTHER = "other"
+
+_ACCESS_RE = re.compile(r'^(SCAN|SEARCH) (?:TABLE )?(\S+)(?: AS (\S+))?(?: USING (.*))?$')
+_INDEX_RE = re.compile(r'(?:COVERING )?INDEX ([^\s(]\S*)')
+_TEMP_BTREE_RE = re.compile(r'^USE TEMP B-TREE FOR (.*)$')
+_SUBQUERY_RE = re.compile(r'^(CORRELATED )?(?:SCALAR |LIST )?SUBQUERY')
+_MATERIALIZE_RE = re.compile(r'^(?:MATERIALIZE|CO-ROUTINE) (\S+)')
+
+
+@dataclass
+class PlanStep:
+    """One line of EXPLAIN QUERY PLAN output"""
+    id: int
+    parent: int
+    detail: str
+    operation: str
+    table: Optional[str] = None      # table, alias or subquery name as written in the plan
+    index: Optional[str] = None
+    covering: bool = False
+    automatic_index: bool = False    # transient index SQLite builds for this statement
+    unique_lookup: bool = False
+    range_lookup: bool = False
+    purpose: Optional[str] = None    # ORDER BY / GROUP BY / DISTINCT for temp B-trees
+    correlated: bool = False
+
+
+@dataclass
+class QueryPlan:
+    """Structured query plan with its estimated cost (in row visits) and result size"""
+    steps: List[PlanStep] = field(default_factory=list)
+    full_scans: List[str] = field(default_factory=list)
+    index_searches: List[str] = field(default_factory=list)
+    temp_btrees: List[str] = field(default_factory=list)
+    automatic_indexes: List[str] = field(default_factory=list)
+    correlated_subqueries: int = 0
+    table_rows: Dict[str, int] = field(default_factory=dict)
+    estimated_rows: int = 0
+    cost: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cost": round(self.cost, 1),
+            "estimated_rows": self.estimated_rows,
+            "full_scans": self.full_scans,
+            "index_searches": self.index_searches,
+            "temp_btrees": self.temp_btrees,
+            "automatic_indexes": self.automatic_indexes,
+            "correlated_subqueries": self.correlated_subqueries,
+            "table_rows": self.table_rows,
+            "steps": [
+                {key: value for key, value in asdict(step).items() if value not in (None, False)}
+                for step in self.steps
+            ],
+        }
+
+
+def parse_plan_step(step_id: int, parent: int, detail: str) -> PlanStep:
+    """Classify one EXPLAIN QUERY PLAN line"""
+    step = PlanStep(step_id, parent, detail, OTHER)
+    access = _ACCESS_RE.match(detail)
+    if access and detail != "SCAN CONSTANT ROW":
+        step.operation = SCAN if access.group(1) == "SCAN" else SEARCH
+        step.table = access.group(3) or access.group(2)
+        using = access.group(4) or ""
+        index = _INDEX_RE.search(using)
+        step.index = index.group(1) if index else None
+        step.covering = "COVERING INDEX" in using
+        step.automatic_index = "AUTOMATIC" in using
+        if "PRIMARY KEY" in using:
+            step.index = step.index or "PRIMARY KEY"
+            step.unique_lookup = "=?" in using and "<" not in using and ">" not in using
+        step.range_lookup = "<" in using or ">" in using
+        return step
+
+    temp_btree = _TEMP_BTREE_RE.match(detail)
+    if temp_btree:
+        step.operation = TEMP_BTREE
+        purpose = temp_btree.group(1)
+        step.purpose = next((p for p in ("ORDER BY", "GROUP BY", "DISTINCT") if p in purpose), purpose)
+        return step
+
+    subquery = _SUBQUERY_RE.match(detail)
+    if subquery:
+        step.operation = SUBQUERY
+        step.correlated = subquery.group(1) is not None
+        return step
+
+    materialize = _MATERIALIZE_RE.match(detail)
+    if materialize:
+        step.operation = MATERIALIZE
+        step.table = materialize.group(1)
+    return step
+
+
+def parse_query_plan(rows: List[Dict[str, Any]], aliases: Optional[Dict[str, str]] = None) -> QueryPlan:
+    """Build a QueryPlan (without cost) from EXPLAIN QUERY PLAN rows; aliases map to table names"""
+    aliases = aliases or {}
+    plan = QueryPlan(steps=[parse_plan_step(row["id"], row["parent"], row["detail"]) for row in rows])
+    for step in plan.steps:
+        if step.operation == SCAN:
+            plan.full_scans.append(aliases.get(step.table.lower(), step.table))
+        elif step.operation == SEARCH:
+            plan.index_searches.append(aliases.get(step.table.lower(), step.table))
+            if step.automatic_index:
+                plan.automatic_indexes.append(aliases.get(step.table.lower(), step.table))
+        elif step.operation == TEMP_BTREE:
+            plan.temp_btrees.append(step.purpose)
+        elif step.operation == SUBQUERY and step.correlated:
+            plan.correlated_subqueries += 1
+    return plan
+
+
+def estimate_cost(plan: QueryPlan, analysis: SQLAnalysis, table_rows: Dict[str, int]) -> QueryPlan:
+    """
+    Fill in the plan's cost and estimated result rows
+
+    Steps at the same level form a nested loop: each one runs once per row
+    produced by the steps before it. A scan visits every row of its table, an
+    index search about log2(rows), and a temp B-tree sorts the rows produced
+    so far. An automatic index is built once per statement by scanning and
+    sorting its whole table. Correlated subqueries run once per outer row; other subqueries and
+    materialized views run once. ``table_rows`` is keyed by lowercase table name.
+    """
+    children: Dict[int, List[PlanStep]] = {}
+    for step in plan.steps:
+        children.setdefault(step.parent, []).append(step)
+    materialized: Dict[str, float] = {}
+    selectivity = WHERE_SELECTIVITY if analysis.has_where else 1.0
+
+    def rows_of(name: Optional[str]) -> float:
+        name = (name or "").lower()
+        if name in materialized:
+            return materialized[name]
+        table = analysis.aliases.get(name, name)
+        plan.table_rows.setdefault(table, table_rows.get(table, DEFAULT_TABLE_ROWS))
+        return plan.table_rows[table]
+
+    def walk(parent: int, outer_rows: float) -> Tuple[float, float]:
+        cost, rows = 0.0, 1.0
+        for step in children.get(parent, []):
+            loops = outer_rows * rows
+            if step.operation == SCAN:
+                table_size = rows_of(step.table)
+                cost += loops * table_size
+                rows *= max(1.0, table_size * selectivity)
+            elif step.operation == SEARCH:
+                table_size = rows_of(step.table)
+                cost += loops * math.log2(table_size + 2)
+                if step.automatic_index:
+                    cost += table_size * math.log2(table_size + 2)
+                if step.unique_lookup:
+                    fanout = 1.0
+                elif step.range_lookup:
+                    fanout = table_size * RANGE_SELECTIVITY
+                else:
+                    fanout = min(table_size, EQUALITY_FANOUT)
+                rows *= max(1.0, fanout)
+            elif step.operation == TEMP_BTREE:
+                cost += loops * math.log2(loops + 2)
+            elif step.operation == SUBQUERY:
+                sub_cost, _ = walk(step.id, loops if step.correlated else 1.0)
+                cost += sub_cost
+            elif step.operation == MATERIALIZE:
+                sub_cost, sub_rows = walk(step.id, 1.0)
+                cost += sub_cost
+                materialized[(step.table or "").lower()] = sub_rows
+            else:
+                sub_cost, _ = walk(step.id, loops)
+                cost += sub_cost
+        return cost, rows
+
+    cost, rows = walk(0, 1.0)
+    if analysis.outer_aggregates and not analysis.outer_group_by:
+        rows = 1
+    elif analysis.outer_group_by:
+        rows = math.sqrt(rows)  # assume about sqrt(n) groups
+    if analysis.limit is not None:
+        rows = min(rows, analysis.limit)
+    plan.cost = cost
+    plan.estimated_rows = int(round(rows))
+    return plan
+
+
+class QueryPlanner:
+    """
+    Explain SELECT statements and estimate their cost before they run
+
+    Plans are cached per statement and data version; table sizes are cached
+    per data version, so both refresh automatically after writes. Table sizes
+    are estimates (sqlite_stat1, else MAX(rowid)) so planning never scans the
+    tables admission control is protecting.
+    """
+
+    def __init__(self, manager, cache_size: int = 512):
+        self.manager = manager
+        self.plans = LRUCache(maxsize=cache_size)
+        self._row_counts: Dict[str, int] = {}
+        self._row_counts_version = None
+        self._table_names: Optional[set] = None
+
+    async def plan(self, sql_query: str, analysis: Optional[SQLAnalysis] = None) -> QueryPlan:
+        """
+        Return the structured plan and cost estimate for a SELECT statement
+
+        Raises:
+            Exception: if SQLite cannot plan the statement
+        """
+        analysis = analysis or analyze_sql(sql_query)
+        data_version = await self.manager.get_data_version()
+        key = (analysis.fingerprint, data_version)
+        plan = self.plans.get(key)
+        if plan is not None:
+            return plan
+
+        rows = await self.manager.execute_query(f"EXPLAIN QUERY PLAN {sql_query}")
+        plan = parse_query_plan(rows, analysis.aliases)
+        table_rows = await self._get_row_counts(plan, analysis, data_version)
+        estimate_cost(plan, analysis, table_rows)
+        self.plans.set(key, plan)
+        return plan
+
+    async def _get_row_counts(self, plan: QueryPlan, analysis: SQLAnalysis, data_version) -> Dict[str, int]:
+        """Estimated row counts of the tables the plan reads, cached until the data changes"""
+        if data_version != self._row_counts_version:
+            self._row_counts, self._table_names = {}, None
+            self._row_counts_version = data_version
+        if self._table_names is None:
+            self._table_names = {name.lower(): name for name in await self.manager.get_table_names()}
+
+        for step in plan.steps:
+            if step.operation not in (SCAN, SEARCH) or not step.table:
+                continue
+            name = step.table.lower()
+            table = analysis.aliases.get(name, name)
+            if table in self._row_counts or table not in self._table_names:
+                continue
+            self._row_counts[table] = await self._estimate_table_rows(self._table_names[table])
+        return self._row_counts
+
+    async def _estimate_table_rows(self, table: str) -> int:
+        """Table size from ANALYZE statistics, else MAX(rowid); both avoid a full scan"""
+        try:
+            stats = await self.manager.execute_query(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table,)
+            )
+            if stats and stats[0]["stat"]:
+                return int(stats[0]["stat"].split()[0])
+        except Exception:
+            pass  # No sqlite_stat1 until ANALYZE has run
+        try:
+            quoted = table.replace('"', '""')
+            result = await self.manager.execute_query(f'SELECT MAX(rowid) AS row_count FROM "{quoted}"')
+            return result[0]["row_count"] or 0
+        except Exception:
+            return DEFAULT_TABLE_ROWS  # WITHOUT ROWID tables
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get plan cache statistics and the cached table row counts"""
+        return {
+            "plan_cache": self.plans.get_stats(),
+            "table_rows": dict(self._row_counts),
+        }
@@ -0,0 +1,97 @@
+"""
+SQL result cache keyed by normalized SQL and validated against the database data version
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional
+
+from app.database.connection import estimate_row_bytes
+from app.utils.config import get_settings
+from app.utils.lru import LRUCache
+
+# Fixed per-entry overhead added to the estimated row sizes
+ENTRY_OVERHEAD_BYTES = 256
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """A cached query result and the data version it was read at"""
+    data_version: Hashable
+    result: Any
+
+
+class ResultCache:
+    """
+    Byte-bounded LRU of query results
+
+    Every entry records the database data version it was read at. A lookup
+    under a different version drops the entry, so writes made by
+    ``initialize_database``, other processes or external loaders invalidate
+    cached results without any explicit hook.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = 300,
+        enabled: bool = True
+    ):
+        self.enabled = enabled
+        self.memory = LRUCache(maxsize=max_entries, ttl_seconds=ttl_seconds, max_bytes=max_bytes)
+        self.stats = {
+            "stores": 0,
+            "stale": 0,
+            "too_large": 0,
+        }
+
+    def get(self, key: Hashable, data_version: Hashable) -> Optional[Any]:
+        """Return the cached result for key if it was read at data_version"""
+        if not self.enabled:
+            return None
+        entry = self.memory.get(key)
+        if entry is None:
+            return None
+        if entry.data_version != data_version:
+            self.memory.pop(key)
+            self.stats["stale"] += 1
+            # Counted as a hit by the LRU; correct it to a miss
+            self.memory.hits -= 1
+            self.memory.misses += 1
+            return None
+        return entry.result
+
+    def put(self, key: Hashable, data_version: Hashable, result: Any, rows: list):
+        """Store a result read at data_version; rows are used to estimate its size"""
+        if not self.enabled:
+            return
+        size = ENTRY_OVERHEAD_BYTES + sum(estimate_row_bytes(row) for row in rows)
+        if self.memory.set(key, CachedResult(data_version, result), size=size):
+            self.stats["stores"] += 1
+        else:
+            self.stats["too_large"] += 1
+
+    def clear(self):
+        """Remove all cached results"""
+        self.memory.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get result cache statistics"""
+        return {
+            "enabled": self.enabled,
+            **self.memory.get_stats(),
+            **self.stats,
+        }
+
+
+def _create_result_cache() -> ResultCache:
+    settings = get_settings()
+    return ResultCache(
+        max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+        max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+        enabled=settings.RESULT_CACHE_ENABLED
+    )
+
+
+# Global result cache instance
+result_cache = _create_result_cache()
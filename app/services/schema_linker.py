@@ -0,0 +1,333 @@
+"""
+Schema linking: score tables and columns against a question and build a pruned schema block
+"""
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_CHECK_IN_RE = re.compile(r"(\w+)\s+IN\s*\(([^)]*)\)", re.IGNORECASE)
+
+# Values that only live in documentation, not in CHECK constraints
+KNOWN_VALUES = {
+    ("products", "category"): [
+        "Electronics", "Clothing", "Books", "Home & Kitchen", "Health & Fitness",
+        "Beauty & Personal Care", "Toys & Games"
+    ],
+}
+
+# Low-cardinality columns whose distinct values are loaded for value matching
+VALUE_COLUMNS = [
+    ("customers", "city"),
+    ("customers", "state"),
+    ("products", "category"),
+    ("products", "subcategory"),
+    ("products", "brand"),
+]
+MAX_COLUMN_VALUES = 500
+
+# Question words that point at a column or table without naming it
+SYNONYMS = {
+    "spent": ["orders.total_amount_inr"],
+    "spend": ["orders.total_amount_inr"],
+    "spending": ["orders.total_amount_inr"],
+    "revenue": ["order_items.total_price_inr"],
+    "sale": ["order_items.total_price_inr"],
+    "sold": ["order_items.quantity"],
+    "bought": ["order_items.product_id"],
+    "purchase": ["order_items.product_id"],
+    "purchased": ["order_items.product_id"],
+    "expensive": ["products.price_inr"],
+    "cheap": ["products.price_inr"],
+    "cheapest": ["products.price_inr"],
+    "costly": ["products.price_inr"],
+    "rated": ["products.rating"],
+    "inventory": ["products.stock_quantity"],
+    "user": ["customers"],
+    "buyer": ["customers"],
+    "client": ["customers"],
+    "shopper": ["customers"],
+    "item": ["order_items"],
+    "paid": ["orders.payment_status"],
+    "registered": ["customers.registration_date"],
+    "signed": ["customers.registration_date"],
+}
+
+# Score needed for a table to be linked directly
+TABLE_THRESHOLD = 1.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token estimate: words and punctuation marks"""
+    return len(_TOKEN_RE.findall(text))
+
+
+def stem(word: str) -> str:
+    """Very small English stemmer, enough to match 'customers' with 'customer'"""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith(("sses", "shes", "ches", "xes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    if len(word) > 5 and word.endswith("ed"):
+        return word[:-2]
+    return word
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_RE.findall(text.lower())
+
+
+@dataclass
+class ColumnInfo:
+    """Column of a catalog table"""
+    name: str
+    type: str
+    is_primary_key: bool = False
+
+
+@dataclass
+class ForeignKey:
+    """Foreign key edge: table.column references ref_table.ref_column"""
+    table: str
+    column: str
+    ref_table: str
+    ref_column: str
+
+
+@dataclass
+class SchemaCatalog:
+    """Structured view of the database schema used for prompts and linking"""
+    tables: Dict[str, List[ColumnInfo]] = field(default_factory=dict)
+    foreign_keys: List[ForeignKey] = field(default_factory=list)
+    enum_values: Dict[Tuple[str, str], List[str]] = field(default_factory=dict)
+    column_values: Dict[Tuple[str, str], List[str]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, execute, table_names: Iterable[str]) -> "SchemaCatalog":
+        """
+        Build a catalog using a synchronous query function
+
+        Args:
+            execute: callable(query) -> list of row dicts
+            table_names: tables to include
+        """
+        catalog = cls()
+        for table_name in table_names:
+            try:
+                columns_info = execute(f"PRAGMA table_info({table_name})")
+            except Exception:
+                continue
+            if not columns_info:
+                continue
+
+            catalog.tables[table_name] = [
+                ColumnInfo(col["name"], col["type"], bool(col["pk"])) for col in columns_info
+            ]
+            for fk in execute(f"PRAGMA foreign_key_list({table_name})"):
+                catalog.foreign_keys.append(ForeignKey(table_name, fk["from"], fk["table"], fk["to"]))
+
+            table_sql = execute(
+                f"SELECT sql FROM sqlite_master WHERE type = 'table' AND name = '{table_name}'"
+            )
+            if table_sql and table_sql[0]["sql"]:
+                for column, values in _CHECK_IN_RE.findall(table_sql[0]["sql"]):
+                    catalog.enum_values[(table_name, column)] = re.findall(r"'([^']*)'", values)
+
+        for key, values in KNOWN_VALUES.items():
+            if key[0] in catalog.tables:
+                catalog.enum_values.setdefault(key, values)
+
+        for table_name, column in VALUE_COLUMNS:
+            if table_name not in catalog.tables:
+                continue
+            try:
+                rows = execute(
+                    f"SELECT DISTINCT {column} AS value FROM {table_name} "
+                    f"WHERE {column} IS NOT NULL LIMIT {MAX_COLUMN_VALUES}"
+                )
+            except Exception:
+                continue
+            catalog.column_values[(table_name, column)] = [str(row["value"]) for row in rows]
+        return catalog
+
+    def render(self, tables: Optional[Iterable[str]] = None,
+               columns: Optional[Dict[str, Set[str]]] = None) -> str:
+        """
+        Render the schema block for a prompt
+
+        Args:
+            tables: tables to include (all when None)
+            columns: optional per-table column subsets
+        """
+        selected = [t for t in self.tables if tables is None or t in set(tables)]
+        selected_set = set(selected)
+
+        tables_info = []
+        for table_name in selected:
+            keep = columns.get(table_name) if columns else None
+            cols = [f"{col.name} ({col.type})" for col in self.tables[table_name]
+                    if keep is None or col.name in keep]
+            tables_info.append(f"Table: {table_name}\nColumns: {', '.join(cols)}")
+
+        relationships = [
+            f"- {fk.ref_table}.{fk.ref_column} -> {fk.table}.{fk.column} (One-to-Many)"
+            for fk in self.foreign_keys
+            if fk.table in selected_set and fk.ref_table in selected_set
+        ]
+
+        rules = []
+        if any(col.name.endswith("_inr") for t in selected for col in self.tables[t]):
+            rules.append("- All prices are in Indian Rupees (INR)")
+        for (table_name, column), values in self.enum_values.items():
+            keep = columns.get(table_name) if columns else None
+            if table_name in selected_set and (keep is None or column in keep):
+                label = column.replace("_", " ").capitalize()
+                rules.append(f"- {label} values: {', '.join(values)}")
+        if "customers" in selected_set:
+            rules.append("- Customers are primarily from Indian cities")
+
+        sections = ["DATABASE SCHEMA:\n=================\n\n" + "\n".join(tables_info)]
+        if relationships:
+            sections.append("TABLE RELATIONSHIPS:\n===================\n" + "\n".join(relationships))
+        if rules:
+            sections.append("KEY BUSINESS RULES:\n==================\n" + "\n".join(rules))
+        return "\n" + "\n\n".join(sections) + "\n"
+
+
+@dataclass
+class LinkedSchema:
+    """Result of linking a question to the schema"""
+    tables: List[str]
+    columns: Dict[str, Set[str]]
+    table_scores: Dict[str, float]
+    schema_block: str
+
+
+class SchemaLinker:
+    """Score catalog tables and columns against a natural language question"""
+
+    def __init__(self, catalog: SchemaCatalog):
+        self.catalog = catalog
+        self._graph: Dict[str, Set[str]] = {t: set() for t in catalog.tables}
+        for fk in catalog.foreign_keys:
+            if fk.table in self._graph and fk.ref_table in self._graph:
+                self._graph[fk.table].add(fk.ref_table)
+                self._graph[fk.ref_table].add(fk.table)
+
+        # Column name parts weighted by rarity, so 'city' outweighs 'id' or 'name'
+        part_counts: Dict[str, int] = {}
+        self._column_parts: Dict[Tuple[str, str], Set[str]] = {}
+        for table_name, cols in catalog.tables.items():
+            for col in cols:
+                parts = {stem(p) for p in col.name.lower().split("_") if p}
+                self._column_parts[(table_name, col.name)] = parts
+                for part in parts:
+                    part_counts[part] = part_counts.get(part, 0) + 1
+        self._part_weight = {part: 1.0 / count for part, count in part_counts.items()}
+
+        self._table_words = {
+            table_name: {stem(p) for p in table_name.lower().split("_") if p}
+            for table_name in catalog.tables
+        }
+        self._enum_phrases = {
+            key: [" ".join(_words(v)) for v in values]
+            for key, values in {**catalog.column_values, **catalog.enum_values}.items()
+        }
+
+    def link(self, question: str) -> Optional[LinkedSchema]:
+        """Return the pruned schema for a question, or None to use the full schema"""
+        words = _words(question)
+        stems = {stem(w) for w in words}
+        phrase = f" {' '.join(words)} "
+
+        table_scores = {t: 0.0 for t in self.catalog.tables}
+        column_hits: Dict[str, Set[str]] = {t: set() for t in self.catalog.tables}
+
+        for table_name, table_words in self._table_words.items():
+            if table_words and table_words <= stems:
+                table_scores[table_name] += 3.0 * len(table_words)
+
+        for (table_name, column), parts in self._column_parts.items():
+            matched = parts & stems
+            if matched:
+                score = sum(self._part_weight[p] for p in matched)
+                if score >= 0.5:
+                    table_scores[table_name] += score
+                    column_hits[table_name].add(column)
+
+        for (table_name, column), values in self._enum_phrases.items():
+            if any(value and f" {value} " in phrase for value in values):
+                table_scores[table_name] += 3.0
+                column_hits[table_name].add(column)
+
+        for word in words:
+            for target in SYNONYMS.get(word, SYNONYMS.get(stem(word), [])):
+                table_name, _, column = target.partition(".")
+                if table_name in table_scores:
+                    table_scores[table_name] += 2.0
+                    if column:
+                        column_hits[table_name].add(column)
+
+        linked = [t for t, score in table_scores.items() if score >= TABLE_THRESHOLD]
+        if not linked:
+            return None
+
+        tables = self._connect(linked)
+        columns = {}
+        for table_name in tables:
+            if table_name in linked:
+                columns[table_name] = {col.name for col in self.catalog.tables[table_name]}
+            else:
+                # Bridge tables only need their join keys (plus anything mentioned)
+                columns[table_name] = self._key_columns(table_name) | column_hits[table_name]
+
+        return LinkedSchema(
+            tables=tables,
+            columns=columns,
+            table_scores={t: table_scores[t] for t in tables},
+            schema_block=self.catalog.render(tables, columns)
+        )
+
+    def _key_columns(self, table_name: str) -> Set[str]:
+        keys = {col.name for col in self.catalog.tables[table_name] if col.is_primary_key}
+        for fk in self.catalog.foreign_keys:
+            if fk.table == table_name:
+                keys.add(fk.column)
+            if fk.ref_table == table_name:
+                keys.add(fk.ref_column)
+        return keys
+
+    def _connect(self, linked: List[str]) -> List[str]:
+        """Add the bridge tables needed to join every linked table"""
+        selected = [linked[0]]
+        for target in linked[1:]:
+            if target in selected:
+                continue
+            path = self._shortest_path(set(selected), target)
+            for table_name in path:
+                if table_name not in selected:
+                    selected.append(table_name)
+        # Keep catalog order for stable prompts
+        return [t for t in self.catalog.tables if t in set(selected)]
+
+    def _shortest_path(self, sources: Set[str], target: str) -> List[str]:
+        previous: Dict[str, Optional[str]] = {s: None for s in sources}
+        queue = deque(sources)
+        while queue:
+            node = queue.popleft()
+            if node == target:
+                path = []
+                while node is not None:
+                    path.append(node)
+                    node = previous[node]
+                return path
+            for neighbour in self._graph.get(node, ()):
+                if neighbour not in previous:
+                    previous[neighbour] = node
+                    queue.append(neighbour)
+        return [target]
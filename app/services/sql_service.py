@@ -3,181 +3,438 @@ SQL Service for safe execution of SQL queries
 """
 import time
 import re
+from operator import itemgetter
+from dataclasses import dataclass, field, replace
 from typing import List, Dict, Any, Optional, Tuple
-from app.database.connection import db_manager
+from app.database.connection import db_manager, QueryTimeoutError
+from app.services.query_planner import QueryPlan, QueryPlanner
+from app.services.pagination import CursorError, Paginator
+from app.services.result_cache import result_cache
+from app.utils.config import get_settings
+from app.utils.metrics import metrics
+from app.utils.result_formats import is_currency_column
+from app.utils.result_summary import summarize_results
+from app.utils.sql_analysis import SQLAnalysis, analyze_sql, get_analysis_cache_stats
+from app.utils.sql_lexer import strip_comments, SQLLexError
+from app.utils.sql_template import SQLTemplate, TemplateStats, parameterize
+
+
+DANGEROUS_OPERATIONS = frozenset({
+    'INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER',
+    'TRUNCATE', 'REPLACE', 'MERGE', 'GRANT', 'REVOKE',
+    'EXEC', 'EXECUTE', 'PRAGMA', 'ATTACH', 'DETACH'
+})
+
+# Known table names in our schema, and common column name patterns
+KNOWN_TABLE_NAMES = frozenset({'CUSTOMERS', 'PRODUCTS', 'ORDERS', 'ORDER_ITEMS'})
+_COLUMN_REFERENCE_RE = re.compile(r'.*_(?:ID|NAME|DATE|TIME|STATUS|TYPE|CODE|INR)$')
+
+
+def normalize_sql(sql_query: str) -> str:
+    """
+    Normalize SQL text for use as a lookup key (comments, whitespace, trailing semicolons)
+    
+    Built from the token stream, so string literals and quoted identifiers are
+    kept byte for byte: 'a b' and 'a  b' are different keys. SQL that cannot
+    be tokenized is only stripped.
+    """
+    try:
+        return strip_comments(sql_query)
+    except SQLLexError:
+        return sql_query.strip()
+
+
+_format_inr = "₹{:,.2f}".format
+
+
+def _format_currency_column(values: List[Any]) -> List[Optional[str]]:
+    """INR display strings for a column; None where the value is not a number"""
+    if set(map(type, values)) <= {int, float}:
+        return list(map(_format_inr, values))
+    return [_format_inr(value) if isinstance(value, (int, float)) else None for value in values]
+
+
+@dataclass
+class QueryResult:
+    """
+    Result of a SQL execution
+    
+    Iterates as the legacy (success, data, error_message, execution_time_ms)
+    tuple, so existing callers can keep unpacking it.
+    """
+    success: bool
+    data: List[Dict[str, Any]] = field(default_factory=list)
+    error_message: Optional[str] = None
+    execution_time_ms: float = 0.0
+    truncated: bool = False
+    total_rows: Optional[int] = None
+    error_code: Optional[str] = None
+    cached: bool = False
+    next_cursor: Optional[str] = None
+    
+    def __iter__(self):
+        return iter((self.success, self.data, self.error_message, self.execution_time_ms))
 
 
 class SQLService:
     """Service for safe SQL query execution with validation and monitoring"""
     
     def __init__(self):
-        self.max_result_rows = 1000  # Prevent excessive memory usage
-        self.query_timeout = 30  # seconds
+        self.settings = get_settings()
+        self.max_result_rows = self.settings.MAX_RESULT_ROWS  # Prevent excessive memory usage
+        self.max_result_bytes = self.settings.MAX_RESULT_BYTES
+        self.fetch_batch_size = self.settings.RESULT_FETCH_BATCH_SIZE
+        self.count_truncated_rows = self.settings.COUNT_TRUNCATED_RESULTS
+        self.query_timeout = self.settings.QUERY_TIMEOUT_SECONDS  # seconds
+        self.max_query_timeout = self.settings.MAX_QUERY_TIMEOUT_SECONDS
+        # Per-endpoint deadlines; None falls back to query_timeout
+        self.endpoint_timeouts = {
+            "execute_sql": self.settings.EXECUTE_SQL_TIMEOUT_SECONDS,
+            "query": self.settings.QUERY_ENDPOINT_TIMEOUT_SECONDS,
+            "export": self.settings.EXPORT_TIMEOUT_SECONDS,
+        }
+        self.cache = result_cache
+        # Admission control: queries whose planned cost exceeds the budget are
+        # rejected or run under the shorter downgrade deadline
+        self.planner = QueryPlanner(db_manager, cache_size=self.settings.QUERY_PLAN_CACHE_SIZE)
+        self.cost_budget = self.settings.QUERY_COST_BUDGET
+        self.cost_action = self.settings.QUERY_COST_ACTION
+        self.downgrade_timeout = self.settings.QUERY_COST_DOWNGRADE_TIMEOUT_SECONDS
+        # Cursors for results cut off by the row or byte limits
+        self.paginator = Paginator(
+            db_manager,
+            secret=self.settings.SECRET_KEY,
+            cursor_ttl=self.settings.PAGINATION_CURSOR_TTL_SECONDS,
+            snapshot_ttl=self.settings.PAGINATION_SNAPSHOT_TTL_SECONDS,
+            snapshot_max_rows=self.settings.PAGINATION_SNAPSHOT_MAX_ROWS,
+            snapshot_max_bytes=self.settings.PAGINATION_SNAPSHOT_CACHE_BYTES,
+        ) if self.settings.PAGINATION_ENABLED else None
+        # Literals are bound as parameters so each query shape is prepared
+        # once per pooled connection; stats are kept per template
+        self.parameterize_literals = self.settings.SQL_PARAMETERIZE_LITERALS
+        self.templates = TemplateStats(max_templates=self.settings.QUERY_TEMPLATE_STATS_SIZE)
+        self.stats = {
+            "cache_hits": 0,
+            "executions": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "rejected": 0,
+            "over_budget": 0,
+            "downgraded": 0,
+            "truncated": 0,
+            "total_execution_time_ms": 0.0,
+            "timed_out_time_ms": 0.0,
+        }
         self.allowed_functions = {
             'SUM', 'COUNT', 'AVG', 'MAX', 'MIN', 'UPPER', 'LOWER', 
             'SUBSTR', 'LENGTH', 'ROUND', 'ABS', 'COALESCE', 'NULLIF',
             'DATE', 'DATETIME', 'STRFTIME', 'JULIANDAY'
         }
     
-    async def execute_sql_query(self, sql_query: str) -> Tuple[bool, List[Dict[str, Any]], Optional[str], float]:
+    def resolve_timeout(self, endpoint: Optional[str] = None, timeout_ms: Optional[int] = None) -> float:
+        """Deadline in seconds: the request's timeout_ms, else the endpoint's, else the default"""
+        if timeout_ms:
+            timeout = timeout_ms / 1000
+        else:
+            timeout = self.endpoint_timeouts.get(endpoint) or self.query_timeout
+        return min(timeout, self.max_query_timeout)
+    
+    async def execute_sql_query(
+        self, sql_query: str, timeout: Optional[float] = None, analysis: Optional[SQLAnalysis] = None
+    ) -> QueryResult:
         """
         Execute SQL query safely with validation and monitoring
         
+        Rows are fetched in batches and fetching stops once the row cap (or the
+        optional byte budget) is reached, so large results are never fully
+        materialized. SQLite interrupts the query once the deadline (timeout
+        seconds, default query_timeout) passes. Queries over the cost budget are
+        rejected (QUERY_TOO_EXPENSIVE) or downgraded to a shorter deadline before
+        they run. Literals are bound as parameters (see sql_template) so repeated
+        query shapes reuse prepared statements. Pass the statement's SQLAnalysis
+        when the caller already has it.
+        
         Returns:
-            Tuple of (success, data, error_message, execution_time_ms)
+            QueryResult, which also unpacks as (success, data, error_message, execution_time_ms)
         """
         start_time = time.time()
+        timeout = timeout or self.query_timeout
+        analysis = analysis or analyze_sql(sql_query)
+        template = None
         
         try:
             # Validate query safety
-            is_safe, safety_error = self._validate_query_safety(sql_query)
+            with metrics.span("safety_check"):
+                is_safe, safety_error = self._validate_query_safety(sql_query, analysis)
             if not is_safe:
-                return False, [], safety_error, 0.0
+                self.stats["rejected"] += 1
+                metrics.inc("text2sql_errors_total", stage="safety_check", error_code="UNSAFE_QUERY")
+                return QueryResult(False, [], safety_error, 0.0, error_code="UNSAFE_QUERY")
+            
+            # Serve repeated queries from the result cache while the data is
+            # unchanged; results that depend on the clock or random() are never cached
+            cacheable = analysis.is_deterministic
+            cache_key = (normalize_sql(sql_query), self.max_result_rows, self.max_result_bytes)
+            with metrics.span("result_cache"):
+                data_version = await db_manager.get_data_version()
+                cached = self.cache.get(cache_key, data_version) if cacheable else None
+            if cached is not None:
+                self.stats["cache_hits"] += 1
+                metrics.cache_hit("result")
+                return replace(cached, execution_time_ms=(time.time() - start_time) * 1000, cached=True)
+            if cacheable:
+                metrics.cache_miss("result")
+            
+            # Admission control on the planned cost
+            warnings = []
+            plan = await self.plan_query(sql_query, analysis) if self.cost_budget else None
+            if plan is not None and plan.cost > self.cost_budget:
+                self.stats["over_budget"] += 1
+                if self.cost_action == "reject":
+                    self.stats["rejected"] += 1
+                    metrics.inc("text2sql_errors_total", stage="plan", error_code="QUERY_TOO_EXPENSIVE")
+                    return QueryResult(False, [], self._over_budget_message(plan),
+                                       (time.time() - start_time) * 1000, error_code="QUERY_TOO_EXPENSIVE")
+                if timeout > self.downgrade_timeout:
+                    self.stats["downgraded"] += 1
+                    timeout = self.downgrade_timeout
+                    warnings.append(f"{self._over_budget_message(plan)}; run with a {timeout:g}s time limit")
             
-            # Execute the query
-            results = await db_manager.execute_query(sql_query)
+            self.stats["executions"] += 1
+            template = self._template(sql_query, analysis)
+            # Execute the query, stopping at the result limits
+            with metrics.span("sql_execute"):
+                results, truncated = await db_manager.execute_query_limited(
+                    template.sql,
+                    params=template.params or None,
+                    max_rows=self.max_result_rows,
+                    max_bytes=self.max_result_bytes or None,
+                    batch_size=self.fetch_batch_size,
+                    timeout=timeout
+                )
+            self.templates.record(template, (time.time() - start_time) * 1000)
             
-            # Check result size limits
-            if len(results) > self.max_result_rows:
-                limited_results = results[:self.max_result_rows]
-                warning_message = f"Results limited to {self.max_result_rows} rows (total: {len(results)} rows)"
+            if truncated:
+                self.stats["truncated"] += 1
+                total_rows = None
+                remaining = timeout - (time.time() - start_time)
+                if self.count_truncated_rows and remaining > 0:
+                    try:
+                        with metrics.span("count_rows"):
+                            total_rows = await db_manager.count_query_rows(
+                                self._clean_sql_query(sql_query), timeout=remaining
+                            )
+                    except Exception as e:
+                        print(f"Failed to count result rows: {e}")
+                warnings.append(self._truncation_message(len(results), total_rows))
                 execution_time = (time.time() - start_time) * 1000
-                return True, limited_results, warning_message, execution_time
+                result = QueryResult(True, results, "; ".join(warnings), execution_time,
+                                     truncated=True, total_rows=total_rows)
+            else:
+                execution_time = (time.time() - start_time) * 1000
+                result = QueryResult(True, results, "; ".join(warnings) or None, execution_time,
+                                     total_rows=len(results))
             
+            self.stats["total_execution_time_ms"] += execution_time
+            if cacheable:
+                self.cache.put(cache_key, data_version, result, results)
+            return result
+        
+        except QueryTimeoutError as e:
             execution_time = (time.time() - start_time) * 1000
-            return True, results, None, execution_time
+            self.stats["timeouts"] += 1
+            self.stats["timed_out_time_ms"] += execution_time
+            if template is not None:
+                self.templates.record(template, execution_time, success=False)
+            metrics.inc("text2sql_timeouts_total", stage="sql_execute")
+            print(f"Query timed out: {e}")
+            return QueryResult(False, [], str(e), execution_time, error_code="QUERY_TIMEOUT")
             
         except Exception as e:
             execution_time = (time.time() - start_time) * 1000
+            self.stats["failures"] += 1
+            self.stats["total_execution_time_ms"] += execution_time
+            if template is not None:
+                self.templates.record(template, execution_time, success=False)
+            metrics.inc("text2sql_errors_total", stage="sql_execute", error_code="EXECUTION_FAILED")
             error_message = f"Query execution failed: {str(e)}"
             print(error_message)
-            return False, [], error_message, execution_time
+            return QueryResult(False, [], error_message, execution_time, error_code="EXECUTION_FAILED")
+    
+    def _template(self, sql_query: str, analysis: SQLAnalysis) -> SQLTemplate:
+        """Statement to execute: the parameterized template, or the query itself as a template"""
+        template = parameterize(analysis) if self.parameterize_literals else None
+        return template or SQLTemplate(sql_query, (), analysis.fingerprint)
+    
+    def get_template_stats(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Most executed statement templates with their latency percentiles"""
+        return self.templates.report(limit)
+    
+    async def page_cursor(
+        self, sql_query: str, rows: List[Dict[str, Any]], timeout_ms: Optional[int] = None,
+        analysis: Optional[SQLAnalysis] = None
+    ) -> Optional[str]:
+        """Cursor for the rows after ``rows``, the truncated first page of ``sql_query``"""
+        if self.paginator is None:
+            return None
+        try:
+            return await self.paginator.first_cursor(
+                self._clean_sql_query(sql_query), analysis or analyze_sql(sql_query), rows, timeout_ms
+            )
+        except Exception as e:
+            print(f"Failed to create page cursor: {e}")
+            return None
     
-    def _validate_query_safety(self, sql_query: str) -> Tuple[bool, Optional[str]]:
-        """Validate SQL query for safety and security"""
+    async def fetch_page(self, cursor: str, timeout_ms: Optional[int] = None) -> QueryResult:
+        """
+        Fetch the next page of a truncated result
         
-        # Remove comments and normalize whitespace
-        cleaned_query = self._clean_sql_query(sql_query)
+        The cursor's statement is re-validated, and the page runs under the
+        same row, byte and deadline limits as /execute-sql.
+        """
+        start_time = time.time()
+        if self.paginator is None:
+            return QueryResult(False, [], "Pagination is disabled", 0.0, error_code="PAGINATION_DISABLED")
+        try:
+            payload = self.paginator.decode(cursor)
+            is_safe, safety_error = self._validate_query_safety(payload["q"])
+            if not is_safe:
+                self.stats["rejected"] += 1
+                return QueryResult(False, [], safety_error, 0.0, error_code="UNSAFE_QUERY")
+            
+            timeout = self.resolve_timeout("execute_sql", timeout_ms or payload.get("t"))
+            page = await self.paginator.next_page(
+                payload, self.max_result_rows, max_bytes=self.max_result_bytes or None, timeout=timeout
+            )
+            warning = None
+            if page.truncated:
+                warning = (f"Paging is limited to the first {self.paginator.snapshot_max_rows} rows of this "
+                           "query; use /export for the full result")
+            return QueryResult(True, page.rows, warning, (time.time() - start_time) * 1000,
+                               truncated=page.next_cursor is not None or page.truncated,
+                               next_cursor=page.next_cursor)
         
-        if not cleaned_query:
-            return False, "Empty or invalid SQL query"
+        except CursorError as e:
+            return QueryResult(False, [], str(e), (time.time() - start_time) * 1000, error_code=e.error_code)
+        except QueryTimeoutError as e:
+            self.stats["timeouts"] += 1
+            return QueryResult(False, [], str(e), (time.time() - start_time) * 1000, error_code="QUERY_TIMEOUT")
+        except Exception as e:
+            self.stats["failures"] += 1
+            error_message = f"Query execution failed: {str(e)}"
+            print(error_message)
+            return QueryResult(False, [], error_message, (time.time() - start_time) * 1000,
+                               error_code="EXECUTION_FAILED")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get execution counts, timeouts and the configured deadlines"""
+        executions = self.stats["executions"]
+        return {
+            **self.stats,
+            "timeout_rate": self.stats["timeouts"] / executions if executions else 0.0,
+            "average_execution_time_ms": (
+                self.stats["total_execution_time_ms"] / (executions - self.stats["timeouts"])
+                if executions > self.stats["timeouts"] else 0.0
+            ),
+            "result_cache": self.cache.get_stats(),
+            "planner": self.planner.get_stats(),
+            "pagination": self.paginator.get_stats() if self.paginator is not None else None,
+            "query_cost_budget": self.cost_budget,
+            "query_cost_action": self.cost_action,
+            "sql_analysis_cache": get_analysis_cache_stats(),
+            "query_timeout_seconds": self.query_timeout,
+            "endpoint_timeouts_seconds": {
+                endpoint: timeout or self.query_timeout for endpoint, timeout in self.endpoint_timeouts.items()
+            },
+        }
+    
+    def _truncation_message(self, returned_rows: int, total_rows: Optional[int]) -> str:
+        """Warning for a result cut short by the row or byte limit"""
+        if returned_rows < self.max_result_rows:
+            limit = f"Results limited to {returned_rows} rows by the {self.max_result_bytes:,} byte result size limit"
+        else:
+            limit = f"Results limited to {self.max_result_rows} rows"
+        if total_rows is not None:
+            return f"{limit} (total: {total_rows} rows)"
+        return f"{limit} (more rows available)"
+    
+    def _over_budget_message(self, plan: QueryPlan) -> str:
+        """Explain why a query exceeded the cost budget"""
+        reasons = []
+        if plan.full_scans:
+            reasons.append(f"full scans of {', '.join(plan.full_scans)}")
+        if plan.correlated_subqueries:
+            reasons.append(f"{plan.correlated_subqueries} correlated subqueries")
+        if plan.temp_btrees:
+            reasons.append(f"temporary sorts for {', '.join(plan.temp_btrees)}")
+        detail = f" ({'; '.join(reasons)})" if reasons else ""
+        return f"Estimated query cost {plan.cost:,.0f} exceeds the budget of {self.cost_budget:,.0f}{detail}"
+    
+    async def plan_query(self, sql_query: str, analysis: Optional[SQLAnalysis] = None) -> Optional[QueryPlan]:
+        """Structured plan and cost estimate, or None if SQLite cannot plan the query"""
+        try:
+            with metrics.span("plan"):
+                return await self.planner.plan(sql_query, analysis)
+        except Exception as e:
+            print(f"Failed to plan query: {e}")
+            return None
+    
+    def _validate_query_safety(
+        self, sql_query: str, analysis: Optional[SQLAnalysis] = None
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Validate SQL query for safety and security
         
-        # Convert to uppercase for validation
-        query_upper = cleaned_query.upper()
+        Every check (statement type, dangerous operations, injection patterns,
+        function allowlist, complexity) reads the statement's shared
+        SQLAnalysis, so the SQL is tokenized once per pipeline. Keywords inside
+        string literals, quoted identifiers and comments are not mistaken for SQL.
+        """
+        if analysis is None:
+            analysis = analyze_sql(sql_query)
+        if analysis.error is not None:
+            return False, f"Invalid SQL: {analysis.error}"
+        if not analysis.tokens:
+            return False, "Empty or invalid SQL query"
         
         # 1. Must be SELECT query only
-        if not query_upper.strip().startswith('SELECT'):
+        if not analysis.is_select:
             return False, "Only SELECT queries are allowed"
         
-        # 2. Check for dangerous SQL operations
-        dangerous_operations = [
-            'INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER', 
-            'TRUNCATE', 'REPLACE', 'MERGE', 'GRANT', 'REVOKE',
-            'EXEC', 'EXECUTE', 'PRAGMA', 'ATTACH', 'DETACH'
-        ]
-        
-        for operation in dangerous_operations:
-            # Use word boundaries to avoid false positives
-            pattern = r'\b' + operation + r'\b'
-            if re.search(pattern, query_upper):
-                return False, f"Operation '{operation}' is not allowed"
-        
-        # 3. Check for suspicious patterns
-        suspicious_patterns = [
-            r';\s*(DROP|DELETE|UPDATE|INSERT)',  # Multiple statements
-            r'--\s*\w',  # SQL injection comments
-            r'/\*.*?\*/',  # Block comments (potential injection)
-            r'\bUNION\b.*\bSELECT\b',  # Union-based injection attempts
-            r'\bOR\b.*\b1\s*=\s*1\b',  # OR 1=1 injection
-            r'\bAND\b.*\b1\s*=\s*0\b',  # AND 1=0 injection
-        ]
-        
-        for pattern in suspicious_patterns:
-            if re.search(pattern, query_upper, re.IGNORECASE | re.DOTALL):
-                return False, "Query contains suspicious patterns"
-        
-        # 4. Validate function usage
-        used_functions = re.findall(r'\b(\w+)\s*\(', query_upper)
-        for func in used_functions:
-            if func not in self.allowed_functions and func not in ['SELECT', 'FROM', 'WHERE', 'GROUP', 'ORDER', 'HAVING', 'LIMIT']:
-                # Allow table names and column names
-                if not self._is_table_or_column_reference(func):
-                    return False, f"Function '{func}' is not allowed"
-        
-        # 5. Check query complexity (prevent infinite loops/excessive resource usage)
-        if self._is_query_too_complex(cleaned_query):
+        # 2. Dangerous SQL operations
+        for word in analysis.words:
+            if word in DANGEROUS_OPERATIONS:
+                return False, f"Operation '{word}' is not allowed"
+        
+        # 3. Union-based injection, stacked statements and constant conditions (OR 1=1)
+        if analysis.has_union or analysis.statement_count > 1 or analysis.constant_comparisons:
+            return False, "Query contains suspicious patterns"
+        
+        # 4. Function allowlist
+        for function in analysis.functions:
+            if function not in self.allowed_functions and not self._is_table_or_column_reference(function):
+                return False, f"Function '{function}' is not allowed"
+        
+        # 5. Complexity: cross joins, subqueries and joins
+        if self._is_query_too_complex(analysis):
             return False, "Query is too complex or potentially resource-intensive"
         
         return True, None
     
+    def _is_query_too_complex(self, analysis: SQLAnalysis) -> bool:
+        """Check for cross joins and excessive subqueries or joins"""
+        return analysis.cross_join or analysis.subquery_count > 3 or analysis.join_count > 5
+    
     def _clean_sql_query(self, sql_query: str) -> str:
-        """Clean and normalize SQL query"""
+        """Clean and normalize SQL query (comments, whitespace, trailing semicolons)"""
         try:
-            # Remove leading/trailing whitespace
-            cleaned = sql_query.strip()
-            
-            # Remove SQL comments (-- style)
-            cleaned = re.sub(r'--.*$', '', cleaned, flags=re.MULTILINE)
-            
-            # Remove block comments but be careful with /* */
-            cleaned = re.sub(r'/\*.*?\*/', '', cleaned, flags=re.DOTALL)
-            
-            # Normalize whitespace
-            cleaned = re.sub(r'\s+', ' ', cleaned)
-            
-            # Remove trailing semicolon for processing (will be added back if needed)
-            cleaned = cleaned.rstrip(';').strip()
-            
-            return cleaned
-            
-        except Exception:
+            return strip_comments(sql_query)
+        except SQLLexError:
             return ""
     
     def _is_table_or_column_reference(self, identifier: str) -> bool:
         """Check if identifier is a likely table or column name"""
-        # Known table names in our schema
-        table_names = {'CUSTOMERS', 'PRODUCTS', 'ORDERS', 'ORDER_ITEMS'}
-        
-        # Common column patterns
-        column_patterns = [
-            r'.*_ID$', r'.*_NAME$', r'.*_DATE$', r'.*_TIME$', 
-            r'.*_STATUS$', r'.*_TYPE$', r'.*_CODE$', r'.*_INR$'
-        ]
-        
-        if identifier in table_names:
-            return True
-            
-        for pattern in column_patterns:
-            if re.match(pattern, identifier):
-                return True
-        
-        return False
-    
-    def _is_query_too_complex(self, sql_query: str) -> bool:
-        """Check if query is too complex"""
-        query_upper = sql_query.upper()
-        
-        # Count subqueries
-        subquery_count = query_upper.count('(SELECT')
-        if subquery_count > 3:
-            return True
-        
-        # Count JOINs (too many joins can be expensive)
-        join_count = len(re.findall(r'\bJOIN\b', query_upper))
-        if join_count > 5:
-            return True
-        
-        # Check for potentially expensive operations
-        expensive_patterns = [
-            r'\bCROSS\s+JOIN\b',  # Cross joins can be expensive
-            r'\bUNION\s+ALL\b.*\bUNION\s+ALL\b',  # Multiple unions
-        ]
-        
-        for pattern in expensive_patterns:
-            if re.search(pattern, query_upper):
-                return True
-        
-        return False
+        return identifier in KNOWN_TABLE_NAMES or _COLUMN_REFERENCE_RE.match(identifier) is not None
     
     async def validate_sql_syntax(self, sql_query: str) -> Tuple[bool, Optional[str]]:
         """Validate SQL syntax without executing"""
@@ -197,53 +454,42 @@ class SQLService:
             return None
     
     def format_sql_results(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Format SQL results for better presentation"""
+        """
+        Format SQL results for better presentation
+        
+        Currency columns are identified once per result set and formatted a
+        column at a time; rows are then reassembled with zip instead of
+        checking every key of every row.
+        """
         if not results:
             return []
+        names = list(results[0])
+        currency = {name for name in names if is_currency_column(name)}
+        if not currency:
+            return results
         
-        formatted_results = []
-        for row in results:
-            formatted_row = {}
-            for key, value in row.items():
-                # Format currency values
-                if key.endswith('_inr') or key.endswith('_price') or 'amount' in key.lower():
-                    if isinstance(value, (int, float)):
-                        formatted_row[key] = value
-                        formatted_row[f"{key}_formatted"] = f"₹{value:,.2f}"
-                    else:
-                        formatted_row[key] = value
-                else:
-                    formatted_row[key] = value
-            
-            formatted_results.append(formatted_row)
+        output_names, output_columns, partial = [], [], []
+        for name in names:
+            output_names.append(name)
+            output_columns.append(map(itemgetter(name), results))
+            if name in currency:
+                formatted = _format_currency_column(list(map(itemgetter(name), results)))
+                output_names.append(f"{name}_formatted")
+                output_columns.append(formatted)
+                if None in formatted:
+                    partial.append(f"{name}_formatted")
         
+        formatted_results = [dict(zip(output_names, row)) for row in zip(*output_columns)]
+        # Only numeric values get a formatted copy
+        for key in partial:
+            for row in formatted_results:
+                if row[key] is None:
+                    del row[key]
         return formatted_results
     
     def get_result_summary(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Generate summary statistics for query results"""
-        if not results:
-            return {"row_count": 0, "columns": [], "has_numeric_data": False}
-        
-        summary = {
-            "row_count": len(results),
-            "columns": list(results[0].keys()) if results else [],
-            "has_numeric_data": False,
-            "numeric_columns": [],
-            "currency_columns": []
-        }
-        
-        # Analyze column types
-        if results:
-            first_row = results[0]
-            for key, value in first_row.items():
-                if isinstance(value, (int, float)):
-                    summary["has_numeric_data"] = True
-                    summary["numeric_columns"].append(key)
-                    
-                if key.endswith('_inr') or 'amount' in key.lower() or 'price' in key.lower():
-                    summary["currency_columns"].append(key)
-        
-        return summary
+        """Column types and statistics (null count, min, max, mean, sum, percentiles) over all rows"""
+        return summarize_results(results)
 
 
 # Global SQL service instance
@@ -2,9 +2,21 @@
 Text2SQL Service - Main orchestrator for natural language to SQL conversion and execution
 """
 import time
-from typing import Dict, Any, Optional, Tuple, List
+from collections import deque
+from contextlib import nullcontext
+from typing import Deque, Dict, Any, Optional, Tuple, List
 from app.services.llm_service import llm_service
-from app.services.sql_service import sql_service
+from app.services.sql_service import sql_service, normalize_sql
+from app.services.generation_cache import normalize_question
+from app.services.example_store import example_store
+from app.utils.config import get_settings
+from app.services.query_log import query_log
+from app.utils.metrics import metrics, trace_request
+from app.utils.quantiles import LatencyStats
+from app.utils.singleflight import SingleFlight
+from app.utils.result_formats import ROWS, column_metadata
+from app.utils.result_summary import summarize_results
+from app.utils.sql_analysis import SQLAnalysis, analyze_sql
 from app.models.schemas import (
     GenerateSQLResponse, ExecuteSQLResponse, QueryResponse
 )
@@ -14,10 +26,17 @@ class Text2SQLService:
     """Main service that orchestrates text-to-SQL conversion and execution"""
     
     def __init__(self):
+        self.settings = get_settings()
         self.llm = llm_service
         self.sql = sql_service
-        self.query_history = []  # Store recent queries for analytics
-        self.max_history = 100
+        self.examples = example_store
+        # Recent queries, plus streaming aggregates per entry type over all traffic
+        self.max_history = self.settings.QUERY_HISTORY_SIZE
+        self.query_history: Deque[Dict[str, Any]] = deque(maxlen=self.max_history)
+        self.traffic: Dict[str, LatencyStats] = {}
+        # Coalesce identical in-flight generations and executions
+        self.generation_flight = SingleFlight("generation")
+        self.execution_flight = SingleFlight("execution")
     
     async def generate_sql_from_text(self, natural_query: str) -> GenerateSQLResponse:
         """
@@ -29,18 +48,14 @@ class Text2SQLService:
         Returns:
             GenerateSQLResponse with generated SQL and metadata
         """
+        start_time = time.time()
         try:
-            # Check if LLM service is available
-            if not self.llm.is_available():
-                return GenerateSQLResponse(
-                    sql_query="",
-                    confidence=0.0,
-                    explanation="LLM service is not available. Please check configuration.",
-                    estimated_rows=0
-                )
-            
-            # Generate SQL using LLM service
-            sql_query, explanation, confidence = await self.llm.generate_sql(natural_query)
+            # Generate SQL using LLM service (cached generations are served
+            # even when the LLM itself is unavailable)
+            sql_query, explanation, confidence = await self.generation_flight.do(
+                normalize_question(natural_query),
+                lambda: self.llm.generate_sql(natural_query)
+            )
             
             if not sql_query:
                 return GenerateSQLResponse(
@@ -50,8 +65,16 @@ class Text2SQLService:
                     estimated_rows=0
                 )
             
-            # Estimate result rows (simple heuristic)
-            estimated_rows = self._estimate_result_rows(sql_query)
+            # Estimate result rows from the query plan, falling back to the
+            # keyword heuristic. Only SQL that would pass execution's safety
+            # checks is sent to EXPLAIN QUERY PLAN.
+            analysis = analyze_sql(sql_query)
+            is_safe, _ = self.sql._validate_query_safety(sql_query, analysis)
+            plan = await self.sql.plan_query(sql_query, analysis) if is_safe else None
+            if plan is not None:
+                estimated_rows = plan.estimated_rows
+            else:
+                estimated_rows = self._estimate_result_rows(sql_query, analysis)
             
             # Store in history for analytics
             self._add_to_history({
@@ -59,6 +82,7 @@ class Text2SQLService:
                 "natural_query": natural_query,
                 "sql_query": sql_query,
                 "confidence": confidence,
+                "generation_time_ms": (time.time() - start_time) * 1000,
                 "timestamp": time.time()
             })
             
@@ -66,7 +90,11 @@ class Text2SQLService:
                 sql_query=sql_query,
                 confidence=confidence,
                 explanation=explanation,
-                estimated_rows=estimated_rows
+                estimated_rows=estimated_rows,
+                query_plan=plan.to_dict() if plan is not None else None,
+                within_budget=(
+                    plan.cost <= self.sql.cost_budget if plan is not None and self.sql.cost_budget else None
+                )
             )
             
         except Exception as e:
@@ -77,19 +105,36 @@ class Text2SQLService:
                 estimated_rows=0
             )
     
-    async def execute_sql_query(self, sql_query: str) -> ExecuteSQLResponse:
+    async def execute_sql_query(
+        self,
+        sql_query: str,
+        timeout_ms: Optional[int] = None,
+        endpoint: str = "execute_sql",
+        analysis: Optional[SQLAnalysis] = None,
+        response_format: str = ROWS
+    ) -> ExecuteSQLResponse:
         """
         Execute SQL query safely and return results
         
         Args:
             sql_query: SQL query string to execute
+            timeout_ms: Optional per-request deadline
+            endpoint: Endpoint whose default deadline applies
+            analysis: The statement's SQLAnalysis, when the caller already has it
+            response_format: For formats other than rows, currency formatting
+                goes in ``columns`` metadata instead of extra per-row values
             
         Returns:
             ExecuteSQLResponse with query results and metadata
         """
         try:
             # Execute SQL query
-            success, data, error_message, execution_time = await self.sql.execute_sql_query(sql_query)
+            timeout = self.sql.resolve_timeout(endpoint, timeout_ms)
+            result = await self.execution_flight.do(
+                (normalize_sql(sql_query), timeout),
+                lambda: self.sql.execute_sql_query(sql_query, timeout=timeout, analysis=analysis)
+            )
+            success, data, error_message, execution_time = result
             
             if not success:
                 response = ExecuteSQLResponse(
@@ -97,18 +142,38 @@ class Text2SQLService:
                     data=[],
                     row_count=0,
                     execution_time_ms=execution_time,
-                    error_message=error_message
+                    error_message=error_message,
+                    error_code=result.error_code
                 )
             else:
                 # Format results for better presentation
-                formatted_data = self.sql.format_sql_results(data)
+                with metrics.span("format"):
+                    if response_format == ROWS:
+                        formatted_data, columns = self.sql.format_sql_results(data), None
+                    else:
+                        formatted_data, columns = data, column_metadata(data)
+                summary = None
+                if self.settings.RESULT_SUMMARY_ENABLED:
+                    with metrics.span("summary"):
+                        summary = summarize_results(data, columns)
+                
+                # Truncated results can be continued with POST /next-page
+                next_cursor = None
+                if result.truncated:
+                    with metrics.span("page_cursor"):
+                        next_cursor = await self.sql.page_cursor(sql_query, data, timeout_ms, analysis)
                 
                 response = ExecuteSQLResponse(
                     success=True,
                     data=formatted_data,
                     row_count=len(data),
                     execution_time_ms=execution_time,
-                    error_message=error_message  # May contain warnings
+                    error_message=error_message,  # May contain warnings
+                    truncated=result.truncated,
+                    total_rows=result.total_rows,
+                    columns=columns,
+                    next_cursor=next_cursor,
+                    summary=summary
                 )
             
             # Store in history
@@ -132,10 +197,54 @@ class Text2SQLService:
                 error_message=f"Error executing SQL: {str(e)}"
             )
     
+    async def fetch_next_page(
+        self, cursor: str, timeout_ms: Optional[int] = None, response_format: str = ROWS
+    ) -> ExecuteSQLResponse:
+        """
+        Fetch the page after a truncated /execute-sql or /query result
+        
+        Args:
+            cursor: next_cursor from the previous page
+            timeout_ms: Optional per-request deadline (defaults to the first page's)
+            response_format: Result layout, see execute_sql_query
+            
+        Returns:
+            ExecuteSQLResponse with the page and the cursor for the one after it
+        """
+        result = await self.sql.fetch_page(cursor, timeout_ms)
+        if not result.success:
+            return ExecuteSQLResponse(
+                success=False,
+                data=[],
+                row_count=0,
+                execution_time_ms=result.execution_time_ms,
+                error_message=result.error_message,
+                error_code=result.error_code
+            )
+        
+        if response_format == ROWS:
+            data, columns = self.sql.format_sql_results(result.data), None
+        else:
+            data, columns = result.data, column_metadata(result.data)
+        return ExecuteSQLResponse(
+            success=True,
+            data=data,
+            row_count=len(result.data),
+            execution_time_ms=result.execution_time_ms,
+            error_message=result.error_message,
+            truncated=result.truncated,
+            columns=columns,
+            next_cursor=result.next_cursor,
+            summary=summarize_results(result.data, columns) if self.settings.RESULT_SUMMARY_ENABLED else None
+        )
+    
     async def process_natural_language_query(
         self, 
         natural_query: str, 
-        include_sql_in_response: bool = False
+        include_sql_in_response: bool = False,
+        timeout_ms: Optional[int] = None,
+        response_format: str = ROWS,
+        include_timings: bool = False
     ) -> QueryResponse:
         """
         Complete pipeline: Convert natural language to SQL and execute
@@ -143,10 +252,53 @@ class Text2SQLService:
         Args:
             natural_query: Natural language query string
             include_sql_in_response: Whether to include generated SQL in response
+            timeout_ms: Optional per-request deadline for the SQL execution
+            response_format: Result layout, see execute_sql_query
+            include_timings: Whether to return the per-stage timing breakdown
             
         Returns:
             QueryResponse with final results and metadata
         """
+        start_time = time.perf_counter()
+        traced = include_timings or query_log.enabled
+        with trace_request() if traced else nullcontext() as trace:
+            response = await self._process_query(natural_query, timeout_ms, response_format)
+        elapsed = time.perf_counter() - start_time
+        
+        metrics.observe("text2sql_request_duration_seconds", elapsed, endpoint="query")
+        metrics.inc("text2sql_queries_total", endpoint="query", outcome="success" if response.success else "failure")
+        timings_ms = None
+        if trace is not None:
+            timings_ms = {stage: round(ms, 3) for stage, ms in trace.timings.items()}
+            timings_ms["total"] = round(elapsed * 1000, 3)
+            if include_timings:
+                response.timings_ms = timings_ms
+        
+        # Persist the run; the write happens on the query log's background thread
+        query_log.append({
+            "timestamp": time.time(),
+            "question": natural_query,
+            "sql_query": response.sql_query,
+            "success": response.success,
+            "error_code": response.error_code,
+            "row_count": response.row_count,
+            "truncated": response.truncated,
+            "confidence": response.confidence,
+            "timeout_ms": timeout_ms,
+            "timings_ms": timings_ms,
+            "cache_hits": trace.cache_hits if trace is not None else [],
+        })
+        if not include_sql_in_response:
+            response.sql_query = None
+        return response
+    
+    async def _process_query(
+        self,
+        natural_query: str,
+        timeout_ms: Optional[int],
+        response_format: str
+    ) -> QueryResponse:
+        """The /query pipeline: generate, execute, explain and record (sql_query is always set)"""
         start_time = time.time()
         
         try:
@@ -158,7 +310,7 @@ class Text2SQLService:
                     success=False,
                     data=[],
                     row_count=0,
-                    sql_query=sql_generation_result.sql_query if include_sql_in_response else None,
+                    sql_query=sql_generation_result.sql_query,
                     confidence=sql_generation_result.confidence,
                     explanation=sql_generation_result.explanation,
                     execution_time_ms=(time.time() - start_time) * 1000,
@@ -166,28 +318,47 @@ class Text2SQLService:
                 )
             
             # Step 2: Execute the generated SQL
-            execution_result = await self.execute_sql_query(sql_generation_result.sql_query)
+            execution_result = await self.execute_sql_query(
+                sql_generation_result.sql_query, timeout_ms=timeout_ms, endpoint="query",
+                analysis=analyze_sql(sql_generation_result.sql_query),
+                response_format=response_format
+            )
             
             # Step 3: Prepare final response
             total_time = (time.time() - start_time) * 1000
             
             # Generate comprehensive explanation
-            final_explanation = self._generate_comprehensive_explanation(
-                natural_query, 
-                sql_generation_result.sql_query,
-                execution_result.data,
-                sql_generation_result.explanation
-            )
+            with metrics.span("explanation"):
+                final_explanation = self._generate_comprehensive_explanation(
+                    natural_query, 
+                    sql_generation_result.sql_query,
+                    execution_result.data,
+                    sql_generation_result.explanation
+                )
             
             response = QueryResponse(
                 success=execution_result.success,
                 data=execution_result.data,
                 row_count=execution_result.row_count,
-                sql_query=sql_generation_result.sql_query if include_sql_in_response else None,
+                sql_query=sql_generation_result.sql_query,
                 confidence=sql_generation_result.confidence,
                 explanation=final_explanation,
                 execution_time_ms=total_time,
-                error_message=execution_result.error_message
+                error_message=execution_result.error_message,
+                error_code=execution_result.error_code,
+                truncated=execution_result.truncated,
+                total_rows=execution_result.total_rows,
+                columns=execution_result.columns,
+                next_cursor=execution_result.next_cursor,
+                summary=execution_result.summary
+            )
+            
+            # Grow the few-shot example store from confident, successful runs
+            await self._learn_example(
+                natural_query,
+                sql_generation_result.sql_query,
+                sql_generation_result.confidence,
+                execution_result
             )
             
             # Store complete pipeline result in history
@@ -217,24 +388,68 @@ class Text2SQLService:
                 error_message=str(e)
             )
     
-    def _estimate_result_rows(self, sql_query: str) -> int:
+    async def _learn_example(
+        self,
+        natural_query: str,
+        sql_query: str,
+        confidence: Optional[float],
+        execution_result: ExecuteSQLResponse
+    ):
+        """
+        Add a successful (question, SQL) pair to the few-shot example store
+        
+        The confidence score is a heuristic, not a check that the SQL answers
+        the question, so this is opt-in (EXAMPLE_STORE_LEARN_FROM_HISTORY) and
+        needs a high score; confirm_example is the verified path.
+        """
+        settings = self.settings
+        if not settings.EXAMPLE_STORE_LEARN_FROM_HISTORY:
+            return
+        if not execution_result.success or execution_result.row_count == 0 or execution_result.truncated:
+            return
+        if (confidence or 0.0) < settings.EXAMPLE_STORE_MIN_CONFIDENCE:
+            return
+        
+        try:
+            await self.examples.add(natural_query, sql_query)
+        except Exception as e:
+            print(f"Error adding example: {e}")
+    
+    async def confirm_example(self, natural_query: str, sql_query: str) -> Tuple[bool, str]:
+        """
+        Store a user-confirmed (question, SQL) pair as a few-shot example
+        
+        The SQL must pass the same safety checks as execution and be valid
+        against the current schema.
+        
+        Returns:
+            Tuple of (stored, message)
+        """
+        is_safe, safety_error = self.sql._validate_query_safety(sql_query)
+        if not is_safe:
+            return False, safety_error
+        is_valid, syntax_error = await self.sql.validate_sql_syntax(sql_query)
+        if not is_valid:
+            return False, f"Invalid SQL: {syntax_error}"
+        
+        if not await self.examples.add(natural_query, sql_query, source="confirmed"):
+            return False, "Example already stored"
+        return True, "Example stored"
+    
+    def _estimate_result_rows(self, sql_query: str, analysis: Optional[SQLAnalysis] = None) -> int:
         """Estimate number of rows the query might return (simple heuristic)"""
-        query_upper = sql_query.upper()
+        analysis = analysis or analyze_sql(sql_query)
         
         # Base estimation
-        if 'LIMIT' in query_upper:
-            # Extract LIMIT value
-            import re
-            limit_match = re.search(r'LIMIT\s+(\d+)', query_upper)
-            if limit_match:
-                return min(int(limit_match.group(1)), 100)
+        if analysis.limit is not None:
+            return min(analysis.limit, 100)
         
         # Heuristic based on query type
-        if 'GROUP BY' in query_upper:
+        if analysis.has_group_by:
             return 20  # Aggregated results usually have fewer rows
-        elif 'JOIN' in query_upper:
+        elif analysis.join_count:
             return 50  # Joined results can vary
-        elif 'COUNT' in query_upper or 'SUM' in query_upper:
+        elif analysis.aggregates:
             return 1   # Aggregate functions typically return single values
         else:
             return 25  # Default estimate
@@ -281,46 +496,60 @@ class Text2SQLService:
         return " ".join(explanation_parts)
     
     def _add_to_history(self, entry: Dict[str, Any]):
-        """Add entry to query history for analytics"""
+        """Add entry to the recent query ring buffer and the per-type aggregates"""
         try:
             self.query_history.append(entry)
             
-            # Keep only recent entries
-            if len(self.query_history) > self.max_history:
-                self.query_history = self.query_history[-self.max_history:]
+            stats = self.traffic.get(entry["type"])
+            if stats is None:
+                stats = self.traffic[entry["type"]] = LatencyStats()
+            latency = entry.get("total_time_ms", entry.get("execution_time_ms", entry.get("generation_time_ms")))
+            stats.record(latency, entry.get("success", True))
                 
         except Exception as e:
             print(f"Error adding to history: {e}")
     
-    def get_query_analytics(self) -> Dict[str, Any]:
-        """Get analytics from query history"""
-        if not self.query_history:
-            return {"total_queries": 0}
-        
-        total_queries = len(self.query_history)
-        successful_queries = sum(1 for entry in self.query_history 
-                               if entry.get("success", True))
-        failed_queries = total_queries - successful_queries
-        
-        # Calculate average execution time
-        execution_times = [entry.get("total_time_ms", 0) 
-                          for entry in self.query_history 
-                          if "total_time_ms" in entry]
-        avg_execution_time = sum(execution_times) / len(execution_times) if execution_times else 0
-        
-        # Most common query patterns
-        complete_queries = [entry for entry in self.query_history if entry.get("type") == "complete_query"]
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """Get in-flight request coalescing counters"""
+        return {
+            "generation": self.generation_flight.get_stats(),
+            "execution": self.execution_flight.get_stats()
+        }
+    
+    def get_traffic_analytics(self) -> Dict[str, Any]:
+        """
+        Counts, success rates and p50/p95/p99 latency per entry type and per stage
         
+        Aggregates are streaming (quantile sketches), so they cover all traffic
+        since startup and cost the same to read however much traffic there was.
+        """
+        total = sum(stats.count for stats in self.traffic.values())
+        successes = sum(stats.successes for stats in self.traffic.values())
         return {
-            "total_queries": total_queries,
-            "successful_queries": successful_queries,
-            "failed_queries": failed_queries,
-            "success_rate": successful_queries / total_queries if total_queries > 0 else 0,
-            "average_execution_time_ms": avg_execution_time,
-            "recent_activity": len([entry for entry in self.query_history 
-                                  if time.time() - entry.get("timestamp", 0) < 3600])  # Last hour
+            "total_queries": total,
+            "successful_queries": successes,
+            "failed_queries": total - successes,
+            "success_rate": successes / total if total else 0.0,
+            "endpoints": {kind: stats.summary() for kind, stats in self.traffic.items()},
+            "stages": metrics.stage_summary(),
         }
     
+    def get_query_analytics(self) -> Dict[str, Any]:
+        """Get traffic analytics with coalescing, generation and execution stats"""
+        analytics = self.get_traffic_analytics()
+        complete = self.traffic.get("complete_query")
+        recent_cutoff = time.time() - 3600
+        analytics.update({
+            "average_execution_time_ms": (
+                complete.latency.sum / complete.latency.count if complete and complete.latency.count else 0
+            ),
+            "recent_activity": sum(1 for entry in self.query_history if entry.get("timestamp", 0) > recent_cutoff),
+            "coalescing": self.get_coalescing_stats(),
+            "generation": self.llm.get_stats(),
+            "execution": self.sql.get_stats()
+        })
+        return analytics
+    
     async def get_database_info(self) -> Dict[str, Any]:
         """Get database schema information"""
         try:
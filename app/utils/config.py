@@ -15,10 +15,93 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: Optional[str] = None
     OPENAI_API_KEY: Optional[str] = None
     LLM_MODEL: str = "gemini-1.5-flash"
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_TIMEOUT_SECONDS: float = 30.0
+    SCHEMA_PRUNING_ENABLED: bool = True
+    FAST_PATH_ENABLED: bool = True
+    
+    # Few-shot Example Store Configuration
+    EXAMPLE_STORE_PATH: str = "./text2sql_examples.db"
+    FEW_SHOT_EXAMPLES: int = 3
+    EXAMPLE_STORE_LEARN_FROM_HISTORY: bool = False  # learn unconfirmed LLM SQL (opt-in)
+    EXAMPLE_STORE_MIN_CONFIDENCE: float = 0.95
+    
+    # Generation Cache Configuration
+    GENERATION_CACHE_ENABLED: bool = True
+    GENERATION_CACHE_SIZE: int = 512
+    GENERATION_CACHE_TTL_SECONDS: float = 3600.0
+    GENERATION_CACHE_PATH: str = "./text2sql_cache.db"
+    GENERATION_CACHE_DISK_TTL_SECONDS: float = 604800.0
     
     # Database Configuration
     DATABASE_URL: str = "sqlite:///./text2sql_assistant.db"
     DATABASE_ECHO: bool = False
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 8
+    DB_POOL_ACQUIRE_TIMEOUT_SECONDS: float = 10.0
+    DB_POOL_HEALTH_CHECK_INTERVAL_SECONDS: float = 30.0
+    DB_CACHED_STATEMENTS: int = 512  # prepared statements kept per pooled connection
+    DB_TUNING_PROFILE: str = "default"
+    DB_JOURNAL_MODE: Optional[str] = None
+    DB_SYNCHRONOUS: Optional[str] = None
+    DB_CACHE_SIZE_KB: Optional[int] = None
+    DB_MMAP_SIZE_MB: Optional[int] = None
+    DB_TEMP_STORE: Optional[str] = None
+    DB_BUSY_TIMEOUT_MS: Optional[int] = None
+    
+    # Query Result Limits
+    MAX_RESULT_ROWS: int = 1000
+    MAX_RESULT_BYTES: int = 0  # 0 disables the byte budget
+    RESULT_FETCH_BATCH_SIZE: int = 256
+    COUNT_TRUNCATED_RESULTS: bool = False
+    RESULT_SUMMARY_ENABLED: bool = True  # per-column statistics in /execute-sql and /query responses
+    
+    # Result Cache Configuration
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_BYTES: int = 67108864
+    RESULT_CACHE_MAX_ENTRIES: int = 1024
+    RESULT_CACHE_TTL_SECONDS: float = 300.0
+    
+    # Query Deadlines (endpoint values fall back to QUERY_TIMEOUT_SECONDS)
+    QUERY_TIMEOUT_SECONDS: float = 30.0
+    EXECUTE_SQL_TIMEOUT_SECONDS: Optional[float] = None
+    QUERY_ENDPOINT_TIMEOUT_SECONDS: Optional[float] = None
+    MAX_QUERY_TIMEOUT_SECONDS: float = 120.0
+    EXPORT_TIMEOUT_SECONDS: Optional[float] = None  # counts SQLite time only, not time waiting on the client
+    
+    # Cursor Pagination (cursors are signed with SECRET_KEY)
+    PAGINATION_ENABLED: bool = True
+    PAGINATION_CURSOR_TTL_SECONDS: float = 3600.0
+    PAGINATION_SNAPSHOT_TTL_SECONDS: float = 300.0
+    PAGINATION_SNAPSHOT_MAX_ROWS: int = 100000
+    PAGINATION_SNAPSHOT_CACHE_BYTES: int = 67108864
+    
+    # Streaming Export
+    EXPORT_BATCH_SIZE: int = 1000
+    EXPORT_MAX_CONCURRENT: int = 2  # each running export holds a pooled connection
+    
+    # Query Cost Admission Control (cost is the planner's estimate in row visits)
+    QUERY_COST_BUDGET: float = 10000000.0  # 0 disables admission control
+    QUERY_COST_ACTION: str = "downgrade"  # "reject" or "downgrade"
+    QUERY_COST_DOWNGRADE_TIMEOUT_SECONDS: float = 5.0
+    QUERY_PLAN_CACHE_SIZE: int = 512
+    
+    # Statement Templates (literals bound as parameters so query shapes reuse prepared statements)
+    SQL_PARAMETERIZE_LITERALS: bool = True
+    QUERY_TEMPLATE_STATS_SIZE: int = 256
+    
+    # Metrics (per-stage latency histograms and counters served on /metrics)
+    METRICS_ENABLED: bool = True
+    QUERY_HISTORY_SIZE: int = 100  # recent entries kept; /analytics aggregates cover all traffic
+    
+    # Query Log (append-only JSONL of /query runs, written in batches by a background thread)
+    QUERY_LOG_ENABLED: bool = True
+    QUERY_LOG_PATH: str = "./text2sql_query_log.jsonl"
+    QUERY_LOG_MAX_BYTES: int = 52428800  # rotate at 50 MiB
+    QUERY_LOG_BACKUPS: int = 5
+    QUERY_LOG_BATCH_SIZE: int = 100
+    QUERY_LOG_FLUSH_INTERVAL_SECONDS: float = 1.0
+    QUERY_LOG_MAX_PENDING: int = 10000  # records beyond this are dropped, never awaited
     
     # API Configuration
     API_HOST: str = "0.0.0.0"
@@ -40,6 +123,12 @@ class Settings(BaseSettings):
             print("Warning: GEMINI_API_KEY not set. Please set it for LLM functionality.")
         return v
     
+    @validator("QUERY_COST_ACTION")
+    def validate_query_cost_action(cls, v):
+        if v not in ("reject", "downgrade"):
+            raise ValueError("QUERY_COST_ACTION must be 'reject' or 'downgrade'")
+        return v
+    
     @property
     def allowed_origins_list(self) -> list[str]:
         """Convert comma-separated origins to list"""
@@ -0,0 +1,111 @@
+"""
+In-memory LRU cache with per-entry TTL, optional byte budget and hit/miss/eviction counters
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class LRUCache:
+    """
+    Least-recently-used cache with optional time-to-live
+
+    When ``max_bytes`` is set, entries are weighted by the size passed to
+    ``set`` and evicted until both the entry count and the total size fit.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl_seconds: Optional[float] = None,
+                 max_bytes: Optional[int] = None):
+        self.maxsize = max(1, maxsize)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, tuple[Any, float, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None, refreshing its recency"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at, _ = entry
+        if expires_at and expires_at < time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None, size: int = 0) -> bool:
+        """
+        Insert or replace a value, evicting the least recently used entries
+
+        Returns False (and stores nothing) if the value alone exceeds max_bytes.
+        """
+        self._remove(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return False
+
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl else 0.0
+        self._entries[key] = (value, expires_at, size)
+        self.bytes += size
+
+        while len(self._entries) > self.maxsize or (
+            self.max_bytes is not None and self.bytes > self.max_bytes
+        ):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+        return True
+
+    def _remove(self, key: Hashable) -> Optional[tuple]:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+        return entry
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove an entry and return its value"""
+        entry = self._remove(key)
+        return entry[0] if entry else None
+
+    def clear(self):
+        """Remove all entries"""
+        self._entries.clear()
+        self.bytes = 0
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Unexpired (key, value) pairs, least recently used first, without refreshing recency"""
+        now = time.monotonic()
+        return [(key, value) for key, (value, expires_at, _) in self._entries.items()
+                if not expires_at or expires_at >= now]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,244 @@
+"""
+Per-stage latency histograms and counters, exported in the Prometheus text format
+
+Spans time pipeline stages (prompt building, the LLM call, validation,
+SQLite execution, formatting, serialization) into one histogram labelled
+by stage. A request can also collect its own stage timings, which /query
+returns when ``include_timings`` is set.
+"""
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.utils.config import get_settings
+from app.utils.quantiles import QuantileSketch, latency_summary
+
+STAGE_DURATION = "text2sql_stage_duration_seconds"
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    STAGE_DURATION: "Time spent in each query pipeline stage",
+    "text2sql_request_duration_seconds": "End-to-end pipeline request time",
+    "text2sql_cache_hits_total": "Lookups answered from a cache",
+    "text2sql_cache_misses_total": "Lookups not found in a cache",
+    "text2sql_errors_total": "Failed operations by stage and error code",
+    "text2sql_timeouts_total": "Operations that hit their deadline",
+    "text2sql_queries_total": "Pipeline requests by endpoint and outcome",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+_INF_BUCKET = 'le="+Inf"'
+
+
+class RequestTrace:
+    """Stage timings (milliseconds) and cache hits of one request"""
+
+    __slots__ = ("timings", "cache_hits")
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.cache_hits: List[str] = []
+
+
+# Trace of the current request, when something (include_timings, the query log) wants it
+_request_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a running sum and count"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Span:
+    """Times the enclosed block as one stage"""
+
+    __slots__ = ("registry", "stage", "start")
+
+    def __init__(self, registry: "MetricsRegistry", stage: str):
+        self.registry = registry
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.record_stage(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: LabelKey, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class MetricsRegistry:
+    """
+    In-process counters and histograms
+
+    Updates are plain dict operations on the event loop thread, so a span
+    costs two clock reads and a bucket search. When disabled, spans are a
+    shared no-op and counters are not kept.
+    """
+
+    def __init__(self, enabled: bool = True, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._stages: Dict[str, Histogram] = {}  # STAGE_DURATION series by stage
+        self.stage_latency: Dict[str, QuantileSketch] = {}  # milliseconds, for percentile analytics
+
+    def span(self, stage: str):
+        """Context manager timing a pipeline stage"""
+        if not self.enabled and _request_trace.get() is None:
+            return _NOOP_SPAN
+        return _Span(self, stage)
+
+    def record_stage(self, stage: str, seconds: float):
+        """Record a stage duration measured elsewhere"""
+        trace = _request_trace.get()
+        if trace is not None:
+            trace.timings[stage] = trace.timings.get(stage, 0.0) + seconds * 1000
+        if self.enabled:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                series = self.histograms.setdefault(STAGE_DURATION, {})
+                histogram = self._stages[stage] = series.setdefault((("stage", stage),), Histogram(self.buckets))
+                self.stage_latency[stage] = QuantileSketch()
+            histogram.observe(seconds)
+            self.stage_latency[stage].add(seconds * 1000)
+
+    def observe(self, name: str, value: float, **labels: str):
+        """Add a value to a histogram"""
+        if not self.enabled:
+            return
+        series = self.histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str):
+        """Increment a counter"""
+        if not self.enabled:
+            return
+        series = self.counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0.0) + amount
+
+    def cache_hit(self, cache: str):
+        """Count a cache hit, noting it on the current request's trace"""
+        trace = _request_trace.get()
+        if trace is not None:
+            trace.cache_hits.append(cache)
+        self.inc("text2sql_cache_hits_total", cache=cache)
+
+    def cache_miss(self, cache: str):
+        """Count a cache miss"""
+        self.inc("text2sql_cache_misses_total", cache=cache)
+
+    def reset(self):
+        """Drop all recorded values"""
+        self.histograms.clear()
+        self.counters.clear()
+        self._stages.clear()
+        self.stage_latency.clear()
+
+    def stage_summary(self) -> Dict[str, Dict[str, Any]]:
+        """Count and mean/p50/p95/p99 milliseconds of every stage since startup"""
+        return {
+            stage: {"count": sketch.count, "latency_ms": latency_summary(sketch)}
+            for stage, sketch in self.stage_latency.items()
+        }
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+        for name in sorted(self.counters):
+            self._header(lines, name, "counter")
+            for labels, value in sorted(self.counters[name].items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for name in sorted(self.histograms):
+            self._header(lines, name, "histogram")
+            for labels, histogram in sorted(self.histograms[name].items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    le = 'le="%g"' % bound
+                    lines.append(f"{name}_bucket{_format_labels(labels, le)} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, _INF_BUCKET)} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    @staticmethod
+    def _header(lines: List[str], name: str, metric_type: str):
+        if name in METRIC_HELP:
+            lines.append(f"# HELP {name} {METRIC_HELP[name]}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+
+@contextmanager
+def trace_request() -> Iterator[RequestTrace]:
+    """
+    Trace the stage timings and cache hits of the enclosed request
+
+    Work that another request already had in flight (coalesced generations
+    and executions) is traced in that request only.
+    """
+    trace = RequestTrace()
+    token = _request_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _request_trace.reset(token)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    """Collect the stage timings (ms) of the enclosed request"""
+    with trace_request() as trace:
+        yield trace.timings
+
+
+# Global metrics registry
+metrics = MetricsRegistry(enabled=get_settings().METRICS_ENABLED)
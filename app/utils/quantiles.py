@@ -0,0 +1,126 @@
+"""
+Streaming quantile estimates in bounded memory
+
+A QuantileSketch keeps counts in logarithmically sized buckets (the
+DDSketch scheme): every value lands in the bucket ``ceil(log_gamma(x))``,
+so any reported quantile is within ``relative_accuracy`` of the true value
+however many values were added. Memory is bounded by the range of the
+data, not the traffic; past ``max_buckets`` the lowest buckets are merged.
+"""
+import math
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+
+class QuantileSketch:
+    """Relative-error quantile sketch over non-negative values"""
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0  # values too small for a bucket
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        """Add one value; negative values are counted as zero"""
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value <= 1e-9:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        buckets = self.buckets
+        buckets[key] = buckets.get(key, 0) + 1
+        if len(buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self):
+        """Merge the two lowest buckets (their values lose accuracy first)"""
+        lowest, second = sorted(self.buckets)[:2]
+        self.buckets[second] += self.buckets.pop(lowest)
+
+    def merge(self, other: "QuantileSketch"):
+        """Add another sketch with the same accuracy into this one"""
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        while len(self.buckets) > self.max_buckets:
+            self._collapse()
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantiles(self, qs: Iterable[float] = DEFAULT_QUANTILES) -> Dict[float, Optional[float]]:
+        """Estimates for several quantiles in one pass over the buckets"""
+        targets = sorted(qs)
+        if not self.count:
+            return {q: None for q in targets}
+        estimates: Dict[float, Optional[float]] = {}
+        i, seen = 0, 0
+        buckets = [(None, self.zero_count), *sorted(self.buckets.items())]
+        for key, count in buckets:
+            seen += count
+            while i < len(targets) and seen > targets[i] * (self.count - 1):
+                estimates[targets[i]] = self._bucket_value(key)
+                i += 1
+            if i == len(targets):
+                break
+        for q in targets[i:]:
+            estimates[q] = self.max
+        return estimates
+
+    def _bucket_value(self, key: Optional[int]) -> float:
+        """Representative value of a bucket, clamped to the observed range"""
+        if key is None:
+            return max(self.min, 0.0)
+        value = 2 * self.gamma ** key / (self.gamma + 1)
+        return min(max(value, self.min), self.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate of the q-quantile (0 <= q <= 1), None when empty"""
+        return self.quantiles((q,))[q]
+
+
+def latency_summary(sketch: QuantileSketch, qs: Tuple[float, ...] = DEFAULT_QUANTILES) -> Dict[str, Optional[float]]:
+    """Mean and percentiles of a sketch, e.g. {"mean": 12.5, "p50": 11.0, "p95": 30.2, "p99": 41.8}"""
+    summary = {"mean": round(sketch.sum / sketch.count, 3) if sketch.count else None}
+    for q, value in sketch.quantiles(qs).items():
+        summary[f"p{round(q * 100):g}"] = None if value is None else round(value, 3)
+    return summary
+
+
+class LatencyStats:
+    """Count, success rate and latency percentiles of one kind of operation"""
+
+    __slots__ = ("count", "successes", "latency")
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.count = 0
+        self.successes = 0
+        self.latency = QuantileSketch(relative_accuracy)
+
+    def record(self, latency_ms: Optional[float], success: bool = True):
+        self.count += 1
+        if success:
+            self.successes += 1
+        if latency_ms is not None:
+            self.latency.add(latency_ms)
+
+    def summary(self, qs: Tuple[float, ...] = DEFAULT_QUANTILES) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "success_rate": self.successes / self.count if self.count else 0.0,
+            "latency_ms": latency_summary(self.latency, qs),
+        }
@@ -0,0 +1,191 @@
+"""
+Result set encodings: row-oriented JSON, columnar JSON, MessagePack and Arrow IPC
+
+Row-oriented JSON repeats every column name in every row. The columnar
+layout sends column metadata once followed by one array per column, and
+carries display formatting (e.g. INR currency) in that metadata instead of
+adding a formatted copy of each value. MessagePack and Arrow encode the
+same columnar payload; their libraries are optional and only imported
+when those formats are requested.
+"""
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+ROWS = "rows"
+COLUMNAR = "columnar"
+MSGPACK = "msgpack"
+ARROW = "arrow"
+RESPONSE_FORMATS = (ROWS, COLUMNAR, MSGPACK, ARROW)
+
+MEDIA_TYPES = {
+    ROWS: "application/json",
+    COLUMNAR: "application/json",
+    MSGPACK: "application/msgpack",
+    ARROW: "application/vnd.apache.arrow.stream",
+}
+_ACCEPT_FORMATS = {
+    "application/msgpack": MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    "application/vnd.apache.arrow.stream": ARROW,
+}
+_OPTIONAL_MODULES = {MSGPACK: "msgpack", ARROW: "pyarrow"}
+
+CURRENCY_FORMAT = {"format": "currency", "currency": "INR", "symbol": "₹", "decimals": 2}
+
+
+class FormatUnavailableError(Exception):
+    """Raised when a response format's optional library is not installed"""
+    pass
+
+
+def is_currency_column(name: str) -> bool:
+    """Whether a result column holds INR amounts"""
+    return name.endswith('_inr') or name.endswith('_price') or 'amount' in name.lower()
+
+
+_VALUE_TYPES = {
+    int: "integer", float: "real", bool: "boolean", str: "text",
+    bytes: "blob", bytearray: "blob", type(None): None,
+}
+
+
+def column_metadata(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Name, type and display format of each result column
+
+    Types are classified over every value of the column (NULLs ignored); a
+    column that mixes integers and reals is real, any other mix is text.
+    """
+    if not rows:
+        return []
+    names = list(rows[0])
+    columns = []
+    for name, values in zip(names, to_columns(rows, names)):
+        types = {_VALUE_TYPES.get(value_type, "text") for value_type in set(map(type, values))}
+        types.discard(None)
+        if not types:
+            column_type = "null"
+        elif len(types) == 1:
+            column_type = types.pop()
+        else:
+            column_type = "real" if types == {"integer", "real"} else "text"
+        column = {"name": name, "type": column_type}
+        if column_type in ("integer", "real") and is_currency_column(name):
+            column.update(CURRENCY_FORMAT)
+        columns.append(column)
+    return columns
+
+
+def to_columns(rows: List[Dict[str, Any]], names: List[str]) -> List[List[Any]]:
+    """Transpose result rows into one value array per column"""
+    return [[row[name] for row in rows] for name in names]
+
+
+def columnar_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a response payload from row-oriented to columnar ``data``
+
+    ``columns`` is computed from the rows when the payload does not carry it.
+    """
+    rows = payload.get("data") or []
+    columns = payload.get("columns") or column_metadata(rows)
+    return {
+        **payload,
+        "format": COLUMNAR,
+        "columns": columns,
+        "data": to_columns(rows, [column["name"] for column in columns]),
+    }
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str] = None) -> str:
+    """
+    Pick the response format from the request body, then the Accept header
+
+    Raises:
+        ValueError: for an unknown format name
+    """
+    if requested:
+        requested = requested.lower()
+        if requested not in RESPONSE_FORMATS:
+            raise ValueError(f"Unknown response format '{requested}', expected one of {', '.join(RESPONSE_FORMATS)}")
+        return requested
+    for media_type in (accept or "").split(","):
+        fmt = _ACCEPT_FORMATS.get(media_type.split(";")[0].strip().lower())
+        if fmt:
+            return fmt
+    return ROWS
+
+
+def format_available(fmt: str) -> bool:
+    """Whether the optional library for a format is installed"""
+    module = _OPTIONAL_MODULES.get(fmt)
+    if module is None:
+        return True
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def encode_msgpack(payload: Dict[str, Any]) -> bytes:
+    """Encode a columnar payload as MessagePack"""
+    try:
+        import msgpack
+    except ImportError:
+        raise FormatUnavailableError("msgpack format requires the 'msgpack' package")
+    return msgpack.packb(payload, use_bin_type=True, default=str)
+
+
+def encode_arrow(payload: Dict[str, Any]) -> bytes:
+    """
+    Encode a columnar payload as an Arrow IPC stream
+
+    Result columns become record batch columns with their display format as
+    field metadata; the remaining response fields are stored as JSON under
+    the ``text2sql`` schema metadata key.
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise FormatUnavailableError("arrow format requires the 'pyarrow' package")
+
+    arrow_types = {"integer": pa.int64(), "real": pa.float64(), "boolean": pa.bool_(),
+                   "blob": pa.binary(), "text": pa.string(), "null": pa.null()}
+    fields, arrays = [], []
+    for column, values in zip(payload["columns"], payload["data"]):
+        metadata = {key: str(value) for key, value in column.items() if key not in ("name", "type")}
+        arrow_type = arrow_types.get(column["type"], pa.string())
+        if column["type"] == "text":
+            values = [None if value is None else str(value) for value in values]
+        fields.append(pa.field(column["name"], arrow_type, metadata=metadata or None))
+        arrays.append(pa.array(values, type=arrow_type))
+
+    extra = {key: value for key, value in payload.items() if key not in ("data", "columns")}
+    schema = pa.schema(fields, metadata={"text2sql": json.dumps(extra, default=str)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    return sink.getvalue().to_pybytes()
+
+
+def encode_payload(payload: Dict[str, Any], fmt: str) -> Tuple[bytes, str]:
+    """
+    Serialize a response payload (as produced by ``model_dump``) in a format
+
+    Returns:
+        Tuple of (body, media type)
+    """
+    if fmt == ROWS:
+        body = json.dumps(payload, default=str, ensure_ascii=False).encode("utf-8")
+    else:
+        payload = columnar_payload(payload)
+        if fmt == COLUMNAR:
+            body = json.dumps(payload, default=str, ensure_ascii=False).encode("utf-8")
+        elif fmt == MSGPACK:
+            body = encode_msgpack(payload)
+        elif fmt == ARROW:
+            body = encode_arrow(payload)
+        else:
+            raise ValueError(f"Unknown response format '{fmt}'")
+    return body, MEDIA_TYPES[fmt]
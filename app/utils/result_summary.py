@@ -0,0 +1,77 @@
+"""
+Summary statistics over full result columns, computed in bulk with NumPy
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.utils.result_formats import column_metadata, to_columns
+
+PERCENTILES = (50, 90, 99)
+NUMERIC_TYPES = ("integer", "real")
+
+
+def numeric_statistics(values: List[Any]) -> Optional[Dict[str, Any]]:
+    """
+    Null count, min, max, mean, sum and percentiles of a numeric column
+
+    Returns None when the column holds non-numeric values.
+    """
+    try:
+        array = np.array(values, dtype=np.float64)  # None becomes NaN
+    except (TypeError, ValueError):
+        return None
+    nulls = np.isnan(array)
+    valid = array[~nulls]
+    stats: Dict[str, Any] = {"null_count": int(nulls.sum())}
+    if valid.size:
+        percentiles = np.percentile(valid, PERCENTILES)
+        stats.update({
+            "min": float(valid.min()),
+            "max": float(valid.max()),
+            "mean": float(valid.mean()),
+            "sum": float(valid.sum()),
+            "percentiles": {f"p{p}": float(value) for p, value in zip(PERCENTILES, percentiles)},
+        })
+    return stats
+
+
+def summarize_results(rows: List[Dict[str, Any]], columns: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Column types and statistics for a result set
+
+    Columns are classified once over all rows (not just the first), then
+    each numeric or currency column is reduced with NumPy. Text columns get
+    null and distinct counts.
+    """
+    if not rows:
+        return {"row_count": 0, "columns": [], "has_numeric_data": False,
+                "numeric_columns": [], "currency_columns": [], "statistics": {}}
+
+    columns = columns or column_metadata(rows)
+    names = [column["name"] for column in columns]
+    numeric_columns, currency_columns, statistics = [], [], {}
+    for column, values in zip(columns, to_columns(rows, names)):
+        name = column["name"]
+        stats = numeric_statistics(values) if column["type"] in NUMERIC_TYPES else None
+        if stats is not None:
+            numeric_columns.append(name)
+            if column.get("format") == "currency":
+                currency_columns.append(name)
+        else:
+            present = [value for value in values if value is not None]
+            try:
+                distinct = len(set(present))
+            except TypeError:
+                distinct = None
+            stats = {"null_count": len(values) - len(present), "distinct": distinct}
+        statistics[name] = {"type": column["type"], **stats}
+
+    return {
+        "row_count": len(rows),
+        "columns": names,
+        "has_numeric_data": bool(numeric_columns),
+        "numeric_columns": numeric_columns,
+        "currency_columns": currency_columns,
+        "statistics": statistics,
+    }
@@ -0,0 +1,56 @@
+"""
+Single-flight coalescing of identical in-flight async calls
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time
+
+    The first caller for a key (the leader) starts the work as a task;
+    concurrent callers with the same key await that same task instead of
+    starting their own. The task is shielded, so a cancelled caller does
+    not cancel the shared work for the others.
+    """
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, or join the in-flight call for the same key"""
+        task = self._in_flight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.leaders += 1
+        task = asyncio.ensure_future(fn())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception retrieved when every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being computed"""
+        return len(self._in_flight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing counters"""
+        total = self.leaders + self.coalesced
+        return {
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+            "coalesce_rate": self.coalesced / total if total else 0.0,
+        }
@@ -0,0 +1,331 @@
+"""
+Parsed-SQL analysis: structural facts about a statement, computed once and memoized
+"""
+import hashlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.lru import LRUCache
+from app.utils.sql_lexer import (
+    NUMBER, OP, QUOTED, STRING, WORD, SQLLexError, Token, tokenize, unquote_identifier
+)
+
+AGGREGATE_FUNCTIONS = frozenset({'SUM', 'COUNT', 'AVG', 'MAX', 'MIN', 'TOTAL', 'GROUP_CONCAT'})
+
+# Keywords that may be followed by '(' without being a function call
+NON_FUNCTION_KEYWORDS = frozenset({
+    'SELECT', 'FROM', 'WHERE', 'GROUP', 'ORDER', 'HAVING', 'LIMIT', 'OFFSET', 'BY',
+    'IN', 'EXISTS', 'AND', 'OR', 'NOT', 'ON', 'USING', 'AS', 'JOIN', 'CASE', 'WHEN',
+    'THEN', 'ELSE', 'END', 'IS', 'LIKE', 'BETWEEN', 'DISTINCT', 'ALL', 'OVER', 'FILTER'
+})
+
+LITERAL_KINDS = frozenset({STRING, NUMBER})
+
+# Functions and keywords whose value changes between executions
+NON_DETERMINISTIC_FUNCTIONS = frozenset({'RANDOM', 'RANDOMBLOB', 'CHANGES', 'TOTAL_CHANGES', 'LAST_INSERT_ROWID'})
+CLOCK_KEYWORDS = frozenset({'CURRENT_TIMESTAMP', 'CURRENT_DATE', 'CURRENT_TIME'})
+# Date functions read the clock for 'now' or when called without arguments
+DATE_FUNCTIONS = frozenset({'DATE', 'TIME', 'DATETIME', 'JULIANDAY', 'STRFTIME', 'UNIXEPOCH', 'TIMEDIFF'})
+
+# Keywords that end a FROM clause's table list
+_FROM_CLAUSE_END = frozenset({
+    'WHERE', 'GROUP', 'ORDER', 'HAVING', 'LIMIT', 'UNION', 'EXCEPT', 'INTERSECT', 'ON', 'USING', 'WINDOW'
+})
+_JOIN_MODIFIERS = frozenset({'LEFT', 'RIGHT', 'FULL', 'INNER', 'OUTER', 'CROSS', 'NATURAL'})
+_NOT_ALIASES = _FROM_CLAUSE_END | _JOIN_MODIFIERS | {'JOIN', 'INDEXED', 'NOT'}
+
+
+@dataclass
+class SQLAnalysis:
+    """Structural facts about one SQL statement"""
+    sql: str
+    fingerprint: str
+    tokens: Tuple[Token, ...] = ()
+    error: Optional[str] = None
+    statement_type: Optional[str] = None
+    statement_count: int = 0
+    words: Tuple[str, ...] = ()
+    tables: Tuple[str, ...] = ()
+    aliases: Dict[str, str] = field(default_factory=dict)
+    join_count: int = 0
+    cross_join: bool = False
+    functions: Tuple[str, ...] = ()
+    aggregates: Tuple[str, ...] = ()
+    outer_aggregates: Tuple[str, ...] = ()   # aggregates outside subqueries
+    has_where: bool = False
+    has_group_by: bool = False
+    outer_group_by: bool = False             # GROUP BY outside subqueries
+    has_having: bool = False
+    has_order_by: bool = False
+    has_distinct: bool = False
+    has_union: bool = False
+    limit: Optional[int] = None
+    subquery_count: int = 0
+    max_subquery_depth: int = 0
+    literals: Tuple[Token, ...] = ()
+    constant_comparisons: int = 0
+    reads_clock: bool = False
+    # Outer SELECT list as (qualifier, column, alias); column is '*' for a
+    # wildcard and None for an expression
+    select_items: Tuple[Tuple[Optional[str], Optional[str], Optional[str]], ...] = ()
+    # Outer ORDER BY as (qualifier, column, 'ASC' | 'DESC'); column is None
+    # for anything but a plain column reference
+    order_by: Tuple[Tuple[Optional[str], Optional[str], str], ...] = ()
+
+    @property
+    def is_valid(self) -> bool:
+        return self.error is None and bool(self.tokens)
+
+    @property
+    def is_select(self) -> bool:
+        return self.statement_type == 'SELECT'
+
+    @property
+    def is_deterministic(self) -> bool:
+        """Whether re-running the statement on unchanged data gives the same result"""
+        return not self.reads_clock and NON_DETERMINISTIC_FUNCTIONS.isdisjoint(self.functions)
+
+
+def statement_fingerprint(sql: str) -> str:
+    """Hash of the exact statement text"""
+    return hashlib.sha1(sql.encode("utf-8")).hexdigest()
+
+
+def _record_table(analysis: SQLAnalysis, tokens: Tuple[Token, ...], i: int, tables: Dict[str, None]) -> None:
+    """Record the table named at tokens[i] (schema-qualified names keep the table part) and its alias"""
+    last_index = len(tokens) - 1
+    if i + 2 <= last_index and tokens[i + 1].value == '.':
+        i += 2
+    name = unquote_identifier(tokens[i]).lower()
+    tables.setdefault(name)
+
+    j = i + 1
+    if j <= last_index and tokens[j].upper == 'AS':
+        j += 1
+    if j <= last_index and tokens[j].kind in (WORD, QUOTED):
+        candidate = tokens[j]
+        if candidate.kind == QUOTED or candidate.upper not in _NOT_ALIASES:
+            analysis.aliases[unquote_identifier(candidate).lower()] = name
+
+
+def _split_terms(tokens: Tuple[Token, ...]) -> List[Tuple[Token, ...]]:
+    """Split a clause at its top-level commas"""
+    terms, depth, start = [], 0, 0
+    for i, token in enumerate(tokens):
+        if token.value == '(':
+            depth += 1
+        elif token.value == ')':
+            depth -= 1
+        elif token.value == ',' and depth == 0:
+            terms.append(tokens[start:i])
+            start = i + 1
+    terms.append(tokens[start:])
+    return [term for term in terms if term]
+
+
+def _column_ref(term: Tuple[Token, ...]) -> Optional[Tuple[Optional[str], str]]:
+    """(qualifier, column) for a plain [qualifier.]column or [qualifier.]* reference"""
+    def name(token: Token) -> Optional[str]:
+        if token.kind in (WORD, QUOTED):
+            return unquote_identifier(token).lower()
+        return '*' if token.value == '*' else None
+
+    if len(term) == 1:
+        column = name(term[0])
+        return (None, column) if column else None
+    if len(term) == 3 and term[1].value == '.' and term[0].kind in (WORD, QUOTED):
+        column = name(term[2])
+        return (unquote_identifier(term[0]).lower(), column) if column else None
+    return None
+
+
+def _outer_clauses(analysis: SQLAnalysis) -> None:
+    """Record the outer SELECT list and ORDER BY terms"""
+    tokens = analysis.tokens
+    depth, select_start, select_end, order_start, order_end = 0, None, None, None, len(tokens)
+    for i, token in enumerate(tokens):
+        if token.value == '(':
+            depth += 1
+        elif token.value == ')':
+            depth -= 1
+        elif depth == 0 and token.kind == WORD:
+            if token.upper == 'SELECT' and select_start is None:
+                select_start = i + 1
+            elif token.upper == 'FROM' and select_end is None:
+                select_end = i
+            elif token.upper == 'BY' and i and tokens[i - 1].upper == 'ORDER':
+                order_start, order_end = i + 1, len(tokens)
+            elif token.upper == 'LIMIT' and order_start is not None:
+                order_end = i
+
+    if select_start is not None:
+        select_list = tokens[select_start:select_end]
+        if select_list and select_list[0].upper in ('DISTINCT', 'ALL'):
+            select_list = select_list[1:]
+        items = []
+        for term in _split_terms(select_list):
+            alias = None
+            if len(term) >= 3 and term[-2].upper == 'AS':
+                alias, term = unquote_identifier(term[-1]).lower(), term[:-2]
+            elif (len(term) >= 2 and term[-1].kind in (WORD, QUOTED) and term[-2].value != '.'
+                    and term[-1].upper != 'END'):
+                alias, term = unquote_identifier(term[-1]).lower(), term[:-1]
+            ref = _column_ref(term)
+            items.append((ref[0], ref[1], alias) if ref else (None, None, alias))
+        analysis.select_items = tuple(items)
+
+    if order_start is not None:
+        terms = []
+        for term in _split_terms(tokens[order_start:order_end]):
+            direction = 'ASC'
+            if term[-1].upper in ('ASC', 'DESC'):
+                direction, term = term[-1].upper, term[:-1]
+            ref = _column_ref(term)
+            terms.append((ref[0], ref[1], direction) if ref and ref[1] != '*' else (None, None, direction))
+        analysis.order_by = tuple(terms)
+
+
+def _analyze(sql: str) -> SQLAnalysis:
+    analysis = SQLAnalysis(sql=sql, fingerprint=statement_fingerprint(sql))
+    try:
+        tokens = tokenize(sql)
+    except SQLLexError as e:
+        analysis.error = str(e)
+        return analysis
+
+    # Trailing semicolons terminate the statement; any other ';' starts a new one
+    end = len(tokens)
+    while end and tokens[end - 1].value == ';':
+        end -= 1
+    analysis.tokens = tuple(tokens[:end])
+    tokens = analysis.tokens
+    if not tokens:
+        return analysis
+    analysis.statement_type = tokens[0].upper if tokens[0].kind == WORD else None
+    analysis.statement_count = 1
+
+    words: Dict[str, None] = {}
+    tables: Dict[str, None] = {}
+    functions: Dict[str, None] = {}
+    outer_functions: Dict[str, None] = {}
+    literals: List[Token] = []
+    # One entry per open parenthesis: whether it opened a subquery
+    paren_stack: List[bool] = []
+    subquery_depth = 0
+    from_depth: Optional[int] = None   # paren depth of the FROM clause being read
+    expect_table = False
+    after_logical_operator = False
+    previous: Optional[Token] = None
+    last_index = len(tokens) - 1
+
+    for i, token in enumerate(tokens):
+        kind, upper, value = token.kind, token.upper, token.value
+        following = tokens[i + 1] if i < last_index else None
+
+        if kind == WORD:
+            words.setdefault(upper)
+            if upper == 'SELECT' and previous is not None and previous.value == '(':
+                analysis.subquery_count += 1
+            elif upper == 'FROM':
+                from_depth, expect_table = len(paren_stack), True
+            elif upper == 'JOIN':
+                analysis.join_count += 1
+                analysis.cross_join = analysis.cross_join or (previous is not None and previous.upper == 'CROSS')
+                from_depth, expect_table = len(paren_stack), True
+            elif upper == 'WHERE':
+                analysis.has_where = True
+            elif upper == 'BY' and previous is not None and previous.upper in ('GROUP', 'ORDER'):
+                if previous.upper == 'GROUP':
+                    analysis.has_group_by = True
+                    analysis.outer_group_by = analysis.outer_group_by or subquery_depth == 0
+                else:
+                    analysis.has_order_by = True
+            elif upper == 'HAVING':
+                analysis.has_having = True
+            elif upper == 'DISTINCT':
+                analysis.has_distinct = True
+            elif upper == 'UNION':
+                analysis.has_union = True
+            elif upper in ('OR', 'AND'):
+                after_logical_operator = True
+            elif upper == 'LIMIT' and not paren_stack and following is not None and following.kind == NUMBER:
+                try:
+                    analysis.limit = int(following.value)
+                except ValueError:
+                    pass
+
+            if upper in _FROM_CLAUSE_END and from_depth == len(paren_stack):
+                from_depth, expect_table = None, False
+
+        # A quoted identifier in call position is still a function call
+        if following is not None and following.value == '(' and kind in (WORD, QUOTED):
+            name = upper if kind == WORD else unquote_identifier(token).upper()
+            if kind == QUOTED or name not in NON_FUNCTION_KEYWORDS:
+                functions.setdefault(name)
+                if subquery_depth == 0:
+                    outer_functions.setdefault(name)
+                if name in DATE_FUNCTIONS and i + 2 <= last_index and tokens[i + 2].value == ')':
+                    analysis.reads_clock = True
+
+        if kind in (WORD, QUOTED) and expect_table and upper not in ('FROM', 'JOIN'):
+            if not (following is not None and following.value == '('):
+                _record_table(analysis, tokens, i, tables)
+            expect_table = False
+
+        if kind in LITERAL_KINDS:
+            literals.append(token)
+            if kind == STRING and value.lower() == "'now'":
+                analysis.reads_clock = True
+        elif kind == OP:
+            if value == '(':
+                expect_table = False
+                opens_subquery = following is not None and following.upper == 'SELECT'
+                paren_stack.append(opens_subquery)
+                if opens_subquery:
+                    subquery_depth += 1
+                    analysis.max_subquery_depth = max(analysis.max_subquery_depth, subquery_depth)
+            elif value == ')':
+                if paren_stack and paren_stack.pop():
+                    subquery_depth -= 1
+                if from_depth is not None and len(paren_stack) < from_depth:
+                    from_depth, expect_table = None, False
+            elif value == ',':
+                if from_depth == len(paren_stack):
+                    expect_table = True
+            elif value == ';':
+                analysis.statement_count += 1
+            elif (value in ('=', '==') and after_logical_operator and previous is not None
+                    and previous.kind in LITERAL_KINDS and following is not None
+                    and following.kind in LITERAL_KINDS):
+                analysis.constant_comparisons += 1
+
+        previous = token
+
+    analysis.words = tuple(words)
+    analysis.reads_clock = analysis.reads_clock or not CLOCK_KEYWORDS.isdisjoint(words)
+    analysis.tables = tuple(tables)
+    analysis.functions = tuple(functions)
+    analysis.aggregates = tuple(f for f in functions if f in AGGREGATE_FUNCTIONS)
+    analysis.outer_aggregates = tuple(f for f in outer_functions if f in AGGREGATE_FUNCTIONS)
+    analysis.literals = tuple(literals)
+    if analysis.is_select:
+        _outer_clauses(analysis)
+    return analysis
+
+
+_cache = LRUCache(maxsize=2048)
+
+
+def analyze_sql(sql: str) -> SQLAnalysis:
+    """Return the (memoized) analysis of a SQL statement"""
+    fingerprint = statement_fingerprint(sql)
+    analysis = _cache.get(fingerprint)
+    if analysis is None:
+        analysis = _analyze(sql)
+        _cache.set(fingerprint, analysis)
+    return analysis
+
+
+def get_analysis_cache_stats() -> Dict[str, object]:
+    """Get memoization statistics"""
+    return _cache.get_stats()
@@ -0,0 +1,111 @@
+"""
+SQL lexer: turn a SQL string into a token stream in one linear pass
+"""
+import re
+from typing import List, NamedTuple
+
+# Token kinds
+WORD = "word"                # keyword or bare identifier
+QUOTED = "quoted"            # "identifier", `identifier` or [identifier]
+STRING = "string"            # 'literal' with '' escapes
+NUMBER = "number"
+PARAM = "param"              # ?, ?1, :name, @name, $name
+OP = "op"                    # operators and punctuation
+COMMENT = "comment"          # -- line or /* block */ comment
+
+# Every alternative is free of nested quantifiers (quoted literals use the
+# unrolled-loop form), so matching never backtracks and the scan is linear.
+# The final catch-all alternatives make the token stream gap-free.
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*(?:[^*]|\*(?!/))*\*/)
+  | (?P<string>'[^']*(?:''[^']*)*')
+  | (?P<quoted>"[^"]*(?:""[^"]*)*"|`[^`]*(?:``[^`]*)*`|\[[^\]]*\])
+  | (?P<number>(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<param>\?\d*|[:@$][A-Za-z_][A-Za-z0-9_]*)
+  | (?P<unterminated>['"`\[]|/\*)
+  | (?P<op><>|<=|>=|!=|==|\|\||<<|>>|[-+*/%=<>(),.;&|~])
+  | (?P<error>.)
+""", re.VERBOSE | re.DOTALL)
+
+
+class SQLLexError(ValueError):
+    """Raised for input that cannot be tokenized"""
+
+    def __init__(self, message: str, position: int):
+        self.position = position
+        super().__init__(f"{message} at position {position}")
+
+
+class Token(NamedTuple):
+    """A lexical token; ``upper`` is the uppercased text of words, else the raw text"""
+    kind: str
+    value: str
+    upper: str
+    start: int
+    end: int
+
+
+def tokenize(sql: str, keep_comments: bool = False) -> List[Token]:
+    """
+    Split SQL into tokens, skipping whitespace (and comments unless keep_comments)
+
+    Raises:
+        SQLLexError: on unterminated literals/comments or unexpected characters
+    """
+    tokens: List[Token] = []
+    append = tokens.append
+    for match in _TOKEN_RE.finditer(sql):
+        kind = match.lastgroup
+        if kind == "ws":
+            continue
+        if kind == COMMENT and not keep_comments:
+            continue
+        if kind == "unterminated":
+            raise SQLLexError(f"Unterminated {_UNTERMINATED[match.group()]}", match.start())
+        if kind == "error":
+            raise SQLLexError(f"Unexpected character {match.group()!r}", match.start())
+        value = match.group()
+        append(Token(kind, value, value.upper() if kind == WORD else value, match.start(), match.end()))
+    return tokens
+
+
+_UNTERMINATED = {
+    "'": "string literal",
+    '"': "quoted identifier",
+    "`": "quoted identifier",
+    "[": "quoted identifier",
+    "/*": "block comment",
+}
+
+
+def strip_comments(sql: str) -> str:
+    """
+    Return SQL without comments, extra whitespace or trailing semicolons
+
+    Literals and quoted identifiers are kept byte for byte.
+    """
+    tokens = tokenize(sql)
+    while tokens and tokens[-1].value == ";":
+        tokens.pop()
+    parts = []
+    previous_end = None
+    for token in tokens:
+        # Anything between two tokens (whitespace or a comment) becomes one space
+        if previous_end is not None and token.start > previous_end:
+            parts.append(" ")
+        parts.append(token.value)
+        previous_end = token.end
+    return "".join(parts)
+
+
+def unquote_identifier(token: Token) -> str:
+    """Identifier text of a word or quoted-identifier token"""
+    if token.kind != QUOTED:
+        return token.value
+    quote = token.value[0]
+    inner = token.value[1:-1]
+    if quote == "[":
+        return inner
+    return inner.replace(quote * 2, quote)
@@ -0,0 +1,140 @@
+"""
+Statement templates: literals lifted out of SELECTs into bound parameters
+
+Generated SQL embeds its literals (``WHERE city = 'Mumbai' LIMIT 5``), so
+each variation is a new statement to SQLite and misses the connection's
+prepared-statement cache. Parameterizing gives every query of the same
+shape one template text, which SQLite prepares once per connection, and a
+stable fingerprint to aggregate statistics on.
+"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.lru import LRUCache
+from app.utils.sql_analysis import SQLAnalysis, statement_fingerprint
+from app.utils.sql_lexer import NUMBER, PARAM, STRING, WORD
+
+# Literals in these clauses stay inline: ORDER BY / GROUP BY numbers are
+# column ordinals, select-list text names unaliased result columns, and
+# window frames take constants
+_INLINE_CLAUSES = frozenset({'SELECT', 'ORDER', 'GROUP', 'OVER', 'WINDOW'})
+_CLAUSE_KEYWORDS = frozenset({
+    'SELECT', 'FROM', 'WHERE', 'GROUP', 'HAVING', 'ORDER', 'LIMIT', 'OFFSET',
+    'JOIN', 'ON', 'USING', 'OVER', 'WINDOW', 'UNION', 'EXCEPT', 'INTERSECT', 'VALUES'
+})
+_LITERAL_KINDS = frozenset({STRING, NUMBER})
+_MAX_INTEGER = 2 ** 63 - 1
+TEMPLATE_PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class SQLTemplate:
+    """A parameterized statement and the literal values bound to it"""
+    sql: str
+    params: Tuple[Any, ...]
+    fingerprint: str
+
+
+def _literal_value(token) -> Optional[Any]:
+    """Python value of a literal token; None if it must stay inline"""
+    text = token.value
+    if token.kind == STRING:
+        return text[1:-1].replace("''", "'")
+    if '.' in text or 'e' in text or 'E' in text:
+        return float(text)
+    value = int(text)
+    return value if value <= _MAX_INTEGER else None  # SQLite reads larger literals as REAL
+
+
+def parameterize(analysis: SQLAnalysis) -> Optional[SQLTemplate]:
+    """
+    Template for a validated SELECT; None for other statements
+
+    String and numeric literals become ``?`` parameters except in select
+    lists, ORDER BY, GROUP BY and window definitions (see _INLINE_CLAUSES).
+    Statements that already use parameters are not templated. The template
+    text is rebuilt from tokens with comments and extra whitespace removed,
+    so equivalent statements share one template.
+    """
+    if not analysis.is_valid or not analysis.is_select or analysis.statement_count != 1:
+        return None
+
+    clauses: List[Optional[str]] = [None]   # clause being read, per parenthesis depth
+    clause = None
+    parts: List[str] = []
+    params: List[Any] = []
+    append = parts.append
+    previous_end = -1
+    for token in analysis.tokens:
+        kind, text, upper, start, end = token
+        if kind == WORD:
+            if upper in _CLAUSE_KEYWORDS:
+                clause = clauses[-1] = upper
+        elif kind in _LITERAL_KINDS:
+            if clause not in _INLINE_CLAUSES:
+                value = _literal_value(token)
+                if value is not None:
+                    params.append(value)
+                    text = '?'
+        elif text == '(':
+            clauses.append(clause)   # expressions inherit their clause; a subquery resets it
+        elif text == ')':
+            if len(clauses) > 1:
+                clauses.pop()
+                clause = clauses[-1]
+        elif kind == PARAM:
+            return None
+
+        if start > previous_end > -1:
+            append(' ')
+        append(text)
+        previous_end = end
+
+    sql = ''.join(parts)
+    return SQLTemplate(sql, tuple(params), statement_fingerprint(sql))
+
+
+class TemplateStats:
+    """
+    Execution counts and latency percentiles per statement template
+
+    Keeps the most recently used ``max_templates`` templates and the last
+    ``samples`` latencies of each.
+    """
+
+    def __init__(self, max_templates: int = 256, samples: int = 256):
+        self.templates = LRUCache(maxsize=max_templates)
+        self.samples = samples
+
+    def record(self, template: SQLTemplate, elapsed_ms: float, success: bool = True) -> None:
+        entry = self.templates.get(template.fingerprint)
+        if entry is None:
+            entry = {"template": template.sql, "executions": 0, "failures": 0,
+                     "latencies_ms": deque(maxlen=self.samples)}
+            self.templates.set(template.fingerprint, entry)
+        entry["executions"] += 1
+        if not success:
+            entry["failures"] += 1
+        entry["latencies_ms"].append(elapsed_ms)
+
+    def report(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Templates by execution count, with latency percentiles over recent executions"""
+        entries = sorted(
+            ((fingerprint, entry) for fingerprint, entry in self.templates.items()),
+            key=lambda item: item[1]["executions"], reverse=True
+        )[:limit]
+        report = []
+        for fingerprint, entry in entries:
+            latencies: Deque[float] = entry["latencies_ms"]
+            percentiles = np.percentile(np.fromiter(latencies, dtype=np.float64), TEMPLATE_PERCENTILES)
+            report.append({
+                "fingerprint": fingerprint,
+                "template": entry["template"],
+                "executions": entry["executions"],
+                "failures": entry["failures"],
+                "latency_ms": {f"p{p}": round(float(value), 3) for p, value in zip(TEMPLATE_PERCENTILES, percentiles)},
+            })
+        return report
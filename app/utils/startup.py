@@ -0,0 +1,45 @@
+"""
+Startup timing report
+"""
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+
+class StartupTimer:
+    """Record how long each startup phase takes"""
+
+    def __init__(self):
+        self.created_at = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+
+    def record(self, name: str, duration_ms: float):
+        """Record a phase measured elsewhere"""
+        self.phases.append((name, duration_ms))
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as a startup phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def report(self) -> Dict[str, Any]:
+        """Get the phase timings in milliseconds"""
+        return {
+            "phases": {name: round(duration, 2) for name, duration in self.phases},
+            "total_ms": round(sum(duration for _, duration in self.phases), 2),
+        }
+
+    def print_report(self):
+        """Print the startup timing report"""
+        report = self.report()
+        print(f"⏱️ Startup completed in {report['total_ms']:.1f} ms")
+        for name, duration in report["phases"].items():
+            print(f"   - {name}: {duration:.1f} ms")
+
+
+# Global startup timer instance
+startup_timer = StartupTimer()
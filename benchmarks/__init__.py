@@ -0,0 +1,3 @@
+"""
+Performance benchmarks for Text2SQL Assistant
+"""
@@ -0,0 +1,78 @@
+"""
+Benchmark: per-query aiosqlite connections vs the connection pool
+
+Runs the same point lookup through a fresh ``aiosqlite.connect`` per query
+(the old ``get_connection`` behaviour) and through ``ConnectionPool`` at
+several concurrency levels, on a temporary copy of the seeded database.
+
+Usage:
+    python -m benchmarks.bench_db_pool [--requests 2000] [--pool-size 8]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+
+from app.database.connection import DatabaseManager
+from app.database.pool import ConnectionPool
+
+QUERY = "SELECT customer_id, first_name, city FROM customers WHERE customer_id = ?"
+
+
+async def run_connect_per_query(db_path: str, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(i: int):
+        async with semaphore:
+            async with aiosqlite.connect(db_path) as db:
+                db.row_factory = aiosqlite.Row
+                cursor = await db.execute(QUERY, (i % 50 + 1,))
+                await cursor.fetchall()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(requests)))
+    return time.perf_counter() - start
+
+
+async def run_pool(db_path: str, requests: int, concurrency: int, pool_size: int):
+    pool = ConnectionPool(db_path, min_size=pool_size, max_size=pool_size)
+    await pool.initialize()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(i: int):
+        async with semaphore:
+            async with pool.acquire() as db:
+                cursor = await db.execute(QUERY, (i % 50 + 1,))
+                await cursor.fetchall()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    stats = pool.get_stats()
+    await pool.close()
+    return elapsed, stats
+
+
+async def main(requests: int, pool_size: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        DatabaseManager(db_path).initialize_database()
+
+        print(f"\nRequests per run: {requests}, pool size: {pool_size}\n")
+        print(f"{'concurrency':<13}{'connect/query req/s':>21}{'pool req/s':>12}{'speedup':>9}{'avg wait ms':>13}")
+        for concurrency in (1, 8, 32, 128):
+            baseline = await run_connect_per_query(db_path, requests, concurrency)
+            pooled, stats = await run_pool(db_path, requests, concurrency, pool_size)
+            print(f"{concurrency:<13}{requests / baseline:>21.0f}{requests / pooled:>12.0f}"
+                  f"{baseline / pooled:>9.1f}{stats['average_wait_ms']:>13.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.pool_size))
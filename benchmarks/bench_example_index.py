@@ -0,0 +1,80 @@
+"""
+Benchmark: few-shot example retrieval latency
+
+Builds the n-gram index over a synthetic corpus of questions and measures
+build time, incremental add time and top-k query latency.
+
+Usage:
+    python -m benchmarks.bench_example_index [--sizes 1000 10000 50000] [--queries 500]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.services.example_store import NGramIndex
+
+
+CITIES = ["Mumbai", "Delhi", "Bangalore", "Chennai", "Pune", "Kolkata", "Hyderabad", "Jaipur", "Kochi"]
+CATEGORIES = ["Electronics", "Clothing", "Books", "Home & Kitchen", "Toys & Games", "Beauty"]
+STATUSES = ["pending", "processing", "shipped", "delivered", "cancelled"]
+TEMPLATES = [
+    "Show all customers from {city}",
+    "How many customers registered in {city} in {year}?",
+    "Top {n} most expensive {category} products",
+    "List {status} orders placed by customers from {city}",
+    "Total sales by category for {status} orders in {year}",
+    "Average rating of {category} products under {n}000 INR",
+    "Which customers from {city} spent more than {n}0000 INR?",
+    "Products in {category} with stock below {n}",
+]
+
+
+def synthetic_questions(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        rng.choice(TEMPLATES).format(
+            city=rng.choice(CITIES), category=rng.choice(CATEGORIES), status=rng.choice(STATUSES),
+            n=rng.randint(2, 50), year=rng.randint(2019, 2025)
+        ) + f" #{i}"
+        for i in range(count)
+    ]
+
+
+def bench(size: int, queries: int, k: int):
+    corpus = synthetic_questions(size)
+    probes = synthetic_questions(queries, seed=11)
+
+    index = NGramIndex()
+    start = time.perf_counter()
+    for question in corpus:
+        index.add(question)
+    index._merge()
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for question in probes[:100]:
+        index.add(question)
+    add_us = (time.perf_counter() - start) / 100 * 1e6
+
+    latencies = []
+    for question in probes:
+        start = time.perf_counter()
+        index.search(question, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies = np.array(latencies)
+    print(f"{size:>8}{build_s:>10.2f}{add_us:>12.1f}{latencies.mean():>12.3f}"
+          f"{np.percentile(latencies, 50):>10.3f}{np.percentile(latencies, 99):>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'examples':>8}{'build s':>10}{'add us':>12}{'mean ms':>12}{'p50 ms':>10}{'p99 ms':>10}")
+    for size in args.sizes:
+        bench(size, args.queries, args.k)
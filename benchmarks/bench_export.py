@@ -0,0 +1,72 @@
+"""
+Benchmark: streaming export throughput and peak memory by result size
+
+Exports a synthetic orders table of each size through ``ExportService``
+and reports rows per second and the peak Python heap (tracemalloc) while
+streaming. Peak memory should stay flat as the result grows, since only
+one batch is held at a time.
+
+Usage:
+    python -m benchmarks.bench_export [--sizes 10000 100000 1000000] [--format ndjson] [--gzip]
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from app.database.connection import DatabaseManager
+from app.services import export_service as export_module
+from app.services.export_service import ExportService
+
+QUERY = "SELECT order_id, customer_id, status, order_date, total_amount FROM orders"
+
+
+def build_table(manager: DatabaseManager, rows: int):
+    asyncio.run(manager.execute_script(
+        "CREATE TABLE orders (order_id INTEGER PRIMARY KEY, customer_id INTEGER, status TEXT, "
+        "order_date TEXT, total_amount REAL);"
+        f"WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {rows}) "
+        "INSERT INTO orders SELECT i, i % 5000, 'delivered', date('2024-01-01', '+' || (i % 365) || ' days'), "
+        "i % 100000 * 1.25 FROM n;"
+    ))
+
+
+async def export(service: ExportService, fmt: str, compress: bool):
+    body = await service.open_export(QUERY, fmt=fmt, timeout_ms=600000, compress=compress)
+    size = 0
+    async for chunk in body:
+        size += len(chunk)
+    return size
+
+
+def bench(size: int, fmt: str, compress: bool):
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = DatabaseManager(str(Path(tmp) / "export.db"))
+        build_table(manager, size)
+        export_module.db_manager = manager
+        service = ExportService()
+        service.sql.max_query_timeout = 600
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        sent = asyncio.run(export(service, fmt, compress))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        asyncio.run(manager.close())
+
+    print(f"{size:>10}{elapsed:>10.2f}{size / elapsed:>12.0f}{sent / 2**20:>12.1f}{peak / 2**20:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10}{'s':>10}{'rows/s':>12}{'MiB sent':>12}{'peak MiB':>12}")
+    for size in args.sizes:
+        bench(size, args.format, args.gzip)
@@ -0,0 +1,67 @@
+"""
+Benchmark: LLM throughput under concurrent requests
+
+Drives the async LLM client with a local fake model whose synchronous
+``generate_content`` blocks for a fixed latency (like the Gemini SDK does),
+and compares it with calling the model directly on the event loop.
+
+Usage:
+    python -m benchmarks.bench_llm_concurrency [--latency-ms 100] [--requests 64]
+"""
+import argparse
+import asyncio
+import time
+
+from app.services.llm_client import AsyncLLMClient
+
+
+class FakeModel:
+    """Blocking fake model that mimics a slow LLM round trip"""
+
+    def __init__(self, latency_ms: float):
+        self.latency_s = latency_ms / 1000
+
+    def generate_content(self, prompt: str) -> str:
+        time.sleep(self.latency_s)
+        return "SELECT customer_id, first_name FROM customers;"
+
+
+async def run_blocking(model: FakeModel, requests: int) -> float:
+    """Baseline: the old behaviour, calling the model inline on the event loop"""
+    async def call():
+        return model.generate_content("prompt")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    return time.perf_counter() - start
+
+
+async def run_client(model: FakeModel, requests: int, concurrency: int) -> float:
+    client = AsyncLLMClient(model, max_concurrency=concurrency, timeout_seconds=60)
+    start = time.perf_counter()
+    await asyncio.gather(*(client.generate("prompt") for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    client.shutdown()
+    return elapsed
+
+
+async def main(latency_ms: float, requests: int):
+    model = FakeModel(latency_ms)
+    print(f"Fake model latency: {latency_ms:.0f} ms, requests per run: {requests}\n")
+    print(f"{'mode':<22}{'elapsed (s)':>12}{'req/s':>10}{'speedup':>10}")
+
+    baseline = await run_blocking(model, requests)
+    print(f"{'blocking (inline)':<22}{baseline:>12.2f}{requests / baseline:>10.1f}{1.0:>10.1f}")
+
+    for concurrency in (1, 2, 4, 8, 16, 32):
+        elapsed = await run_client(model, requests, concurrency)
+        print(f"{f'async client c={concurrency}':<22}{elapsed:>12.2f}"
+              f"{requests / elapsed:>10.1f}{baseline / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--requests", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(main(args.latency_ms, args.requests))
@@ -0,0 +1,73 @@
+"""
+Benchmark: result serialization time and payload size per response format
+
+Serializes synthetic order rows the way /execute-sql does for each format:
+``rows`` adds a formatted copy of every currency value and repeats column
+names per row; the other formats send column metadata once. Formats whose
+optional library (msgpack, pyarrow) is not installed are skipped.
+
+Usage:
+    python -m benchmarks.bench_response_formats [--sizes 1000 10000 100000] [--repeat 3]
+"""
+import argparse
+import gzip
+import random
+import time
+
+from app.models.schemas import ExecuteSQLResponse
+from app.services.sql_service import sql_service
+from app.utils.result_formats import RESPONSE_FORMATS, ROWS, column_metadata, encode_payload, format_available
+
+STATUSES = ["pending", "processing", "shipped", "delivered", "cancelled"]
+CITIES = ["Mumbai", "Delhi", "Bangalore", "Chennai", "Pune", "Kolkata"]
+
+
+def synthetic_rows(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "order_id": i,
+            "customer_name": f"Customer {rng.randint(1, 5000)}",
+            "city": rng.choice(CITIES),
+            "status": rng.choice(STATUSES),
+            "order_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "total_amount": round(rng.uniform(100, 150000), 2),
+            "discount_amount": round(rng.uniform(0, 5000), 2),
+        }
+        for i in range(count)
+    ]
+
+
+def serialize(rows: list, fmt: str) -> bytes:
+    if fmt == ROWS:
+        response = ExecuteSQLResponse(success=True, data=sql_service.format_sql_results(rows), row_count=len(rows))
+    else:
+        response = ExecuteSQLResponse(success=True, data=rows, row_count=len(rows), columns=column_metadata(rows))
+    body, _ = encode_payload(response.model_dump(), fmt)
+    return body
+
+
+def bench(size: int, repeat: int):
+    rows = synthetic_rows(size)
+    for fmt in RESPONSE_FORMATS:
+        if not format_available(fmt):
+            print(f"{size:>8}  {fmt:<9}{'(not installed)':>12}")
+            continue
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = serialize(rows, fmt)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{size:>8}  {fmt:<9}{min(timings):>12.1f}{len(body) / 1024:>12.1f}"
+              f"{len(gzip.compress(body, 6)) / 1024:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'format':<9}{'ms':>12}{'KiB':>12}{'gzip KiB':>12}")
+    for size in args.sizes:
+        bench(size, args.repeat)
@@ -0,0 +1,75 @@
+"""
+Benchmark: result formatting and summary statistics
+
+Compares the original per-row, per-key formatting loop with the columnar
+``SQLService.format_sql_results`` and times ``summarize_results`` on
+synthetic order rows with two currency columns.
+
+Usage:
+    python -m benchmarks.bench_result_formatting [--sizes 1000 10000 100000] [--repeat 5]
+"""
+import argparse
+import random
+import time
+
+from app.services.sql_service import sql_service
+from app.utils.result_summary import summarize_results
+
+STATUSES = ["pending", "processing", "shipped", "delivered", "cancelled"]
+
+
+def synthetic_rows(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        {
+            "order_id": i,
+            "customer_id": rng.randint(1, 5000),
+            "order_status": rng.choice(STATUSES),
+            "order_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "total_amount_inr": round(rng.uniform(100, 150000), 2),
+            "discount_amount_inr": round(rng.uniform(0, 5000), 2) if i % 10 else None,
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_format(results: list) -> list:
+    formatted_results = []
+    for row in results:
+        formatted_row = {}
+        for key, value in row.items():
+            if key.endswith('_inr') or key.endswith('_price') or 'amount' in key.lower():
+                if isinstance(value, (int, float)):
+                    formatted_row[key] = value
+                    formatted_row[f"{key}_formatted"] = f"₹{value:,.2f}"
+                else:
+                    formatted_row[key] = value
+            else:
+                formatted_row[key] = value
+        formatted_results.append(formatted_row)
+    return formatted_results
+
+
+def best_ms(func, rows, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}{'loop ms':>12}{'columnar ms':>14}{'speedup':>10}{'summary ms':>13}")
+    for size in args.sizes:
+        rows = synthetic_rows(size)
+        assert sql_service.format_sql_results(rows) == legacy_format(rows)
+        loop = best_ms(legacy_format, rows, args.repeat)
+        columnar = best_ms(sql_service.format_sql_results, rows, args.repeat)
+        summary = best_ms(summarize_results, rows, args.repeat)
+        print(f"{size:>8}{loop:>12.2f}{columnar:>14.2f}{loop / columnar:>9.1f}x{summary:>13.2f}")
@@ -0,0 +1,215 @@
+"""
+Benchmark: token-based SQL safety validator vs the legacy regex cascade
+
+Times ``SQLService._validate_query_safety`` against a verbatim copy of the
+regex-based validator it replaced, on typical generated queries, long
+queries and adversarial inputs (many OR terms, long unmatched tails) that
+make the ``.*`` patterns of the old cascade backtrack.
+
+Usage:
+    python -m benchmarks.bench_sql_validator [--repeat 5]
+"""
+import argparse
+import re
+import time
+from typing import Optional, Tuple
+
+from app.services.sql_service import SQLService
+from app.utils.sql_analysis import _analyze
+
+
+class LegacyValidator:
+    """The regex cascade previously used by SQLService"""
+
+    def __init__(self):
+        self.allowed_functions = SQLService().allowed_functions
+
+    def _validate_query_safety(self, sql_query: str) -> Tuple[bool, Optional[str]]:
+        """Validate SQL query for safety and security"""
+        
+        # Remove comments and normalize whitespace
+        cleaned_query = self._clean_sql_query(sql_query)
+        
+        if not cleaned_query:
+            return False, "Empty or invalid SQL query"
+        
+        # Convert to uppercase for validation
+        query_upper = cleaned_query.upper()
+        
+        # 1. Must be SELECT query only
+        if not query_upper.strip().startswith('SELECT'):
+            return False, "Only SELECT queries are allowed"
+        
+        # 2. Check for dangerous SQL operations
+        dangerous_operations = [
+            'INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER', 
+            'TRUNCATE', 'REPLACE', 'MERGE', 'GRANT', 'REVOKE',
+            'EXEC', 'EXECUTE', 'PRAGMA', 'ATTACH', 'DETACH'
+        ]
+        
+        for operation in dangerous_operations:
+            # Use word boundaries to avoid false positives
+            pattern = r'\b' + operation + r'\b'
+            if re.search(pattern, query_upper):
+                return False, f"Operation '{operation}' is not allowed"
+        
+        # 3. Check for suspicious patterns
+        suspicious_patterns = [
+            r';\s*(DROP|DELETE|UPDATE|INSERT)',  # Multiple statements
+            r'--\s*\w',  # SQL injection comments
+            r'/\*.*?\*/',  # Block comments (potential injection)
+            r'\bUNION\b.*\bSELECT\b',  # Union-based injection attempts
+            r'\bOR\b.*\b1\s*=\s*1\b',  # OR 1=1 injection
+            r'\bAND\b.*\b1\s*=\s*0\b',  # AND 1=0 injection
+        ]
+        
+        for pattern in suspicious_patterns:
+            if re.search(pattern, query_upper, re.IGNORECASE | re.DOTALL):
+                return False, "Query contains suspicious patterns"
+        
+        # 4. Validate function usage
+        used_functions = re.findall(r'\b(\w+)\s*\(', query_upper)
+        for func in used_functions:
+            if func not in self.allowed_functions and func not in ['SELECT', 'FROM', 'WHERE', 'GROUP', 'ORDER', 'HAVING', 'LIMIT']:
+                # Allow table names and column names
+                if not self._is_table_or_column_reference(func):
+                    return False, f"Function '{func}' is not allowed"
+        
+        # 5. Check query complexity (prevent infinite loops/excessive resource usage)
+        if self._is_query_too_complex(cleaned_query):
+            return False, "Query is too complex or potentially resource-intensive"
+        
+        return True, None
+    
+    def _clean_sql_query(self, sql_query: str) -> str:
+        """Clean and normalize SQL query"""
+        try:
+            # Remove leading/trailing whitespace
+            cleaned = sql_query.strip()
+            
+            # Remove SQL comments (-- style)
+            cleaned = re.sub(r'--.*$', '', cleaned, flags=re.MULTILINE)
+            
+            # Remove block comments but be careful with /* */
+            cleaned = re.sub(r'/\*.*?\*/', '', cleaned, flags=re.DOTALL)
+            
+            # Normalize whitespace
+            cleaned = re.sub(r'\s+', ' ', cleaned)
+            
+            # Remove trailing semicolon for processing (will be added back if needed)
+            cleaned = cleaned.rstrip(';').strip()
+            
+            return cleaned
+            
+        except Exception:
+            return ""
+    
+    def _is_table_or_column_reference(self, identifier: str) -> bool:
+        """Check if identifier is a likely table or column name"""
+        # Known table names in our schema
+        table_names = {'CUSTOMERS', 'PRODUCTS', 'ORDERS', 'ORDER_ITEMS'}
+        
+        # Common column patterns
+        column_patterns = [
+            r'.*_ID$', r'.*_NAME$', r'.*_DATE$', r'.*_TIME$', 
+            r'.*_STATUS$', r'.*_TYPE$', r'.*_CODE$', r'.*_INR$'
+        ]
+        
+        if identifier in table_names:
+            return True
+            
+        for pattern in column_patterns:
+            if re.match(pattern, identifier):
+                return True
+        
+        return False
+    
+    def _is_query_too_complex(self, sql_query: str) -> bool:
+        """Check if query is too complex"""
+        query_upper = sql_query.upper()
+        
+        # Count subqueries
+        subquery_count = query_upper.count('(SELECT')
+        if subquery_count > 3:
+            return True
+        
+        # Count JOINs (too many joins can be expensive)
+        join_count = len(re.findall(r'\bJOIN\b', query_upper))
+        if join_count > 5:
+            return True
+        
+        # Check for potentially expensive operations
+        expensive_patterns = [
+            r'\bCROSS\s+JOIN\b',  # Cross joins can be expensive
+            r'\bUNION\s+ALL\b.*\bUNION\s+ALL\b',  # Multiple unions
+        ]
+        
+        for pattern in expensive_patterns:
+            if re.search(pattern, query_upper):
+                return True
+        
+        return False
+
+
+TYPICAL = [
+    "SELECT customer_id, first_name, last_name, email, phone FROM customers WHERE city = 'Mumbai';",
+    "SELECT p.category, COUNT(oi.order_item_id) as total_orders, SUM(oi.total_price_inr) as total_sales_inr "
+    "FROM products p JOIN order_items oi ON p.product_id = oi.product_id "
+    "JOIN orders o ON oi.order_id = o.order_id WHERE o.order_status = 'delivered' "
+    "GROUP BY p.category ORDER BY total_sales_inr DESC;",
+    "SELECT c.customer_id, c.first_name, SUM(o.total_amount_inr) as total_spent_inr FROM customers c "
+    "JOIN orders o ON c.customer_id = o.customer_id WHERE o.payment_status = 'completed' "
+    "GROUP BY c.customer_id HAVING SUM(o.total_amount_inr) > 50000 ORDER BY total_spent_inr DESC;",
+]
+
+
+def long_query(n: int) -> str:
+    columns = ", ".join(f"c{i}_name" for i in range(n))
+    return f"SELECT {columns} FROM customers WHERE city = 'Pune' LIMIT 10"
+
+
+def many_or_terms(n: int) -> str:
+    return "SELECT * FROM customers WHERE " + " OR ".join(f"city = 'c{i}'" for i in range(n))
+
+
+def or_chain(n: int) -> str:
+    # Every OR restarts a scan to the end looking for 1=1
+    return "SELECT * FROM t WHERE a = 1 " + "OR b = 2 " * n
+
+
+def bench(fn, sql: str, repeat: int) -> float:
+    """Best per-call time in microseconds"""
+    calls = max(1, int(20000 / max(len(sql), 200)))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn(sql)
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best * 1e6
+
+
+def main(repeat: int):
+    service = SQLService()
+
+    def new(sql: str):
+        # Analyse from scratch every call so the memoized analysis does not hide the lexing cost
+        return service._validate_query_safety(sql, _analyze(sql))
+
+    old = LegacyValidator()._validate_query_safety
+
+    print(f"{'input':<26}{'chars':>8}{'legacy us':>12}{'lexer us':>12}{'speedup':>9}")
+    cases = [(f"typical #{i + 1}", sql) for i, sql in enumerate(TYPICAL)]
+    cases += [(f"long select n={n}", long_query(n)) for n in (100, 1000)]
+    cases += [(f"many OR terms n={n}", many_or_terms(n)) for n in (100, 1000, 4000)]
+    cases += [(f"OR scan n={n}", or_chain(n)) for n in (100, 1000, 4000)]
+    for name, sql in cases:
+        legacy_us, lexer_us = bench(old, sql, repeat), bench(new, sql, repeat)
+        print(f"{name:<26}{len(sql):>8}{legacy_us:>12.1f}{lexer_us:>12.1f}{legacy_us / lexer_us:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.repeat)
@@ -0,0 +1,98 @@
+"""
+Benchmark: SQLite tuning presets on a scaled-up dataset
+
+Builds a synthetic database ``--scale`` times the seed data volume and runs
+a mix of analytical queries (joins, aggregations, sorts) through pooled
+``DatabaseManager`` connections configured with each tuning preset, plus
+SQLite's untuned defaults as the baseline.
+
+Usage:
+    python -m benchmarks.bench_sqlite_tuning [--scale 400] [--rounds 5] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.database.connection import DatabaseManager
+from app.database.tuning import PRESETS, TuningProfile
+from benchmarks.datasets import build_dataset
+
+QUERIES = [
+    "SELECT p.category, COUNT(oi.order_item_id) AS total_orders, SUM(oi.total_price_inr) AS total_sales_inr "
+    "FROM products p JOIN order_items oi ON p.product_id = oi.product_id "
+    "JOIN orders o ON oi.order_id = o.order_id WHERE o.order_status = 'delivered' "
+    "GROUP BY p.category ORDER BY total_sales_inr DESC",
+    "SELECT c.customer_id, c.first_name, c.last_name, SUM(o.total_amount_inr) AS total_spent_inr "
+    "FROM customers c JOIN orders o ON c.customer_id = o.customer_id WHERE o.payment_status = 'completed' "
+    "GROUP BY c.customer_id ORDER BY total_spent_inr DESC LIMIT 20",
+    "SELECT city, COUNT(*) AS customers FROM customers GROUP BY city ORDER BY customers DESC",
+    "SELECT product_name, brand, price_inr FROM products WHERE category = 'Electronics' "
+    "ORDER BY price_inr DESC LIMIT 50",
+    "SELECT strftime('%Y-%m', order_date) AS month, COUNT(*) AS orders, SUM(total_amount_inr) AS revenue "
+    "FROM orders GROUP BY month ORDER BY month",
+    "SELECT p.product_id, p.product_name FROM products p "
+    "LEFT JOIN order_items oi ON p.product_id = oi.product_id WHERE oi.product_id IS NULL LIMIT 100",
+]
+
+# SQLite's own defaults (rollback journal, 2 MB cache, no mmap)
+UNTUNED = TuningProfile(name="untuned", journal_mode="DELETE", synchronous="FULL",
+                        cache_size_kb=2000, mmap_size_mb=0, temp_store="DEFAULT")
+
+
+async def run_profile(db_path: str, profile: TuningProfile, rounds: int, concurrency: int):
+    manager = DatabaseManager(db_path, tuning=profile)
+    manager.settings = manager.settings.model_copy(update={
+        "DB_POOL_MIN_SIZE": concurrency, "DB_POOL_MAX_SIZE": concurrency
+    })
+    # Switch the journal mode through a writer connection, as initialization does
+    async with manager.get_writer_connection():
+        pass
+    await manager.open()
+
+    async def timed(query: str) -> float:
+        start = time.perf_counter()
+        await manager.execute_query(query)
+        return (time.perf_counter() - start) * 1000
+
+    # Warm-up round so every preset starts with the file in the OS cache
+    await asyncio.gather(*(timed(q) for q in QUERIES))
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for offset in range(0, len(QUERIES) * concurrency, concurrency):
+            batch = [QUERIES[(offset + i) % len(QUERIES)] for i in range(concurrency)]
+            latencies += await asyncio.gather(*(timed(q) for q in batch))
+    elapsed = time.perf_counter() - start
+    await manager.close()
+    return elapsed, latencies
+
+
+async def main(scale: int, rounds: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        started = time.perf_counter()
+        counts = build_dataset(db_path, scale)
+        print(f"Dataset (scale {scale}) built in {time.perf_counter() - started:.1f}s: {counts}")
+        print(f"Concurrency {concurrency}, {rounds} rounds of {len(QUERIES) * concurrency} queries\n")
+        print(f"{'profile':<13}{'queries/s':>11}{'p50 ms':>9}{'p95 ms':>9}{'speedup':>9}")
+
+        baseline = None
+        for profile in [UNTUNED, *PRESETS.values()]:
+            elapsed, latencies = await run_profile(db_path, profile, rounds, concurrency)
+            throughput = len(latencies) / elapsed
+            baseline = baseline or throughput
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(f"{profile.name:<13}{throughput:>11.1f}{statistics.median(latencies):>9.2f}"
+                  f"{p95:>9.2f}{throughput / baseline:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=400)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(main(args.scale, args.rounds, args.concurrency))
@@ -0,0 +1,98 @@
+"""
+Benchmark: statement templates and SQLite's prepared-statement cache
+
+Runs short, selective queries whose literals change on every execution (the
+shape of generated lookups) on a scaled-up dataset, three ways:
+
+- inline:        literals in the SQL text, so every statement is prepared anew
+- templated/0:   literals bound as parameters, statement cache disabled
+- templated:     literals bound as parameters, ``cached_statements`` = --cache-size
+
+Statements are parameterized up front and execution is timed alone;
+the cost of ``parameterize`` per query is reported separately.
+
+Usage:
+    python -m benchmarks.bench_statement_cache [--scale 200] [--queries 20000] [--cache-size 512]
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from app.utils.sql_analysis import analyze_sql
+from app.utils.sql_template import parameterize
+from benchmarks.datasets import CITIES, STATUSES, build_dataset
+
+SHAPES = [
+    "SELECT order_id, order_status, total_amount_inr FROM orders WHERE customer_id = {customer} "
+    "AND order_status = '{status}' ORDER BY order_date DESC LIMIT 20",
+    "SELECT p.product_name, oi.quantity, oi.total_price_inr FROM order_items oi "
+    "JOIN products p ON p.product_id = oi.product_id WHERE oi.order_id = {order}",
+    "SELECT COUNT(*) AS customers FROM customers WHERE city = '{city}' AND customer_id > {customer}",
+]
+
+
+def workload(count: int, counts: dict, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    return [
+        rng.choice(SHAPES).format(
+            customer=rng.randint(1, counts["customers"]),
+            order=rng.randint(1, counts["orders"]),
+            status=rng.choice(STATUSES),
+            city=rng.choice(CITIES)[0],
+        )
+        for _ in range(count)
+    ]
+
+
+def run(db_path: str, statements: list, cache_size: int) -> list:
+    """Execute (sql, params) pairs on one connection, returning latencies in microseconds"""
+    conn = sqlite3.connect(db_path, cached_statements=cache_size)
+    latencies = []
+    for sql, params in statements:
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        latencies.append((time.perf_counter() - start) * 1e6)
+    conn.close()
+    return latencies
+
+
+def main(scale: int, count: int, cache_size: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = str(Path(tmp) / "bench.db")
+        counts = build_dataset(db_path, scale)
+        queries = workload(count, counts)
+        analyses = [analyze_sql(sql) for sql in queries]
+        start = time.perf_counter()
+        templates = [parameterize(analysis) for analysis in analyses]
+        parameterize_us = (time.perf_counter() - start) / count * 1e6
+        print(f"Dataset (scale {scale}): {counts}")
+        print(f"{count} queries, {len(set(queries))} distinct texts, "
+              f"{len({t.fingerprint for t in templates})} templates")
+        print(f"parameterize: {parameterize_us:.1f} us/query\n")
+        print(f"{'mode':<14}{'queries/s':>11}{'p50 us':>9}{'p95 us':>9}{'speedup':>9}")
+
+        inline = [(sql, ()) for sql in queries]
+        bound = [(t.sql, t.params) for t in templates]
+        run(db_path, inline[:500], cache_size)  # warm the OS cache
+        baseline = None
+        for name, statements, size in (("inline", inline, cache_size), ("templated/0", bound, 0),
+                                       ("templated", bound, cache_size)):
+            latencies = run(db_path, statements, size)
+            throughput = len(latencies) / (sum(latencies) / 1e6)
+            baseline = baseline or throughput
+            p95 = statistics.quantiles(latencies, n=20)[-1]
+            print(f"{name:<14}{throughput:>11.0f}{statistics.median(latencies):>9.1f}"
+                  f"{p95:>9.1f}{throughput / baseline:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--cache-size", type=int, default=512)
+    args = parser.parse_args()
+    main(args.scale, args.queries, args.cache_size)
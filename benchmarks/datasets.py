@@ -0,0 +1,129 @@
+"""
+Scaled-up synthetic e-commerce dataset for benchmarks
+
+Builds a database with the application schema and ``scale`` times the
+seed data volume (25 customers, 50 products, 40 orders per unit of scale),
+with deterministic pseudo-random values so runs are comparable.
+
+Usage:
+    python -m benchmarks.datasets path/to/bench.db [--scale 2000]
+"""
+import argparse
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "app" / "database" / "schema.sql"
+
+CITIES = [
+    ("Mumbai", "Maharashtra"), ("Pune", "Maharashtra"), ("Delhi", "Delhi"),
+    ("Bangalore", "Karnataka"), ("Chennai", "Tamil Nadu"), ("Hyderabad", "Telangana"),
+    ("Ahmedabad", "Gujarat"), ("Kolkata", "West Bengal"), ("Jaipur", "Rajasthan"),
+    ("Lucknow", "Uttar Pradesh"), ("Kochi", "Kerala"), ("Chandigarh", "Punjab"),
+]
+CATEGORIES = {
+    "Electronics": (["Smartphones", "Laptops", "Headphones", "Televisions"], ["Samsung", "Apple", "Sony", "OnePlus"]),
+    "Clothing": (["Shirts", "Jeans", "Dresses", "Footwear"], ["Levi's", "Nike", "Adidas", "Fabindia"]),
+    "Books": (["Fiction", "Non-Fiction", "Academic"], ["Penguin", "HarperCollins", "Rupa"]),
+    "Home & Kitchen": (["Cookware", "Appliances", "Furniture"], ["Prestige", "Philips", "IKEA"]),
+    "Health & Fitness": (["Supplements", "Equipment"], ["MuscleBlaze", "Decathlon"]),
+    "Beauty & Personal Care": (["Skincare", "Haircare"], ["Lakme", "Nivea", "Himalaya"]),
+    "Toys & Games": (["Board Games", "Puzzles"], ["Funskool", "Hasbro", "Lego"]),
+}
+FIRST_NAMES = ["Rajesh", "Priya", "Amit", "Sneha", "Vikram", "Anita", "Rohit", "Kavya", "Suresh", "Deepika"]
+LAST_NAMES = ["Kumar", "Sharma", "Singh", "Patel", "Gupta", "Rao", "Jain", "Reddy", "Mishra", "Nair"]
+STATUSES = ["pending", "processing", "shipped", "delivered", "delivered", "delivered", "cancelled"]
+PAYMENT_METHODS = ["credit_card", "debit_card", "upi", "wallet", "cod"]
+PAYMENT_STATUSES = ["completed", "completed", "completed", "pending", "failed", "refunded"]
+
+
+def build_dataset(db_path: str, scale: int = 100, seed: int = 42) -> dict:
+    """Create (or replace) a database at db_path and return its row counts"""
+    rng = random.Random(seed)
+    path = Path(db_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+
+    n_customers, n_products, n_orders = 25 * scale, 50 * scale, 40 * scale
+    start_date = datetime(2023, 1, 1)
+
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA_PATH.read_text())
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    def customers():
+        for i in range(n_customers):
+            city, state = rng.choice(CITIES)
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            registered = start_date + timedelta(days=rng.randrange(900))
+            yield (first, last, f"{first.lower()}.{last.lower()}.{i}@email.com",
+                   f"+91-{9000000000 + i}", city, state, registered.date().isoformat(), int(rng.random() > 0.05))
+
+    conn.executemany(
+        "INSERT INTO customers (first_name, last_name, email, phone, city, state, registration_date, is_active) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", customers()
+    )
+
+    prices = []
+
+    def products():
+        categories = list(CATEGORIES)
+        for i in range(n_products):
+            category = rng.choice(categories)
+            subcategories, brands = CATEGORIES[category]
+            brand = rng.choice(brands)
+            price = round(rng.uniform(99, 150000), 2)
+            prices.append(price)
+            yield (f"{brand} {rng.choice(subcategories)} {i}", category, rng.choice(subcategories), brand,
+                   price, round(price * rng.uniform(0.5, 0.8), 2), rng.randrange(500),
+                   round(rng.uniform(2.5, 5.0), 1), f"{category} product {i}",
+                   (start_date + timedelta(days=rng.randrange(700))).date().isoformat())
+
+    conn.executemany(
+        "INSERT INTO products (product_name, category, subcategory, brand, price_inr, cost_price_inr, "
+        "stock_quantity, rating, description, created_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", products()
+    )
+
+    items = []
+
+    def orders():
+        for order_id in range(1, n_orders + 1):
+            total = 0.0
+            for _ in range(rng.randint(1, 4)):
+                product_id = rng.randint(1, n_products)
+                quantity = rng.randint(1, 3)
+                unit_price = prices[product_id - 1]
+                total += unit_price * quantity
+                items.append((order_id, product_id, quantity, unit_price, round(unit_price * quantity, 2)))
+            ordered = start_date + timedelta(minutes=rng.randrange(900 * 24 * 60))
+            yield (rng.randint(1, n_customers), ordered.isoformat(sep=" "), rng.choice(STATUSES),
+                   f"{rng.randrange(1, 999)} Main Road, {rng.choice(CITIES)[0]}", round(total, 2),
+                   rng.choice(PAYMENT_METHODS), rng.choice(PAYMENT_STATUSES))
+
+    conn.executemany(
+        "INSERT INTO orders (customer_id, order_date, order_status, shipping_address, total_amount_inr, "
+        "payment_method, payment_status) VALUES (?, ?, ?, ?, ?, ?, ?)", orders()
+    )
+    conn.executemany(
+        "INSERT INTO order_items (order_id, product_id, quantity, unit_price_inr, total_price_inr) "
+        "VALUES (?, ?, ?, ?, ?)", items
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    return {"customers": n_customers, "products": n_products, "orders": n_orders, "order_items": len(items)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    started = time.perf_counter()
+    counts = build_dataset(args.path, args.scale, args.seed)
+    print(f"Built {args.path} in {time.perf_counter() - started:.1f}s: {counts}")
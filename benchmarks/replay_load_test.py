@@ -0,0 +1,296 @@
+"""
+Offline replay load test of the /query endpoint
+
+Replays a recorded workload (natural language questions with their known
+SQL) against the full application in-process, through httpx's ASGI
+transport. The Gemini model is replaced by a stub that answers each
+question with its recorded SQL after a synthetic, seeded latency, so runs
+need no API key or network and are repeatable; everything after the model
+call (extraction, validation, caching, execution, formatting) is the real
+pipeline.
+
+The workload is JSONL with ``question`` and ``sql_query`` fields, which is
+also the format of the query log, so production traffic can be replayed
+directly (records without SQL are skipped).
+
+Requests arrive at a fixed ``--rate`` (Poisson arrivals, open loop) or,
+without one, as fast as ``--concurrency`` workers can send them (closed
+loop). Open-loop latencies are measured from the scheduled arrival time, so
+queueing behind the concurrency limit is included.
+
+LLM latency models:
+    fixed:MS                 every call takes MS
+    uniform:LOW,HIGH         uniform between LOW and HIGH ms
+    lognormal:MEDIAN,SIGMA   log-normal with the given median (ms) and shape
+
+Usage:
+    python -m benchmarks.replay_load_test [--workload benchmarks/workloads/ecommerce.jsonl]
+        [--requests 500] [--concurrency 16] [--rate 50] [--llm-latency lognormal:400,0.5]
+        [--scale 0] [--cold] [--seed 7] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_WORKLOAD = Path(__file__).resolve().parent / "workloads" / "ecommerce.jsonl"
+
+# The question is the last quoted "Natural Query" line of the generation prompt
+_QUESTION_PATTERN = re.compile(r'Natural Query: "(.*)"\s*$', re.MULTILINE)
+
+
+class LatencyModel:
+    """Seeded synthetic latency distribution; the n-th draw is the same on every run"""
+
+    def __init__(self, kind: str, params: Tuple[float, ...], seed: int = 7):
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency model: {kind}")
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}[kind]
+        if len(params) != expected:
+            raise ValueError(f"{kind} latency takes {expected} parameter(s), got {len(params)}")
+        self.kind = kind
+        self.params = params
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: str, seed: int = 7) -> "LatencyModel":
+        """Parse e.g. "fixed:200", "uniform:100,500" or "lognormal:400,0.5" """
+        kind, _, args = spec.partition(":")
+        params = tuple(float(value) for value in args.split(",") if value.strip())
+        return cls(kind.strip().lower(), params, seed)
+
+    def sample_ms(self) -> float:
+        with self._lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return self._rng.uniform(*self.params)
+            median, sigma = self.params
+            return self._rng.lognormvariate(math.log(median), sigma)
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{','.join(f'{value:g}' for value in self.params)}"
+
+
+class ReplayModel:
+    """
+    Stand-in for the Gemini model that returns the recorded SQL of a question
+
+    Like the SDK, ``generate_content`` blocks its thread for the sampled
+    latency. Unknown questions get an empty answer, which the pipeline
+    reports as a generation failure.
+    """
+
+    def __init__(self, answers: Dict[str, str], latency: LatencyModel):
+        self.answers = answers
+        self.latency = latency
+        self.calls = 0
+        self.misses = 0
+
+    def generate_content(self, prompt: str) -> str:
+        self.calls += 1
+        time.sleep(self.latency.sample_ms() / 1000)
+        matches = _QUESTION_PATTERN.findall(prompt)
+        sql_query = self.answers.get(matches[-1]) if matches else None
+        if sql_query is None:
+            self.misses += 1
+            return ""
+        return sql_query
+
+
+def load_workload(path: str) -> List[Dict[str, str]]:
+    """Read (question, sql_query) pairs from a workload file or a query log"""
+    from app.services.query_log import iter_query_log
+
+    workload = []
+    for record in iter_query_log(path):
+        question, sql_query = record.get("question"), record.get("sql_query")
+        if question and sql_query and record.get("success", True):
+            workload.append({"question": question.strip(), "sql_query": sql_query})
+    if not workload:
+        raise ValueError(f"No replayable records (question + sql_query) in {path}")
+    return workload
+
+
+def _prepare_environment(runtime_dir: str, scale: int, cold: bool):
+    """Point every on-disk store at a scratch directory before the app is imported"""
+    db_path = os.path.join(runtime_dir, "replay.db")
+    if scale > 0:
+        from benchmarks.datasets import build_dataset
+        counts = build_dataset(db_path, scale)
+        print(f"Built dataset (scale {scale}): {counts}")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["GENERATION_CACHE_PATH"] = os.path.join(runtime_dir, "cache.db")
+    os.environ["EXAMPLE_STORE_PATH"] = os.path.join(runtime_dir, "examples.db")
+    os.environ["QUERY_LOG_ENABLED"] = "false"
+    os.environ["METRICS_ENABLED"] = "true"
+    os.environ["GEMINI_API_KEY"] = ""
+    if cold:
+        # Every request pays for generation and execution
+        for name in ("FAST_PATH_ENABLED", "GENERATION_CACHE_ENABLED", "RESULT_CACHE_ENABLED"):
+            os.environ[name] = "false"
+
+
+def _percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+    p50, p95, p99 = np.percentile(values, (50, 95, 99))
+    return {
+        "count": len(values),
+        "mean": round(float(np.mean(values)), 3),
+        "p50": round(float(p50), 3),
+        "p95": round(float(p95), 3),
+        "p99": round(float(p99), 3),
+        "max": round(float(max(values)), 3),
+    }
+
+
+async def replay(
+    workload: List[Dict[str, str]],
+    requests: int,
+    concurrency: int,
+    rate: Optional[float],
+    latency: LatencyModel,
+    seed: int = 7
+) -> Dict[str, Any]:
+    """Drive /api/v1/query with the workload and return throughput, errors and latency per stage"""
+    import httpx
+
+    from app.main import app
+    from app.services.llm_service import llm_service
+
+    model = ReplayModel({item["question"]: item["sql_query"] for item in workload}, latency)
+    llm_service.set_model(model)
+
+    rng = random.Random(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+    end_to_end: List[float] = []
+    stages: Dict[str, List[float]] = defaultdict(list)
+    errors: Counter = Counter()
+
+    async def send(client: httpx.AsyncClient, index: int, scheduled: float):
+        question = workload[index % len(workload)]["question"]
+        async with semaphore:
+            try:
+                response = await client.post(
+                    "/api/v1/query", json={"query": question, "include_timings": True}
+                )
+                body = response.json() if response.status_code == 200 else {}
+                if response.status_code != 200:
+                    errors[f"HTTP_{response.status_code}"] += 1
+                elif not body.get("success"):
+                    errors[body.get("error_code") or "FAILED"] += 1
+            except httpx.HTTPError as e:
+                body = {}
+                errors[type(e).__name__] += 1
+        end_to_end.append((time.perf_counter() - scheduled) * 1000)
+        for stage, elapsed_ms in (body.get("timings_ms") or {}).items():
+            stages[stage].append(elapsed_ms)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=None) as client:
+            start = time.perf_counter()
+            if rate:
+                # Open loop: arrivals follow the schedule whatever the service does
+                tasks, arrival = [], start
+                for index in range(requests):
+                    arrival += rng.expovariate(rate)
+                    delay = arrival - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    tasks.append(asyncio.create_task(send(client, index, arrival)))
+                await asyncio.gather(*tasks)
+            else:
+                # Closed loop: each worker sends its next request as soon as the last returns
+                counter = iter(range(requests))
+
+                async def worker():
+                    for index in counter:
+                        await send(client, index, time.perf_counter())
+
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+
+    failed = sum(errors.values())
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "rate": rate,
+        "llm_latency": str(latency),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 2),
+        "error_rate": round(failed / requests, 4),
+        "errors": dict(errors),
+        "llm_calls": model.calls,
+        "latency_ms": {
+            "end_to_end": _percentiles(end_to_end),
+            **{stage: _percentiles(values) for stage, values in sorted(stages.items())},
+        },
+    }
+
+
+def print_report(result: Dict[str, Any]):
+    mode = f"open loop at {result['rate']:g} req/s" if result["rate"] else "closed loop"
+    print(f"\n{result['requests']} requests, concurrency {result['concurrency']}, {mode}, "
+          f"LLM latency {result['llm_latency']}")
+    print(f"Elapsed: {result['elapsed_s']:.2f} s   Throughput: {result['throughput_rps']:.1f} req/s   "
+          f"Error rate: {result['error_rate']:.2%}   LLM calls: {result['llm_calls']}")
+    if result["errors"]:
+        print("Errors: " + ", ".join(f"{code}={count}" for code, count in sorted(result["errors"].items())))
+
+    print(f"\n{'stage (ms)':<20}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}")
+    for stage, stats in result["latency_ms"].items():
+        if not stats["count"]:
+            continue
+        print(f"{stage:<20}{stats['count']:>8}{stats['mean']:>10.2f}{stats['p50']:>10.2f}"
+              f"{stats['p95']:>10.2f}{stats['p99']:>10.2f}{stats['max']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--workload", default=str(DEFAULT_WORKLOAD),
+                        help="JSONL workload or query log to replay")
+    parser.add_argument("--requests", type=int, default=500, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum requests in flight")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Arrival rate in requests/s (closed loop when omitted)")
+    parser.add_argument("--llm-latency", default="lognormal:400,0.5",
+                        help="Stub LLM latency model (fixed:MS, uniform:LOW,HIGH, lognormal:MEDIAN,SIGMA)")
+    parser.add_argument("--scale", type=int, default=0,
+                        help="Synthetic dataset scale (0 uses the application's seed data)")
+    parser.add_argument("--cold", action="store_true",
+                        help="Disable the fast path, generation cache and result cache")
+    parser.add_argument("--seed", type=int, default=7, help="Seed for arrivals and LLM latency")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    latency = LatencyModel.parse(args.llm_latency, args.seed)
+    with tempfile.TemporaryDirectory(prefix="text2sql-replay-") as runtime_dir:
+        _prepare_environment(runtime_dir, args.scale, args.cold)
+        workload = load_workload(args.workload)
+        print(f"Replaying {len(workload)} recorded questions from {args.workload}")
+        result = asyncio.run(replay(workload, args.requests, args.concurrency, args.rate, latency, args.seed))
+
+    print_report(result)
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(result, indent=2))
+        print(f"\nResults written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
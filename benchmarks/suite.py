@@ -0,0 +1,283 @@
+"""
+Hot-path benchmark suite with JSON baselines and a regression gate
+
+``run`` times the hot paths and optionally saves the results as a JSON
+baseline; ``compare`` runs the suite again (or loads a saved run) and exits
+with status 1 when any benchmark is slower than its baseline by more than
+the threshold. Every benchmark reports the best of ``--repeat`` runs, so
+a single noisy run does not fail the gate.
+
+Benchmarks:
+    extract_sql                 LLMService._extract_sql_from_response, us per response
+    safety_check_cold/_warm     SQLService._validate_query_safety, us per query (unparsed / memoized)
+    format_results              SQLService.format_sql_results on 1000 order rows, ms
+    execute_query[scale=N]      DatabaseManager.execute_query on a point lookup, a join
+                                aggregate and a LIMIT scan at each dataset scale, ms per query
+    query_e2e_p50/_p95          POST /api/v1/query end to end with a zero-latency stub LLM
+                                and caches disabled, ms
+
+Baselines depend on the machine; record one per machine (or CI runner) and
+compare against it there.
+
+Usage:
+    python -m benchmarks.suite run [--save benchmarks/baseline.json] [--scales 1 10 100] [--repeat 5]
+    python -m benchmarks.suite compare benchmarks/baseline.json [--current run.json] [--threshold 0.25]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.replay_load_test import DEFAULT_WORKLOAD, LatencyModel, _prepare_environment, load_workload
+
+LLM_RESPONSES = [
+    "SELECT customer_id, first_name FROM customers WHERE city = 'Mumbai';",
+    "```sql\nSELECT p.product_name, p.price_inr\nFROM products p\nORDER BY p.price_inr DESC\nLIMIT 10;\n```",
+    "Here is the query you asked for:\n\nSELECT order_status, COUNT(*) AS orders FROM orders "
+    "GROUP BY order_status;\n\nIt counts orders per status.",
+    "SQL: SELECT c.first_name, SUM(o.total_amount_inr) AS spent FROM customers c "
+    "JOIN orders o ON c.customer_id = o.customer_id GROUP BY c.customer_id ORDER BY spent DESC LIMIT 5",
+]
+
+SAFETY_QUERY = (
+    "SELECT c.first_name, c.last_name, SUM(o.total_amount_inr) AS spent FROM customers c "
+    "JOIN orders o ON c.customer_id = o.customer_id WHERE o.order_status = 'delivered' "
+    "AND c.customer_id > {} GROUP BY c.customer_id ORDER BY spent DESC LIMIT 10"
+)
+
+EXECUTE_QUERIES = [
+    "SELECT * FROM customers WHERE customer_id = 7",
+    "SELECT p.category, COUNT(*) AS items, SUM(oi.total_price_inr) AS revenue FROM order_items oi "
+    "JOIN products p ON oi.product_id = p.product_id GROUP BY p.category ORDER BY revenue DESC",
+    "SELECT order_id, order_date, total_amount_inr FROM orders WHERE order_status = 'shipped' LIMIT 100",
+]
+
+
+def best_of(func: Callable[[], Any], repeat: int, ops: int = 1) -> float:
+    """Best wall time of ``repeat`` calls in milliseconds, divided by ``ops``"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000 / ops)
+    return min(timings)
+
+
+def bench_extract_sql(repeat: int) -> float:
+    from app.services.llm_service import llm_service
+
+    responses = LLM_RESPONSES * 250
+
+    def run():
+        for response in responses:
+            llm_service._extract_sql_from_response(response)
+
+    return best_of(run, repeat, len(responses)) * 1000
+
+
+def bench_safety_check(repeat: int) -> Tuple[float, float]:
+    from app.services.sql_service import sql_service
+
+    batch = 1000
+    offset = iter(range(0, 10 ** 9, batch))
+
+    def cold():
+        # Distinct text every call, so the analysis memo never hits
+        start = next(offset)
+        for i in range(start, start + batch):
+            sql_service._validate_query_safety(SAFETY_QUERY.format(i))
+
+    warm_queries = [SAFETY_QUERY.format(i) for i in range(20)] * (batch // 20)
+
+    def warm():
+        for query in warm_queries:
+            sql_service._validate_query_safety(query)
+
+    warm()
+    return best_of(cold, repeat, batch) * 1000, best_of(warm, repeat, batch) * 1000
+
+
+def bench_format_results(repeat: int) -> float:
+    from app.services.sql_service import sql_service
+    from benchmarks.datasets import STATUSES
+
+    rng = random.Random(7)
+    rows = [
+        {
+            "order_id": i,
+            "order_status": rng.choice(STATUSES),
+            "total_amount_inr": round(rng.uniform(100, 150000), 2),
+            "discount_amount_inr": round(rng.uniform(0, 5000), 2),
+        }
+        for i in range(1000)
+    ]
+    return best_of(lambda: sql_service.format_sql_results(rows), repeat)
+
+
+def bench_execute_query(runtime_dir: str, scale: int, repeat: int) -> float:
+    from app.database.connection import DatabaseManager
+    from benchmarks.datasets import build_dataset
+
+    db_path = os.path.join(runtime_dir, f"scale-{scale}.db")
+    build_dataset(db_path, scale)
+    manager = DatabaseManager(db_path)
+
+    async def run() -> float:
+        for query in EXECUTE_QUERIES:
+            await manager.execute_query(query)  # warm the page cache and statement cache
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for query in EXECUTE_QUERIES:
+                await manager.execute_query(query)
+            timings.append((time.perf_counter() - start) * 1000 / len(EXECUTE_QUERIES))
+        await manager.close()
+        return min(timings)
+
+    return asyncio.run(run())
+
+
+def bench_query_e2e(requests: int) -> Tuple[float, float]:
+    from benchmarks.replay_load_test import replay
+
+    workload = load_workload(str(DEFAULT_WORKLOAD))
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = asyncio.run(replay(workload, requests, 1, None, LatencyModel("fixed", (0.0,))))
+    if result["error_rate"]:
+        raise RuntimeError(f"End-to-end benchmark had failed requests: {result['errors']}")
+    latency = result["latency_ms"]["end_to_end"]
+    return latency["p50"], latency["p95"]
+
+
+def run_suite(scales: List[int], repeat: int, e2e_requests: int) -> Dict[str, Any]:
+    """Run every benchmark and return the results document"""
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def record(name: str, value: float, unit: str):
+        results[name] = {"value": round(value, 4), "unit": unit}
+        print(f"{name:<28}{value:>12.3f} {unit}")
+
+    with tempfile.TemporaryDirectory(prefix="text2sql-suite-") as runtime_dir:
+        # The end-to-end run uses the full app, so its stores must point here before any app import
+        _prepare_environment(runtime_dir, 0, cold=True)
+
+        record("extract_sql", bench_extract_sql(repeat), "us")
+        cold, warm = bench_safety_check(repeat)
+        record("safety_check_cold", cold, "us")
+        record("safety_check_warm", warm, "us")
+        record("format_results", bench_format_results(repeat), "ms")
+        for scale in scales:
+            with contextlib.redirect_stdout(io.StringIO()):
+                elapsed = bench_execute_query(runtime_dir, scale, repeat)
+            record(f"execute_query[scale={scale}]", elapsed, "ms")
+        p50, p95 = bench_query_e2e(e2e_requests)
+        record("query_e2e_p50", p50, "ms")
+        record("query_e2e_p95", p95, "ms")
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": f"{platform.system()} {platform.machine()} {platform.node()}",
+            "repeat": repeat,
+            "scales": scales,
+        },
+        "benchmarks": results,
+    }
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[Dict[str, Any]]:
+    """
+    Compare two result documents; lower is better for every benchmark
+
+    Each row carries the relative change and a status of ok, improved,
+    regressed (slower than the baseline by more than ``threshold``), new
+    or missing.
+    """
+    rows = []
+    old, new = baseline["benchmarks"], current["benchmarks"]
+    for name in list(old) + [name for name in new if name not in old]:
+        before = old.get(name, {}).get("value")
+        after = new.get(name, {}).get("value")
+        change = (after - before) / before if before and after is not None else None
+        if before is None:
+            status = "new"
+        elif after is None:
+            status = "missing"
+        elif change is None:
+            status = "ok"
+        elif change > threshold:
+            status = "regressed"
+        elif change < -threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append({"name": name, "baseline": before, "current": after, "change": change, "status": status})
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], threshold: float):
+    print(f"\n{'benchmark':<28}{'baseline':>12}{'current':>12}{'change':>10}  status (threshold {threshold:.0%})")
+    for row in rows:
+        before = "-" if row["baseline"] is None else f"{row['baseline']:.3f}"
+        after = "-" if row["current"] is None else f"{row['current']:.3f}"
+        change = "-" if row["change"] is None else f"{row['change']:+.1%}"
+        print(f"{row['name']:<28}{before:>12}{after:>12}{change:>10}  {row['status']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite")
+    run_parser.add_argument("--save", help="Write the results to this JSON baseline")
+    compare_parser = commands.add_parser("compare", help="Fail when a benchmark regressed against a baseline")
+    compare_parser.add_argument("baseline", help="Baseline JSON written by run --save")
+    compare_parser.add_argument("--current", help="Compare this saved run instead of running the suite")
+    compare_parser.add_argument("--threshold", type=float, default=0.25,
+                                help="Allowed slowdown as a fraction of the baseline (default 0.25)")
+    for sub in (run_parser, compare_parser):
+        sub.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="Dataset scales for execute_query")
+        sub.add_argument("--repeat", type=int, default=5, help="Runs per benchmark; the best one counts")
+        sub.add_argument("--e2e-requests", type=int, default=200, help="Requests for the end-to-end benchmark")
+    args = parser.parse_args()
+
+    if args.command == "compare" and args.current:
+        current = json.loads(Path(args.current).read_text())
+    else:
+        current = run_suite(args.scales, args.repeat, args.e2e_requests)
+
+    if args.command == "run":
+        if args.save:
+            Path(args.save).parent.mkdir(parents=True, exist_ok=True)
+            Path(args.save).write_text(json.dumps(current, indent=2))
+            print(f"\nBaseline written to {args.save}")
+        return 0
+
+    baseline = json.loads(Path(args.baseline).read_text())
+    if baseline["meta"].get("machine") != current["meta"].get("machine"):
+        print(f"\nWarning: baseline was recorded on {baseline['meta'].get('machine')}, not this machine")
+    rows = compare_results(baseline, current, args.threshold)
+    print_comparison(rows, args.threshold)
+    regressed = [row["name"] for row in rows if row["status"] == "regressed"]
+    if regressed:
+        print(f"\nRegressed: {', '.join(regressed)}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""
+Shared test configuration
+"""
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# The global services open SQLite files (app database, generation cache,
+# example store) at import time and append to the query log; keep them out
+# of the working tree
+_RUNTIME_DIR = tempfile.mkdtemp(prefix="text2sql-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_RUNTIME_DIR, 'text2sql_assistant.db')}")
+os.environ.setdefault("GENERATION_CACHE_PATH", os.path.join(_RUNTIME_DIR, "text2sql_cache.db"))
+os.environ.setdefault("EXAMPLE_STORE_PATH", os.path.join(_RUNTIME_DIR, "text2sql_examples.db"))
+os.environ.setdefault("QUERY_LOG_PATH", os.path.join(_RUNTIME_DIR, "text2sql_query_log.jsonl"))
+
+
+@pytest.fixture(scope="session", autouse=True)
+def runtime_dir():
+    yield _RUNTIME_DIR
+    shutil.rmtree(_RUNTIME_DIR, ignore_errors=True)
@@ -9,39 +9,34 @@ client = TestClient(app)
 
 
 def test_root_endpoint():
-    """Test the root endpoint"""
+    """Test the root endpoint serves the UI"""
     response = client.get("/")
     assert response.status_code == 200
-    data = response.json()
-    assert "message" in data
-    assert "Text2SQL Assistant" in data["message"]
+    assert "text/html" in response.headers["content-type"]
 
 
-def test_health_endpoint():
-    """Test the health check endpoint"""
-    response = client.get("/api/v1/health")
+def test_metrics_endpoint():
+    """Test the Prometheus metrics endpoint"""
+    response = client.get("/api/v1/metrics")
     assert response.status_code == 200
-    data = response.json()
-    assert "status" in data
-    assert "version" in data
+    assert response.headers["content-type"].startswith("text/plain")
 
 
-def test_sample_queries_endpoint():
-    """Test the sample queries endpoint"""
-    response = client.get("/api/v1/sample-queries")
+def test_analytics_endpoint():
+    """Test the traffic analytics endpoint"""
+    response = client.get("/api/v1/analytics")
     assert response.status_code == 200
     data = response.json()
-    assert data["success"] is True
-    assert "data" in data
-    assert len(data["data"]) > 0
+    assert "total_queries" in data
+    assert "endpoints" in data
 
 
-def test_database_info_endpoint():
-    """Test the database info endpoint"""
-    response = client.get("/api/v1/database-info")
+def test_database_status_endpoint():
+    """Test the database status endpoint"""
+    response = client.get("/api/v1/debug/database-status")
     assert response.status_code == 200
     data = response.json()
-    assert data["success"] is True
+    assert "database_ready" in data
 
 
 def test_generate_sql_endpoint():
@@ -60,11 +55,12 @@ def test_generate_sql_endpoint():
 
 def test_execute_sql_endpoint_invalid():
     """Test execute SQL endpoint with invalid query"""
-    test_query = {
-        "sql_query": "DROP TABLE customers;"
-    }
+    # Non-SELECT statements are rejected by request validation
+    response = client.post("/api/v1/execute-sql", json={"sql_query": "DROP TABLE customers;"})
+    assert response.status_code == 422
     
-    response = client.post("/api/v1/execute-sql", json=test_query)
+    # Stacked statements get past validation but fail the safety check
+    response = client.post("/api/v1/execute-sql", json={"sql_query": "SELECT 1; DROP TABLE customers;"})
     assert response.status_code == 200
     data = response.json()
     assert data["success"] is False
@@ -0,0 +1,175 @@
+"""
+Tests for the aiosqlite connection pool
+"""
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.database.connection import DatabaseManager
+from app.database.pool import ConnectionPool, PoolTimeoutError
+
+
+def test_connections_are_reused(tmp_path):
+    async def run():
+        pool = ConnectionPool(str(tmp_path / "pool.db"), min_size=1, max_size=4)
+        await pool.initialize()
+        seen = set()
+        for _ in range(10):
+            async with pool.acquire() as db:
+                seen.add(id(db))
+                await db.execute("SELECT 1")
+        stats = pool.get_stats()
+        await pool.close()
+        return seen, stats
+
+    seen, stats = asyncio.run(run())
+    assert len(seen) == 1
+    assert stats["connections_created"] == 1
+    assert stats["acquisitions"] == 10
+    assert stats["in_use"] == 0
+
+
+def test_pool_never_exceeds_max_size(tmp_path):
+    async def run():
+        pool = ConnectionPool(str(tmp_path / "pool.db"), min_size=0, max_size=3)
+
+        async def work():
+            async with pool.acquire() as db:
+                await db.execute("SELECT 1")
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(20)))
+        stats = pool.get_stats()
+        await pool.close()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["size"] == 3
+    assert stats["peak_in_use"] == 3
+    assert stats["waits"] > 0
+    assert stats["acquisitions"] == 20
+
+
+def test_waiters_are_served_in_order(tmp_path):
+    async def run():
+        pool = ConnectionPool(str(tmp_path / "pool.db"), min_size=1, max_size=1)
+        order = []
+
+        async def work(i):
+            async with pool.acquire():
+                order.append(i)
+                await asyncio.sleep(0.005)
+
+        holder = await pool._acquire()
+        tasks = [asyncio.create_task(work(i)) for i in range(5)]
+        await asyncio.sleep(0.01)
+        await pool._release(holder)
+        await asyncio.gather(*tasks)
+        await pool.close()
+        return order
+
+    assert asyncio.run(run()) == [0, 1, 2, 3, 4]
+
+
+def test_acquire_times_out(tmp_path):
+    async def run():
+        pool = ConnectionPool(str(tmp_path / "pool.db"), min_size=1, max_size=1, acquire_timeout=0.05)
+        async with pool.acquire():
+            with pytest.raises(PoolTimeoutError):
+                async with pool.acquire():
+                    pass
+        stats = pool.get_stats()
+        # The pool is still usable after a timeout
+        async with pool.acquire() as db:
+            await db.execute("SELECT 1")
+        await pool.close()
+        return stats
+
+    stats = asyncio.run(run())
+    assert stats["timeouts"] == 1
+    assert stats["waiting"] == 0
+
+
+def test_broken_idle_connection_is_replaced(tmp_path):
+    async def run():
+        pool = ConnectionPool(str(tmp_path / "pool.db"), min_size=1, max_size=2, health_check_interval=0)
+        await pool.initialize()
+        await pool._idle[0].close()
+        async with pool.acquire() as db:
+            cursor = await db.execute("SELECT 1")
+            row = await cursor.fetchone()
+        stats = pool.get_stats()
+        await pool.close()
+        return row[0], stats
+
+    value, stats = asyncio.run(run())
+    assert value == 1
+    assert stats["health_check_failures"] == 1
+    assert stats["connections_created"] == 2
+    assert stats["size"] == 1
+
+
+def test_waiter_is_served_after_failed_rollback(tmp_path):
+    async def run():
+        pool = ConnectionPool(str(tmp_path / "pool.db"), min_size=1, max_size=1, acquire_timeout=2)
+        holder = await pool._acquire()
+        await holder.execute("BEGIN")
+
+        async def broken_rollback():
+            raise RuntimeError("rollback failed")
+
+        holder.rollback = broken_rollback
+
+        async def waiter():
+            async with pool.acquire() as db:
+                cursor = await db.execute("SELECT 1")
+                return (await cursor.fetchone())[0]
+
+        task = asyncio.create_task(waiter())
+        await asyncio.sleep(0.01)
+        await pool._release(holder)
+        value = await asyncio.wait_for(task, 1)
+        stats = pool.get_stats()
+        await pool.close()
+        return value, stats
+
+    value, stats = asyncio.run(run())
+    assert value == 1
+    assert stats["timeouts"] == 0
+    assert stats["connections_created"] == 2
+
+
+def test_unclosed_manager_does_not_block_exit(tmp_path):
+    script = (
+        "import asyncio\n"
+        "from app.database.connection import DatabaseManager\n"
+        f"print(asyncio.run(DatabaseManager({str(tmp_path / 'exit.db')!r}).execute_query('SELECT 1 AS x')))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True, text=True, timeout=30
+    )
+    assert result.returncode == 0, result.stderr
+    assert "[{'x': 1}]" in result.stdout
+
+
+def test_database_manager_uses_pool(tmp_path):
+    async def run():
+        manager = DatabaseManager(str(tmp_path / "manager.db"))
+        await manager.execute_script("CREATE TABLE t (x INTEGER); INSERT INTO t VALUES (1), (2);")
+        rows = await manager.execute_query("SELECT x FROM t ORDER BY x")
+        valid, _ = await manager.validate_sql("SELECT x FROM t")
+        foreign_keys = await manager.execute_query("PRAGMA foreign_keys")
+        stats = manager.get_pool_stats()
+        await manager.close()
+        return rows, valid, foreign_keys, stats
+
+    rows, valid, foreign_keys, stats = asyncio.run(run())
+    assert rows == [{"x": 1}, {"x": 2}]
+    assert valid
+    assert foreign_keys[0]["foreign_keys"] == 1
+    assert stats["connections_created"] == 1
+    assert stats["acquisitions"] == 3
@@ -0,0 +1,54 @@
+"""
+Tests for SQLite tuning profiles
+"""
+import asyncio
+
+import pytest
+
+from app.database.connection import DatabaseManager
+from app.database.tuning import PRESETS, build_profile
+
+
+def test_presets_and_overrides():
+    profile = build_profile("read-heavy", cache_size_kb=4096, temp_store="file")
+    assert profile.name == "read-heavy"
+    assert profile.cache_size_kb == 4096
+    assert profile.temp_store == "FILE"
+    assert profile.mmap_size_mb == PRESETS["read-heavy"].mmap_size_mb
+    assert build_profile() == PRESETS["default"]
+
+
+def test_invalid_profile_values_are_rejected():
+    with pytest.raises(ValueError):
+        build_profile("turbo")
+    with pytest.raises(ValueError):
+        build_profile(journal_mode="fast")
+
+
+def test_reader_connections_are_tuned_and_query_only(tmp_path):
+    async def run():
+        manager = DatabaseManager(str(tmp_path / "tuned.db"), tuning=build_profile("read-heavy"))
+        await manager.execute_script("CREATE TABLE t (x INTEGER); INSERT INTO t VALUES (1);")
+        pragmas = {}
+        for name in ("journal_mode", "cache_size", "mmap_size", "temp_store", "query_only"):
+            rows = await manager.execute_query(f"PRAGMA {name}")
+            pragmas[name] = list(rows[0].values())[0]
+        with pytest.raises(Exception, match="readonly"):
+            await manager.execute_query("INSERT INTO t VALUES (2)")
+        rows = await manager.execute_query("SELECT COUNT(*) AS n FROM t")
+        await manager.close()
+        return pragmas, rows[0]["n"]
+
+    pragmas, count = asyncio.run(run())
+    assert pragmas["journal_mode"] == "wal"
+    assert pragmas["cache_size"] == -PRESETS["read-heavy"].cache_size_kb
+    assert pragmas["temp_store"] == 2
+    assert pragmas["query_only"] == 1
+    assert count == 1
+
+
+def test_sync_initialization_switches_to_wal(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "init.db"))
+    assert manager.initialize_database()
+    assert manager.execute_sync_query("PRAGMA journal_mode")[0]["journal_mode"] == "wal"
+    assert manager.execute_sync_query("SELECT COUNT(*) AS n FROM customers")[0]["n"] > 0
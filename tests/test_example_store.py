@@ -0,0 +1,77 @@
+"""
+Tests for the few-shot example store and n-gram index
+"""
+import asyncio
+
+from app.services.example_store import ExampleStore, NGramIndex, SEED_EXAMPLES
+from app.models.schemas import ExecuteSQLResponse
+from app.services.text2sql_service import Text2SQLService
+
+
+def test_store_is_seeded_from_prompt_examples(tmp_path):
+    store = ExampleStore(str(tmp_path / "examples.db"))
+    assert len(store) == len(SEED_EXAMPLES)
+
+    top = store.top_k("What are the top 10 most expensive products?", k=1)
+    assert top[0].question == "What are the top 5 most expensive products?"
+
+
+def test_added_examples_are_searchable_and_persisted(tmp_path):
+    path = str(tmp_path / "examples.db")
+    store = ExampleStore(path)
+
+    assert asyncio.run(store.add("Average rating of Books", "SELECT AVG(rating) FROM products;"))
+    assert not asyncio.run(store.add("average rating of books?", "SELECT 1;"))
+    assert store.top_k("average rating for books", k=1)[0].sql_query == "SELECT AVG(rating) FROM products;"
+
+    reloaded = ExampleStore(path)
+    assert len(reloaded) == len(SEED_EXAMPLES) + 1
+
+
+def test_merge_does_not_change_results():
+    texts = [f"orders shipped to city number {i}" for i in range(200)] + ["customers from Mumbai"]
+    index = NGramIndex(merge_threshold=10 ** 9)
+    for text in texts:
+        index.add(text)
+
+    before = index.search("customers in mumbai", 3)
+    index._merge()
+    after = index.search("customers in mumbai", 3)
+
+    assert [doc for doc, _ in before] == [doc for doc, _ in after]
+    assert before[0][0] == len(texts) - 1
+
+
+def _service_with_store(tmp_path):
+    service = Text2SQLService()
+    service.examples = ExampleStore(str(tmp_path / "examples.db"))
+    return service
+
+
+def test_confirmed_examples_are_stored(tmp_path, monkeypatch):
+    service = _service_with_store(tmp_path)
+
+    async def valid(sql_query):
+        return True, None
+
+    monkeypatch.setattr(service.sql, "validate_sql_syntax", valid)
+    stored, _ = asyncio.run(service.confirm_example("Average rating of Books", "SELECT AVG(rating) FROM products;"))
+    assert stored
+    assert service.examples.top_k("average rating of books", k=1)[0].sql_query == "SELECT AVG(rating) FROM products;"
+
+
+def test_unsafe_sql_is_never_confirmed(tmp_path):
+    service = _service_with_store(tmp_path)
+
+    stored, message = asyncio.run(service.confirm_example("Remove all orders", "DELETE FROM orders;"))
+    assert not stored
+    assert message
+    assert len(service.examples) == len(SEED_EXAMPLES)
+
+
+def test_generated_sql_is_not_learned_by_default(tmp_path):
+    service = _service_with_store(tmp_path)
+    result = ExecuteSQLResponse(success=True, data=[{"n": 1}], row_count=1, execution_time_ms=1.0)
+
+    asyncio.run(service._learn_example("How many orders?", "SELECT COUNT(*) AS n FROM orders;", 0.99, result))
+    assert len(service.examples) == len(SEED_EXAMPLES)
@@ -0,0 +1,130 @@
+"""
+Tests for streaming NDJSON/CSV export
+"""
+import asyncio
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from app.database.connection import DatabaseManager
+from app.services import export_service as export_module
+from app.services.export_service import ExportError, ExportService
+
+ROW_COUNT = 5000
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    manager = DatabaseManager(str(tmp_path / "export.db"))
+    asyncio.run(manager.execute_script(
+        "CREATE TABLE orders (order_id INTEGER PRIMARY KEY, status TEXT, total_amount REAL);"
+        f"WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {ROW_COUNT}) "
+        "INSERT INTO orders SELECT i, CASE WHEN i % 2 THEN 'shipped' ELSE 'pending, late' END, i * 1.5 FROM n;"
+    ))
+    monkeypatch.setattr(export_module, "db_manager", manager)
+    yield manager
+    asyncio.run(manager.close())
+
+
+def _export(service, sql_query, **options) -> bytes:
+    async def run():
+        body = await service.open_export(sql_query, **options)
+        return b"".join([chunk async for chunk in body])
+    return asyncio.run(run())
+
+
+def test_stream_query_yields_columns_then_batches(manager):
+    async def run():
+        batches = []
+        rows = manager.stream_query("SELECT order_id FROM orders", batch_size=1000)
+        columns = await rows.__anext__()
+        async for batch in rows:
+            batches.append(len(batch))
+        return columns, batches
+
+    columns, batches = asyncio.run(run())
+    assert columns == ["order_id"]
+    assert batches == [1000] * 5
+
+
+def test_ndjson_export_streams_every_row(manager):
+    service = ExportService()
+    service.batch_size = 700
+    body = _export(service, "SELECT order_id, status, total_amount FROM orders ORDER BY order_id")
+
+    lines = body.decode().splitlines()
+    assert len(lines) == ROW_COUNT  # no /execute-sql row cap
+    assert json.loads(lines[1]) == {"order_id": 2, "status": "pending, late", "total_amount": 3.0}
+    stats = service.get_stats()
+    assert stats["completed"] == 1 and stats["rows_exported"] == ROW_COUNT and stats["active"] == 0
+
+
+def test_csv_export_with_gzip(manager):
+    body = _export(ExportService(), "SELECT order_id, status FROM orders", fmt="csv", compress=True)
+
+    rows = list(csv.reader(io.StringIO(gzip.decompress(body).decode())))
+    assert rows[0] == ["order_id", "status"]
+    assert rows[2] == ["2", "pending, late"]
+    assert len(rows) == ROW_COUNT + 1
+
+
+def test_unsafe_and_invalid_sql_fail_before_streaming(manager):
+    service = ExportService()
+    with pytest.raises(ExportError) as unsafe:
+        _export(service, "DELETE FROM orders")
+    with pytest.raises(ExportError) as invalid:
+        _export(service, "SELECT missing_column FROM orders")
+
+    assert unsafe.value.error_code == "UNSAFE_QUERY"
+    assert invalid.value.error_code == "EXECUTION_FAILED"
+    assert service.get_stats()["active"] == 0
+
+
+def test_slow_consumer_does_not_use_up_the_deadline(manager):
+    service = ExportService()
+    service.batch_size = 1000
+
+    async def run():
+        body = await service.open_export("SELECT order_id FROM orders", timeout_ms=50)
+        lines = 0
+        async for chunk in body:
+            lines += chunk.count(b"\n")
+            await asyncio.sleep(0.03)  # 5 batches x 30 ms > 50 ms deadline
+        return lines
+
+    assert asyncio.run(run()) == ROW_COUNT
+    assert service.get_stats()["timeouts"] == 0
+
+
+def test_abandoned_export_releases_its_connection(manager):
+    service = ExportService()
+    service.batch_size = 100
+
+    async def run():
+        body = await service.open_export("SELECT order_id FROM orders")
+        await body.__anext__()
+        await body.aclose()
+        return manager.get_pool_stats()
+
+    pool = asyncio.run(run())
+    stats = service.get_stats()
+    assert stats["active"] == 0
+    assert stats["disconnects"] == 1
+    assert pool["in_use"] == 0
+
+
+def test_concurrent_export_limit(manager):
+    service = ExportService()
+    service.max_concurrent = 1
+
+    async def run():
+        first = await service.open_export("SELECT order_id FROM orders")
+        with pytest.raises(ExportError) as busy:
+            await service.open_export("SELECT order_id FROM orders")
+        await first.aclose()
+        return busy.value
+
+    assert asyncio.run(run()).error_code == "EXPORT_BUSY"
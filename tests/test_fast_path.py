@@ -0,0 +1,68 @@
+"""
+Tests for the rule-based fast path
+"""
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from app.services.fast_path import FastPathEngine
+from app.services.schema_linker import SchemaCatalog
+
+
+DATABASE_DIR = Path(__file__).parent.parent / "app" / "database"
+
+
+@pytest.fixture(scope="module")
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript((DATABASE_DIR / "schema.sql").read_text())
+    conn.executescript((DATABASE_DIR / "seed_data.sql").read_text())
+    return conn
+
+
+@pytest.fixture(scope="module")
+def engine(conn):
+    def execute(query):
+        return [dict(row) for row in conn.execute(query).fetchall()]
+
+    return FastPathEngine(SchemaCatalog.load(execute, ["customers", "products", "orders", "order_items"]))
+
+
+@pytest.mark.parametrize("question, rule", [
+    ("Show all customers from Mumbai", "customers_by_location"),
+    ("customers in maharashtra", "customers_by_location"),
+    ("What are the top 5 most expensive products?", "top_products"),
+    ("top 3 cheapest Electronics products", "top_products"),
+    ("Top 10 products by rating", "top_products"),
+    ("List delivered orders", "orders_by_status"),
+    ("orders with status shipped", "orders_by_status"),
+    ("Show total sales by category", "sales_by_category"),
+    ("How many products are there?", "count_table"),
+])
+def test_recognized_shapes_produce_valid_sql(engine, conn, question, rule):
+    result = engine.match(question)
+    assert result is not None and result.rule == rule
+    conn.execute(result.sql_query).fetchall()
+
+
+@pytest.mark.parametrize("question", [
+    "Find customers who spent more than 50000 INR",
+    "customers from Atlantis",
+    "show all orders",
+    "top 5 most expensive widgets products",
+])
+def test_unrecognized_questions_fall_through(engine, question):
+    assert engine.match(question) is None
+
+
+def test_values_are_taken_from_the_catalog(engine):
+    result = engine.match("customers from mumbai")
+    assert "city = 'Mumbai'" in result.sql_query
+
+
+def test_stats_track_hit_rate(engine):
+    stats = engine.get_stats()
+    assert stats["attempts"] >= stats["hits"] > 0
+    assert 0.0 < stats["hit_rate"] <= 1.0
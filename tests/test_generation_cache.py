@@ -0,0 +1,78 @@
+"""
+Tests for the two-tier NL->SQL generation cache
+"""
+import asyncio
+
+from app.services.generation_cache import GenerationCache, normalize_question
+from app.utils.lru import LRUCache
+
+
+SCHEMA = "Table: customers\nColumns: customer_id (INTEGER), city (TEXT)"
+
+
+def test_normalize_question():
+    assert normalize_question("  Top 5 most   EXPENSIVE products?? ") == "top 5 most expensive products"
+    assert normalize_question("Sales, by category!") == normalize_question("sales by category")
+
+
+def test_normalize_question_keeps_operators_and_signs():
+    assert normalize_question("Products with price > 5000?") != normalize_question("Products with price < 5000?")
+    assert normalize_question("orders with discount -5") != normalize_question("orders with discount 5")
+    assert normalize_question("rating >= 4.5") == normalize_question("Rating>=4.5.")
+    assert normalize_question("rating >= 4.5") != normalize_question("rating >= 45")
+    assert normalize_question("status != 'delivered'") == "status != delivered"
+
+
+def test_lru_eviction_and_ttl():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+    expiring = LRUCache(maxsize=2, ttl_seconds=-1)
+    expiring.set("a", 1)
+    assert expiring.get("a") is None
+    assert expiring.expirations == 1
+
+
+def test_memory_hit_for_equivalent_questions():
+    cache = GenerationCache(disk_path=None)
+
+    async def run():
+        await cache.put("Top 5 expensive products", SCHEMA, "SELECT 1;", "explanation", 0.9)
+        return await cache.get("top 5 expensive products?", SCHEMA)
+
+    cached = asyncio.run(run())
+    assert cached.sql_query == "SELECT 1;"
+    assert cached.confidence == 0.9
+    assert cache.get_stats()["memory"]["hits"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+
+    asyncio.run(GenerationCache(disk_path=path).put("sales by category", SCHEMA, "SELECT 2;", None, 0.8))
+
+    restarted = GenerationCache(disk_path=path)
+    cached = asyncio.run(restarted.get("Sales by category", SCHEMA))
+    assert cached is not None and cached.sql_query == "SELECT 2;"
+    assert restarted.get_stats()["disk_hits"] == 1
+
+
+def test_schema_change_invalidates(tmp_path):
+    cache = GenerationCache(disk_path=str(tmp_path / "cache.db"))
+
+    async def run():
+        await cache.put("customers from mumbai", SCHEMA, "SELECT 3;", None, 0.9)
+        miss = await cache.get("customers from mumbai", SCHEMA + "\nTable: suppliers")
+        again = await cache.get("customers from mumbai", SCHEMA)
+        return miss, again
+
+    miss, again = asyncio.run(run())
+    assert miss is None
+    assert again is None
+    assert cache.get_stats()["invalidations"] >= 1
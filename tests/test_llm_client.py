@@ -0,0 +1,77 @@
+"""
+Tests for the async LLM client layer
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.services.llm_client import AsyncLLMClient, LLMTimeoutError
+
+
+class SlowModel:
+    """Blocking fake model"""
+
+    def __init__(self, latency_s: float):
+        self.latency_s = latency_s
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency_s)
+        return "SELECT 1;"
+
+
+def test_concurrent_calls_overlap():
+    """Concurrent calls should overlap instead of serializing"""
+    client = AsyncLLMClient(SlowModel(0.1), max_concurrency=8)
+
+    async def run():
+        start = time.perf_counter()
+        results = await asyncio.gather(*(client.generate("p") for _ in range(8)))
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(run())
+    assert results == ["SELECT 1;"] * 8
+    assert elapsed < 0.5
+    assert client.get_stats()["completed"] == 8
+
+
+def test_concurrency_limit_is_enforced():
+    """Calls beyond the limit should queue"""
+    client = AsyncLLMClient(SlowModel(0.05), max_concurrency=2)
+
+    async def run():
+        start = time.perf_counter()
+        await asyncio.gather(*(client.generate("p") for _ in range(4)))
+        return time.perf_counter() - start
+
+    assert asyncio.run(run()) >= 0.1
+
+
+def test_timeout_raises():
+    """Slow calls should time out with a dedicated error"""
+    client = AsyncLLMClient(SlowModel(0.3), max_concurrency=1)
+
+    with pytest.raises(LLMTimeoutError):
+        asyncio.run(client.generate("p", timeout=0.05))
+    assert client.get_stats()["timeouts"] == 1
+
+
+def test_event_loop_stays_responsive():
+    """Other coroutines should keep running while a generation is in flight"""
+    client = AsyncLLMClient(SlowModel(0.2), max_concurrency=1)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await client.generate("p")
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 5
@@ -0,0 +1,101 @@
+"""
+Tests for stage spans, counters and the Prometheus text export
+"""
+import asyncio
+
+import pytest
+
+from app.database.connection import DatabaseManager
+from app.services import sql_service as sql_service_module
+from app.services.result_cache import ResultCache
+from app.services.sql_service import SQLService
+from app.services.text2sql_service import Text2SQLService
+from app.utils import metrics as metrics_module
+from app.utils.metrics import MetricsRegistry, collect_timings
+
+
+def test_render_counters_and_histograms():
+    registry = MetricsRegistry(buckets=(0.01, 0.1))
+    registry.inc("text2sql_cache_hits_total", cache="result")
+    registry.inc("text2sql_cache_hits_total", 2, cache="result")
+    registry.record_stage("llm_call", 0.05)
+    registry.record_stage("llm_call", 0.5)
+
+    text = registry.render()
+    assert '# TYPE text2sql_cache_hits_total counter' in text
+    assert 'text2sql_cache_hits_total{cache="result"} 3' in text
+    assert 'text2sql_stage_duration_seconds_bucket{stage="llm_call",le="0.01"} 0' in text
+    assert 'text2sql_stage_duration_seconds_bucket{stage="llm_call",le="0.1"} 1' in text
+    assert 'text2sql_stage_duration_seconds_bucket{stage="llm_call",le="+Inf"} 2' in text
+    assert 'text2sql_stage_duration_seconds_sum{stage="llm_call"} 0.55' in text
+    assert 'text2sql_stage_duration_seconds_count{stage="llm_call"} 2' in text
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc("text2sql_errors_total", stage='say "hi"\n')
+    assert 'stage="say \\"hi\\"\\n"' in registry.render()
+
+
+def test_disabled_registry_still_collects_request_timings():
+    registry = MetricsRegistry(enabled=False)
+    with registry.span("sql_execute"):
+        pass
+    registry.inc("text2sql_cache_hits_total", cache="result")
+    assert registry.render() == ""
+
+    with collect_timings() as timings:
+        with registry.span("sql_execute"):
+            pass
+        with registry.span("sql_execute"):
+            pass
+    assert list(timings) == ["sql_execute"]
+    assert registry.render() == ""
+
+
+class FakeLLM:
+    async def generate_sql(self, natural_query):
+        with metrics_module.metrics.span("llm_call"):
+            await asyncio.sleep(0)
+        return "SELECT label FROM items WHERE item_id = 1", "Looks up one item", 0.9
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    manager = DatabaseManager(str(tmp_path / "metrics.db"))
+    asyncio.run(manager.execute_script(
+        "CREATE TABLE items (item_id INTEGER PRIMARY KEY, label TEXT);"
+        "INSERT INTO items VALUES (1, 'one'), (2, 'two');"
+    ))
+    monkeypatch.setattr(sql_service_module, "db_manager", manager)
+    registry = MetricsRegistry()
+    for module in (metrics_module, sql_service_module):
+        monkeypatch.setattr(module, "metrics", registry)
+    monkeypatch.setattr("app.services.text2sql_service.metrics", registry)
+    service = Text2SQLService()
+    service.llm = FakeLLM()
+    service.sql = SQLService()
+    service.sql.cache = ResultCache(max_bytes=1024 * 1024, max_entries=16, ttl_seconds=60)
+    yield service, registry
+    asyncio.run(manager.close())
+
+
+def test_query_returns_stage_breakdown_on_request(service):
+    service, registry = service
+
+    async def run():
+        plain = await service.process_natural_language_query("item one")
+        timed = await service.process_natural_language_query("item one", include_timings=True)
+        return plain, timed
+
+    plain, timed = asyncio.run(run())
+    assert plain.timings_ms is None
+    assert timed.success and timed.data == [{"label": "one"}]
+    assert {"llm_call", "safety_check", "result_cache", "format", "explanation", "total"} <= set(timed.timings_ms)
+    assert timed.timings_ms["total"] >= timed.timings_ms["llm_call"]
+
+    text = registry.render()
+    assert 'text2sql_queries_total{endpoint="query",outcome="success"} 2' in text
+    assert 'text2sql_cache_misses_total{cache="result"} 1' in text
+    assert 'text2sql_cache_hits_total{cache="result"} 1' in text
+    assert 'text2sql_stage_duration_seconds_count{stage="sql_execute"} 1' in text
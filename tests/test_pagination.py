@@ -0,0 +1,136 @@
+"""
+Tests for keyset and snapshot cursor pagination
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.database.connection import DatabaseManager
+from app.services import sql_service as sql_service_module
+from app.services.pagination import KeysetSpec, encode_cursor, keyset_query
+from app.services.sql_service import SQLService
+from app.services.text2sql_service import Text2SQLService
+from app.utils.sql_analysis import analyze_sql
+
+ROW_COUNT = 1050
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    manager = DatabaseManager(str(tmp_path / "pages.db"))
+    asyncio.run(manager.execute_script(
+        "CREATE TABLE items (item_id INTEGER PRIMARY KEY, price REAL NOT NULL, rating REAL, sku TEXT NOT NULL);"
+        "CREATE INDEX idx_items_price ON items(price);"
+        "CREATE UNIQUE INDEX idx_items_sku ON items(sku);"
+        f"WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {ROW_COUNT}) "
+        "INSERT INTO items SELECT i, (i * 37) % 100, CASE WHEN i % 3 THEN i % 5 END, printf('SKU-%05d', i) FROM n;"
+    ))
+    monkeypatch.setattr(sql_service_module, "db_manager", manager)
+    service = SQLService()
+    service.max_result_rows = 100
+    yield service
+    asyncio.run(manager.close())
+
+
+def _all_pages(service, sql_query):
+    async def run():
+        first = await service.execute_sql_query(sql_query)
+        rows = list(first.data)
+        cursor = await service.page_cursor(sql_query, first.data, analysis=analyze_sql(sql_query))
+        pages = 1
+        while cursor:
+            page = await service.fetch_page(cursor)
+            assert page.success, page.error_message
+            rows.extend(page.data)
+            cursor = page.next_cursor
+            pages += 1
+        expected = await sql_service_module.db_manager.execute_query(sql_query)
+        return rows, expected, pages
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("sql_query", [
+    "SELECT * FROM items ORDER BY item_id;",
+    "SELECT item_id, price FROM items ORDER BY price DESC, item_id DESC -- newest last",
+    "SELECT i.sku, i.price FROM items i WHERE i.price > 10 ORDER BY i.sku",
+])
+def test_keyset_pages_cover_the_result_in_order(service, sql_query):
+    rows, expected, pages = _all_pages(service, sql_query)
+
+    assert rows == expected
+    assert pages > 1
+    stats = service.paginator.get_stats()
+    assert stats["keyset_pages"] == pages - 1
+    assert stats["snapshots_built"] == 0
+
+
+@pytest.mark.parametrize("sql_query", [
+    "SELECT * FROM items ORDER BY rating, item_id",               # nullable key column
+    "SELECT item_id, price FROM items ORDER BY price",             # not unique
+    "SELECT item_id, price FROM items ORDER BY price ASC, item_id DESC",
+    "SELECT price AS item_id FROM items ORDER BY item_id",        # alias shadows the key
+    "SELECT * FROM items",                                        # no ORDER BY
+])
+def test_other_queries_page_through_a_snapshot(service, sql_query):
+    rows, expected, pages = _all_pages(service, sql_query)
+
+    assert rows == expected
+    stats = service.paginator.get_stats()
+    assert stats["keyset_pages"] == 0
+    assert stats["snapshot_pages"] == pages - 1
+    assert stats["snapshots_built"] == 1
+
+
+def test_keyset_page_is_an_index_seek(service):
+    spec = KeysetSpec(["price", "item_id"], descending=True)
+    plan = asyncio.run(sql_service_module.db_manager.execute_query(
+        "EXPLAIN QUERY PLAN " + keyset_query("SELECT item_id, price FROM items ORDER BY price DESC, item_id DESC",
+                                             spec),
+        (50.0, 500)
+    ))
+    assert any(step["detail"].startswith("SEARCH") and "idx_items_price" in step["detail"] for step in plan)
+
+
+def test_invalid_and_expired_cursors(service):
+    async def run():
+        first = await service.execute_sql_query("SELECT * FROM items ORDER BY item_id")
+        cursor = await service.page_cursor("SELECT * FROM items ORDER BY item_id", first.data)
+        body, signature = cursor.split(".")
+        tampered = await service.fetch_page(body[:-2] + "xx." + signature)
+        expired = await service.fetch_page(encode_cursor(
+            {"q": "SELECT * FROM items", "m": "snapshot", "o": 100, "v": [0], "e": int(time.time()) - 1},
+            service.settings.SECRET_KEY
+        ))
+        return tampered, expired
+
+    tampered, expired = asyncio.run(run())
+    assert tampered.error_code == "INVALID_CURSOR"
+    assert expired.error_code == "CURSOR_EXPIRED"
+
+
+def test_snapshot_cursor_detects_changed_data(service):
+    manager = sql_service_module.db_manager
+
+    async def run():
+        first = await service.execute_sql_query("SELECT * FROM items")
+        cursor = await service.page_cursor("SELECT * FROM items", first.data)
+        await manager.execute_script("DELETE FROM items WHERE item_id = 1")
+        return await service.fetch_page(cursor)
+
+    assert asyncio.run(run()).error_code == "RESULTS_CHANGED"
+
+
+def test_truncated_response_carries_next_cursor(service):
+    text2sql = Text2SQLService()
+    text2sql.sql = service
+
+    async def run():
+        first = await text2sql.execute_sql_query("SELECT * FROM items ORDER BY item_id")
+        second = await text2sql.fetch_next_page(first.next_cursor)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.truncated and first.next_cursor
+    assert [row["item_id"] for row in second.data] == list(range(101, 201))
+    assert second.next_cursor
@@ -0,0 +1,82 @@
+"""
+Tests for the streaming quantile sketch and query analytics
+"""
+import random
+
+import numpy as np
+import pytest
+
+from app.services.text2sql_service import Text2SQLService
+from app.utils.quantiles import LatencyStats, QuantileSketch
+
+
+def test_quantiles_are_within_the_relative_accuracy():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(3, 1.5) for _ in range(50000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    estimates = sketch.quantiles((0.5, 0.95, 0.99))
+    for q, expected in zip((0.5, 0.95, 0.99), np.quantile(values, (0.5, 0.95, 0.99), method="lower")):
+        assert estimates[q] == pytest.approx(expected, rel=0.02)
+    assert sketch.count == 50000
+    assert len(sketch.buckets) < 1000
+
+
+def test_edge_cases():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None
+
+    for value in (0.0, 0.0, 0.0, 10.0):
+        sketch.add(value)
+    assert sketch.quantile(0.5) == 0.0
+    assert sketch.quantile(1.0) == 10.0
+
+    bounded = QuantileSketch(max_buckets=8)
+    for value in range(1, 1000):
+        bounded.add(float(value))
+    assert len(bounded.buckets) == 8
+    assert bounded.quantile(0.99) == pytest.approx(989, rel=0.02)
+
+
+def test_merge_matches_a_single_sketch():
+    first, second, combined = QuantileSketch(), QuantileSketch(), QuantileSketch()
+    for value in range(1, 2001):
+        (first if value % 2 else second).add(float(value))
+        combined.add(float(value))
+    first.merge(second)
+
+    assert first.count == combined.count
+    assert first.quantiles() == combined.quantiles()
+
+
+def test_latency_stats_summary():
+    stats = LatencyStats()
+    stats.record(10.0)
+    stats.record(30.0, success=False)
+    stats.record(None)
+
+    summary = stats.summary()
+    assert summary["count"] == 3
+    assert summary["success_rate"] == pytest.approx(2 / 3)
+    assert summary["latency_ms"]["mean"] == 20.0
+    assert set(summary["latency_ms"]) == {"mean", "p50", "p95", "p99"}
+
+
+def test_history_is_bounded_but_aggregates_cover_all_traffic():
+    service = Text2SQLService()
+    service.query_history = type(service.query_history)(maxlen=5)
+    for i in range(50):
+        service._add_to_history({
+            "type": "execute_sql", "success": i % 10 != 0, "execution_time_ms": float(i + 1), "timestamp": 0
+        })
+
+    analytics = service.get_traffic_analytics()
+    execute = analytics["endpoints"]["execute_sql"]
+    assert len(service.query_history) == 5
+    assert analytics["total_queries"] == 50
+    assert analytics["failed_queries"] == 5
+    assert execute["success_rate"] == 0.9
+    assert execute["latency_ms"]["p50"] == pytest.approx(25, rel=0.02)
+    assert execute["latency_ms"]["p99"] == pytest.approx(49, rel=0.02)
@@ -0,0 +1,111 @@
+"""
+Tests for the append-only query log
+"""
+import asyncio
+import threading
+
+import pytest
+
+from app.database.connection import DatabaseManager
+from app.services import sql_service as sql_service_module
+from app.services.query_log import QueryLog, iter_query_log
+from app.services.result_cache import ResultCache
+from app.services.sql_service import SQLService
+from app.services.text2sql_service import Text2SQLService
+
+
+def test_records_are_batched_and_read_back_in_order(tmp_path):
+    path = str(tmp_path / "logs" / "queries.jsonl")
+    log = QueryLog(path, batch_size=50, flush_interval=0.05)
+    for i in range(120):
+        assert log.append({"i": i, "question": f"q{i}"})
+    log.close()
+
+    assert [record["i"] for record in iter_query_log(path)] == list(range(120))
+    stats = log.get_stats()
+    assert stats["written"] == 120
+    assert stats["batches"] < 120
+    assert stats["pending"] == 0
+
+
+def test_rotation_keeps_backups_in_order(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    log = QueryLog(path, max_bytes=200, backups=2, batch_size=1, flush_interval=0.01)
+    for i in range(30):
+        log.append({"i": i, "padding": "x" * 40})
+    log.close()
+
+    assert (tmp_path / "queries.jsonl.2").exists()
+    assert not (tmp_path / "queries.jsonl.3").exists()
+    records = [record["i"] for record in iter_query_log(path)]
+    assert records == sorted(records)
+    assert records[-1] == 29
+    assert [record["i"] for record in iter_query_log(path, include_rotated=False)][-1] == 29
+    assert log.get_stats()["rotations"] > 0
+
+
+def test_truncated_lines_are_skipped(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    path.write_text('{"i": 0}\n{"i": 1}\n{"i": 2, "quest', encoding="utf-8")
+    assert [record["i"] for record in iter_query_log(str(path))] == [0, 1]
+
+
+def test_append_never_blocks_when_the_writer_falls_behind(tmp_path):
+    log = QueryLog(str(tmp_path / "queries.jsonl"), max_pending=5, flush_interval=0.01)
+    blocked = threading.Event()
+    original_write = log._write
+
+    def slow_write(batch):
+        blocked.wait(2)
+        original_write(batch)
+
+    log._write = slow_write
+    results = [log.append({"i": i}) for i in range(50)]
+    blocked.set()
+    log.close()
+
+    assert not all(results)
+    assert log.get_stats()["dropped"] == results.count(False)
+    assert QueryLog(None).append({"i": 0}) is False
+
+
+class FakeLLM:
+    async def generate_sql(self, natural_query):
+        return "SELECT label FROM items WHERE item_id = 1", "Looks up one item", 0.9
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    manager = DatabaseManager(str(tmp_path / "log.db"))
+    asyncio.run(manager.execute_script(
+        "CREATE TABLE items (item_id INTEGER PRIMARY KEY, label TEXT);"
+        "INSERT INTO items VALUES (1, 'one'), (2, 'two');"
+    ))
+    monkeypatch.setattr(sql_service_module, "db_manager", manager)
+    service = Text2SQLService()
+    service.llm = FakeLLM()
+    service.sql = SQLService()
+    service.sql.cache = ResultCache(max_bytes=1024 * 1024, max_entries=16, ttl_seconds=60)
+    yield service
+    asyncio.run(manager.close())
+
+
+def test_pipeline_runs_are_logged(service, tmp_path, monkeypatch):
+    log = QueryLog(str(tmp_path / "queries.jsonl"), flush_interval=0.01)
+    monkeypatch.setattr("app.services.text2sql_service.query_log", log)
+
+    async def run():
+        await service.process_natural_language_query("item one")
+        return await service.process_natural_language_query("item one")
+
+    response = asyncio.run(run())
+    log.close()
+
+    assert response.sql_query is None  # include_sql was not requested
+    first, second = iter_query_log(log.path)
+    assert first["question"] == "item one"
+    assert first["sql_query"] == "SELECT label FROM items WHERE item_id = 1"
+    assert first["success"] and first["row_count"] == 1
+    assert {"safety_check", "sql_execute", "total"} <= set(first["timings_ms"])
+    assert first["cache_hits"] == []
+    assert second["cache_hits"] == ["result"]
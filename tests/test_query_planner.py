@@ -0,0 +1,171 @@
+"""
+Tests for the EXPLAIN QUERY PLAN cost estimator and admission control
+"""
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.database.connection import DatabaseManager
+from app.services import sql_service as sql_service_module
+from app.services.query_planner import QueryPlanner, estimate_cost, parse_plan_step, parse_query_plan
+from app.services.sql_service import SQLService
+from app.services.text2sql_service import Text2SQLService
+from app.utils.sql_analysis import analyze_sql
+
+SCHEMA = (Path(__file__).resolve().parent.parent / "app" / "database" / "schema.sql").read_text()
+DATA = """
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 400)
+INSERT INTO customers (customer_id, first_name, last_name, email, city, state, registration_date)
+SELECT i, 'First' || i, 'Last' || i, 'c' || i || '@example.com', 'City' || (i % 20), 'State', '2023-01-01' FROM n;
+WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 1200)
+INSERT INTO orders (order_id, customer_id, order_date, order_status, shipping_address, total_amount_inr,
+                    payment_method, payment_status)
+SELECT i, 1 + i % 400, '2024-01-01', 'delivered', 'Address', i * 10.0, 'upi', 'completed' FROM n;
+"""
+CROSS_JOIN = "SELECT COUNT(*) AS n FROM orders a, orders b, orders c"
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "planner.db"))
+    assert asyncio.run(manager.execute_script(SCHEMA + DATA))
+    yield manager
+    asyncio.run(manager.close())
+
+
+def test_plan_step_classification():
+    search = parse_plan_step(3, 0, "SEARCH o USING INDEX idx_orders_customer_id (customer_id=?)")
+    assert (search.operation, search.table, search.index) == ("search", "o", "idx_orders_customer_id")
+    assert not search.unique_lookup
+    assert parse_plan_step(2, 0, "SEARCH customers USING INTEGER PRIMARY KEY (rowid=?)").unique_lookup
+    assert parse_plan_step(2, 0, "SEARCH orders USING INTEGER PRIMARY KEY (rowid>?)").range_lookup
+    covering = parse_plan_step(4, 0, "SCAN customers USING COVERING INDEX idx_customers_city")
+    assert covering.operation == "scan" and covering.covering
+    assert parse_plan_step(9, 0, "USE TEMP B-TREE FOR RIGHT PART OF ORDER BY").purpose == "ORDER BY"
+    assert parse_plan_step(5, 0, "CORRELATED SCALAR SUBQUERY 1").correlated
+    assert parse_plan_step(1, 0, "SCAN CONSTANT ROW").operation == "other"
+
+
+def test_plan_uses_cached_row_counts(manager):
+    planner = QueryPlanner(manager)
+
+    async def run():
+        join = await planner.plan(
+            "SELECT c.first_name, o.total_amount_inr FROM customers c JOIN orders o "
+            "ON c.customer_id = o.customer_id WHERE c.city = 'City3' ORDER BY o.order_date LIMIT 50"
+        )
+        correlated = await planner.plan(
+            "SELECT c.first_name FROM customers c WHERE "
+            "(SELECT COUNT(*) FROM orders o WHERE o.customer_id = c.customer_id) > 2"
+        )
+        cross = await planner.plan(CROSS_JOIN)
+        return join, correlated, cross
+
+    join, correlated, cross = asyncio.run(run())
+    assert set(join.index_searches) == {"customers", "orders"}
+    assert join.temp_btrees == ["ORDER BY"]
+    assert join.estimated_rows <= 50
+    assert join.table_rows == {"customers": 400, "orders": 1200}
+
+    assert correlated.full_scans == ["customers"]
+    assert correlated.correlated_subqueries == 1
+    # One outer row per customer passes the filter estimate; the subquery aggregate is not the result
+    assert correlated.estimated_rows > 1
+
+    assert cross.full_scans == ["orders", "orders", "orders"]
+    assert cross.cost >= 1200 ** 3
+    assert cross.estimated_rows == 1
+
+
+def test_plans_refresh_after_writes(manager):
+    planner = QueryPlanner(manager)
+
+    async def run():
+        before = await planner.plan("SELECT * FROM orders")
+        await manager.execute_script("DELETE FROM orders WHERE order_id > 100;")
+        after = await planner.plan("SELECT * FROM orders")
+        return before, after
+
+    before, after = asyncio.run(run())
+    assert before.table_rows["orders"] == 1200
+    assert after.table_rows["orders"] == 100
+
+
+def test_over_budget_queries_are_rejected(manager, monkeypatch):
+    monkeypatch.setattr(sql_service_module, "db_manager", manager)
+    service = SQLService()
+    service.cost_budget = 1_000_000
+    service.cost_action = "reject"
+
+    result = asyncio.run(service.execute_sql_query(CROSS_JOIN))
+    assert not result.success
+    assert result.error_code == "QUERY_TOO_EXPENSIVE"
+    assert "full scans of orders" in result.error_message
+    assert service.get_stats()["over_budget"] == 1
+
+    cheap = asyncio.run(service.execute_sql_query("SELECT first_name FROM customers WHERE customer_id = 7"))
+    assert cheap.success
+
+
+def test_over_budget_queries_are_downgraded(manager, monkeypatch):
+    monkeypatch.setattr(sql_service_module, "db_manager", manager)
+    service = SQLService()
+    service.cost_budget = 1_000_000
+    service.cost_action = "downgrade"
+    service.downgrade_timeout = 0.05
+
+    result = asyncio.run(service.execute_sql_query(CROSS_JOIN, timeout=30))
+    # The downgraded deadline, not the requested 30 s, stops the query
+    assert result.error_code == "QUERY_TIMEOUT"
+    assert result.execution_time_ms < 5000
+    assert service.get_stats()["downgraded"] == 1
+
+
+def test_automatic_indexes_are_costed():
+    step = parse_plan_step(3, 0, "SEARCH o USING AUTOMATIC COVERING INDEX (customer_id=?)")
+    assert step.operation == "search" and step.automatic_index
+    assert step.index is None
+
+    analysis = analyze_sql("SELECT * FROM customers c JOIN orders o ON c.customer_id = o.customer_id")
+    rows = [
+        {"id": 2, "parent": 0, "detail": "SCAN c"},
+        {"id": 3, "parent": 0, "detail": "SEARCH o USING AUTOMATIC COVERING INDEX (customer_id=?)"},
+    ]
+    plan = estimate_cost(parse_query_plan(rows, analysis.aliases), analysis, {"customers": 10, "orders": 100000})
+    assert plan.automatic_indexes == ["orders"]
+    # Building the index sorts the whole table once
+    assert plan.cost > 100000 * 16
+
+
+def test_row_counts_are_estimated_without_counting(manager):
+    planner = QueryPlanner(manager)
+    queries = []
+    execute_query = manager.execute_query
+
+    async def recording_execute_query(query, params=None):
+        queries.append(query)
+        return await execute_query(query, params)
+
+    manager.execute_query = recording_execute_query
+    plan = asyncio.run(planner.plan("SELECT * FROM orders"))
+    assert plan.table_rows == {"orders": 1200}
+    assert not any("COUNT(" in query.upper() for query in queries)
+
+
+def test_generate_sql_skips_planning_unsafe_sql(monkeypatch):
+    service = Text2SQLService()
+    planned = []
+
+    async def fake_generate(question):
+        return "SELECT * FROM customers; DROP TABLE customers;", "explanation", 0.9
+
+    async def fake_plan(sql_query, analysis=None):
+        planned.append(sql_query)
+
+    monkeypatch.setattr(service.llm, "generate_sql", fake_generate)
+    monkeypatch.setattr(service.sql, "plan_query", fake_plan)
+    response = asyncio.run(service.generate_sql_from_text("drop everything"))
+    assert planned == []
+    assert response.query_plan is None
+    assert response.within_budget is None
@@ -0,0 +1,69 @@
+"""
+Tests for per-query deadlines enforced by the SQLite progress handler
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.database.connection import DatabaseManager, QueryTimeoutError
+from app.services import sql_service as sql_service_module
+from app.services.sql_service import SQLService
+
+RUNAWAY_QUERY = "SELECT COUNT(*) AS n FROM items a, items b, items c"
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "timeout.db"))
+    asyncio.run(manager.execute_script(
+        "CREATE TABLE items (item_id INTEGER PRIMARY KEY);"
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 2000) "
+        "INSERT INTO items SELECT i FROM n;"
+    ))
+    yield manager
+    asyncio.run(manager.close())
+
+
+def test_runaway_query_is_interrupted(manager):
+    async def run():
+        started = time.perf_counter()
+        with pytest.raises(QueryTimeoutError) as info:
+            await manager.execute_query_limited(RUNAWAY_QUERY, max_rows=10, timeout=0.2)
+        elapsed = time.perf_counter() - started
+        # The same pooled connection keeps working, without a deadline
+        rows, _ = await manager.execute_query_limited("SELECT COUNT(*) AS n FROM items", max_rows=10)
+        return info.value, elapsed, rows
+
+    error, elapsed, rows = asyncio.run(run())
+    assert error.timeout_seconds == 0.2
+    assert error.elapsed_ms >= 200
+    assert elapsed < 2
+    assert rows == [{"n": 2000}]
+
+
+def test_service_returns_structured_timeout(manager, monkeypatch):
+    monkeypatch.setattr(sql_service_module, "db_manager", manager)
+    service = SQLService()
+
+    result = asyncio.run(service.execute_sql_query(RUNAWAY_QUERY, timeout=0.1))
+    assert not result.success
+    assert result.error_code == "QUERY_TIMEOUT"
+    assert result.execution_time_ms >= 100
+    assert "time limit" in result.error_message
+
+    stats = service.get_stats()
+    assert stats["timeouts"] == 1
+    assert stats["timeout_rate"] == 1.0
+
+
+def test_timeout_resolution_order():
+    service = SQLService()
+    service.query_timeout = 30
+    service.max_query_timeout = 60
+    service.endpoint_timeouts = {"execute_sql": 5, "query": None}
+
+    assert service.resolve_timeout("execute_sql") == 5
+    assert service.resolve_timeout("query") == 30
+    assert service.resolve_timeout("execute_sql", timeout_ms=250) == 0.25
+    assert service.resolve_timeout("query", timeout_ms=600000) == 60
@@ -0,0 +1,138 @@
+"""
+Tests for the data-version-aware result cache
+"""
+import asyncio
+import sqlite3
+
+import pytest
+
+from app.database.connection import DatabaseManager
+from app.services import sql_service as sql_service_module
+from app.services.result_cache import ResultCache
+from app.services.sql_service import SQLService, normalize_sql
+from app.utils.lru import LRUCache
+from app.utils.sql_analysis import analyze_sql
+
+
+def test_lru_evicts_by_bytes():
+    cache = LRUCache(maxsize=10, max_bytes=100)
+    cache.set("a", 1, size=40)
+    cache.set("b", 2, size=40)
+    cache.get("a")
+    cache.set("c", 3, size=40)
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.bytes == 80
+    assert not cache.set("huge", 4, size=101)
+    assert cache.get_stats()["evictions"] == 1
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    manager = DatabaseManager(str(tmp_path / "cache.db"))
+    asyncio.run(manager.execute_script(
+        "CREATE TABLE items (item_id INTEGER PRIMARY KEY, label TEXT);"
+        "INSERT INTO items VALUES (1, 'one'), (2, 'two');"
+    ))
+    monkeypatch.setattr(sql_service_module, "db_manager", manager)
+    service = SQLService()
+    service.cache = ResultCache(max_bytes=1024 * 1024, max_entries=16, ttl_seconds=60)
+    yield service, manager
+    asyncio.run(manager.close())
+
+
+def test_repeated_query_is_served_from_cache(service):
+    service, _ = service
+
+    async def run():
+        first = await service.execute_sql_query("SELECT * FROM items")
+        second = await service.execute_sql_query("SELECT *\n  FROM items;")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert not first.cached
+    assert second.cached
+    assert second.data == first.data
+    assert service.stats["executions"] == 1
+    assert service.cache.get_stats()["hits"] == 1
+
+
+def test_whitespace_inside_literals_is_significant(service):
+    service, manager = service
+    asyncio.run(manager.execute_script("INSERT INTO items VALUES (3, 'a b'), (4, 'a  b');"))
+
+    async def run():
+        single = await service.execute_sql_query("SELECT item_id FROM items WHERE label = 'a b'")
+        double = await service.execute_sql_query("SELECT item_id FROM items WHERE label = 'a  b'")
+        return single, double
+
+    single, double = asyncio.run(run())
+    assert single.data == [{"item_id": 3}]
+    assert double.data == [{"item_id": 4}]
+    assert not double.cached
+    assert normalize_sql("SELECT 'a  b' -- note\n;") == "SELECT 'a  b'"
+
+
+def test_writes_invalidate_cached_results(service):
+    service, manager = service
+
+    async def run():
+        before = await service.execute_sql_query("SELECT COUNT(*) AS n FROM items")
+        # Write from another connection, as an external loader would
+        conn = sqlite3.connect(manager.db_path)
+        conn.execute("INSERT INTO items VALUES (3, 'three')")
+        conn.commit()
+        conn.close()
+        after_external = await service.execute_sql_query("SELECT COUNT(*) AS n FROM items")
+        await manager.execute_script("INSERT INTO items VALUES (4, 'four');")
+        after_script = await service.execute_sql_query("SELECT COUNT(*) AS n FROM items")
+        return before, after_external, after_script
+
+    before, after_external, after_script = asyncio.run(run())
+    assert before.data == [{"n": 2}]
+    assert after_external.data == [{"n": 3}] and not after_external.cached
+    assert after_script.data == [{"n": 4}] and not after_script.cached
+    assert service.cache.get_stats()["stale"] == 2
+
+
+def test_failures_are_not_cached(service):
+    service, _ = service
+
+    async def run():
+        await service.execute_sql_query("SELECT missing_column FROM items")
+        return await service.execute_sql_query("SELECT missing_column FROM items")
+
+    result = asyncio.run(run())
+    assert not result.success
+    assert not result.cached
+    assert len(service.cache.memory) == 0
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT item_id, CURRENT_DATE AS today FROM items",
+    "SELECT item_id, datetime('now') AS seen_at FROM items",
+    "SELECT item_id, CURRENT_TIMESTAMP AS seen_at FROM items",
+    "SELECT item_id, date() AS today FROM items",
+])
+def test_non_deterministic_results_are_not_cached(service, sql):
+    service, _ = service
+
+    async def run():
+        await service.execute_sql_query(sql)
+        return await service.execute_sql_query(sql)
+
+    second = asyncio.run(run())
+    assert second.success
+    assert not second.cached
+    assert service.stats["executions"] == 2
+
+
+def test_date_functions_on_columns_stay_cacheable():
+    assert analyze_sql("SELECT DATE(order_date) FROM orders WHERE order_date > '2024-01-01'").is_deterministic
+    assert not analyze_sql("SELECT random() FROM orders").is_deterministic
+    assert not analyze_sql("SELECT * FROM orders WHERE order_date > DATE('now', '-7 days')").is_deterministic
+
+
+def test_data_version_is_read_off_the_event_loop(service):
+    _, manager = service
+    assert asyncio.run(manager.get_data_version()) == manager.data_version()
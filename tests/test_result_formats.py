@@ -0,0 +1,80 @@
+"""
+Tests for the columnar and binary response formats
+"""
+import json
+
+import pytest
+
+from app.utils.result_formats import (
+    FormatUnavailableError, column_metadata, columnar_payload, encode_payload, format_available, negotiate_format
+)
+
+ROWS = [
+    {"order_id": 1, "total_amount": 1500, "status": "shipped", "discount": None},
+    {"order_id": 2, "total_amount": 249.5, "status": "pending", "discount": 10.0},
+]
+
+
+def test_column_metadata_types_and_currency_format():
+    columns = {column["name"]: column for column in column_metadata(ROWS)}
+
+    assert columns["order_id"]["type"] == "integer"
+    assert columns["total_amount"]["type"] == "real"  # integer then real widens
+    assert columns["total_amount"]["format"] == "currency"
+    assert columns["total_amount"]["currency"] == "INR"
+    assert "format" not in columns["order_id"]
+    assert columns["discount"]["type"] == "real"
+
+
+def test_columnar_payload_lists_columns_once():
+    payload = columnar_payload({"success": True, "row_count": 2, "data": ROWS})
+
+    assert [column["name"] for column in payload["columns"]] == ["order_id", "total_amount", "status", "discount"]
+    assert payload["data"] == [[1, 2], [1500, 249.5], ["shipped", "pending"], [None, 10.0]]
+    assert payload["format"] == "columnar"
+    assert payload["row_count"] == 2
+
+
+def test_columnar_json_is_smaller_than_rows():
+    rows = [dict(ROWS[0], order_id=i) for i in range(100)]
+    row_body, _ = encode_payload({"data": rows}, "rows")
+    columnar_body, media_type = encode_payload({"data": rows}, "columnar")
+
+    assert media_type == "application/json"
+    assert len(columnar_body) < len(row_body) / 2
+    assert json.loads(columnar_body)["data"][0] == list(range(100))
+
+
+def test_format_negotiation():
+    assert negotiate_format(None) == "rows"
+    assert negotiate_format("Columnar") == "columnar"
+    assert negotiate_format(None, "application/vnd.apache.arrow.stream, application/json") == "arrow"
+    assert negotiate_format(None, "application/msgpack;q=0.9") == "msgpack"
+    with pytest.raises(ValueError):
+        negotiate_format("xml")
+
+
+@pytest.mark.parametrize("fmt, module", [("msgpack", "msgpack"), ("arrow", "pyarrow")])
+def test_binary_formats_need_their_library(fmt, module):
+    if format_available(fmt):
+        body, _ = encode_payload({"success": True, "data": ROWS}, fmt)
+        assert body
+    else:
+        with pytest.raises(FormatUnavailableError):
+            encode_payload({"success": True, "data": ROWS}, fmt)
+
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    body, _ = encode_payload({"success": True, "data": ROWS}, "msgpack")
+    assert msgpack.unpackb(body)["data"][2] == ["shipped", "pending"]
+
+
+def test_arrow_round_trip():
+    pa = pytest.importorskip("pyarrow")
+    body, _ = encode_payload({"success": True, "row_count": 2, "data": ROWS}, "arrow")
+    table = pa.ipc.open_stream(body).read_all()
+
+    assert table.column("total_amount").to_pylist() == [1500.0, 249.5]
+    assert table.schema.field("total_amount").metadata[b"currency"] == b"INR"
+    assert json.loads(table.schema.metadata[b"text2sql"])["row_count"] == 2
@@ -0,0 +1,64 @@
+"""
+Tests for bounded result fetching
+"""
+import asyncio
+
+import pytest
+
+from app.database.connection import DatabaseManager
+from app.services import sql_service as sql_service_module
+from app.services.sql_service import SQLService
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "limits.db"))
+    asyncio.run(manager.execute_script(
+        "CREATE TABLE items (item_id INTEGER PRIMARY KEY, label TEXT);"
+        "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 5000) "
+        "INSERT INTO items SELECT i, printf('item-%05d', i) FROM n;"
+    ))
+    yield manager
+    asyncio.run(manager.close())
+
+
+def test_fetch_stops_at_row_cap(manager):
+    rows, truncated = asyncio.run(manager.execute_query_limited("SELECT * FROM items", max_rows=100, batch_size=32))
+    assert truncated
+    assert len(rows) == 100
+    assert rows[-1]["item_id"] == 100
+
+
+def test_exact_fit_is_not_truncated(manager):
+    query = "SELECT * FROM items WHERE item_id <= 100"
+    rows, truncated = asyncio.run(manager.execute_query_limited(query, max_rows=100))
+    assert not truncated
+    assert len(rows) == 100
+
+
+def test_byte_budget_caps_rows(manager):
+    rows, truncated = asyncio.run(manager.execute_query_limited(
+        "SELECT * FROM items", max_rows=1000, max_bytes=2000
+    ))
+    assert truncated
+    assert 0 < len(rows) < 1000
+
+
+def test_service_reports_truncation(manager, monkeypatch):
+    monkeypatch.setattr(sql_service_module, "db_manager", manager)
+    service = SQLService()
+    service.max_result_rows = 250
+    service.count_truncated_rows = True
+
+    result = asyncio.run(service.execute_sql_query("SELECT item_id, label FROM items;"))
+    success, data, warning, _ = result
+    assert success
+    assert len(data) == 250
+    assert result.truncated
+    assert result.total_rows == 5000
+    assert "total: 5000 rows" in warning
+
+    small = asyncio.run(service.execute_sql_query("SELECT item_id FROM items LIMIT 10"))
+    assert not small.truncated
+    assert small.total_rows == 10
+    assert small.error_message is None
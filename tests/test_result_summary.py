@@ -0,0 +1,66 @@
+"""
+Tests for columnar result formatting and summary statistics
+"""
+import pytest
+
+from app.services.sql_service import SQLService
+from app.utils.result_summary import summarize_results
+
+ROWS = [
+    {"product_name": "Phone", "price_inr": 1000, "rating": None},
+    {"product_name": "Laptop", "price_inr": 2500.5, "rating": 4.5},
+    {"product_name": "Phone", "price_inr": None, "rating": 3.5},
+    {"product_name": None, "price_inr": 500, "rating": 4.0},
+]
+
+
+def legacy_format(results):
+    """The per-row, per-key loop the columnar formatter replaced"""
+    formatted_results = []
+    for row in results:
+        formatted_row = {}
+        for key, value in row.items():
+            formatted_row[key] = value
+            if key.endswith('_inr') or key.endswith('_price') or 'amount' in key.lower():
+                if isinstance(value, (int, float)):
+                    formatted_row[f"{key}_formatted"] = f"₹{value:,.2f}"
+        formatted_results.append(formatted_row)
+    return formatted_results
+
+
+def test_formatting_matches_the_per_row_loop():
+    service = SQLService()
+    formatted = service.format_sql_results(ROWS)
+
+    assert formatted == legacy_format(ROWS)
+    assert list(formatted[0]) == ["product_name", "price_inr", "price_inr_formatted", "rating"]
+    assert formatted[1]["price_inr_formatted"] == "₹2,500.50"
+    assert "price_inr_formatted" not in formatted[2]
+    assert service.format_sql_results([{"city": "Pune"}]) == [{"city": "Pune"}]
+
+
+def test_summary_statistics_cover_every_row():
+    summary = summarize_results(ROWS)
+    price = summary["statistics"]["price_inr"]
+
+    assert summary["currency_columns"] == ["price_inr"]
+    assert summary["numeric_columns"] == ["price_inr", "rating"]
+    assert price["type"] == "real"  # classified over all rows, not just the first
+    assert price["null_count"] == 1
+    assert price["min"] == 500 and price["max"] == 2500.5
+    assert price["sum"] == pytest.approx(4000.5)
+    assert price["mean"] == pytest.approx(1333.5)
+    assert price["percentiles"]["p50"] == 1000
+    assert summary["statistics"]["rating"]["null_count"] == 1
+    assert summary["statistics"]["product_name"] == {"type": "text", "null_count": 1, "distinct": 2}
+
+
+def test_mixed_and_empty_results():
+    assert summarize_results([])["row_count"] == 0
+
+    summary = summarize_results([{"value": 1}, {"value": "n/a"}])
+    assert summary["statistics"]["value"]["type"] == "text"
+    assert summary["numeric_columns"] == []
+
+    all_null = summarize_results([{"amount": None}])["statistics"]["amount"]
+    assert all_null == {"type": "null", "null_count": 1, "distinct": 0}
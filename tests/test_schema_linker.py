@@ -0,0 +1,59 @@
+"""
+Tests for schema linking and prompt pruning
+"""
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from app.services.schema_linker import SchemaCatalog, SchemaLinker, estimate_tokens
+
+
+SCHEMA_PATH = Path(__file__).parent.parent / "app" / "database" / "schema.sql"
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA_PATH.read_text())
+
+    def execute(query):
+        return [dict(row) for row in conn.execute(query).fetchall()]
+
+    return SchemaCatalog.load(execute, ["customers", "products", "orders", "order_items"])
+
+
+def test_catalog_reads_foreign_keys_and_enums(catalog):
+    assert set(catalog.tables) == {"customers", "products", "orders", "order_items"}
+    assert any(fk.table == "orders" and fk.ref_table == "customers" for fk in catalog.foreign_keys)
+    assert "delivered" in catalog.enum_values[("orders", "order_status")]
+
+
+def test_single_table_question(catalog):
+    linked = SchemaLinker(catalog).link("Show all customers from Mumbai")
+    assert linked.tables == ["customers"]
+    assert "Table: orders" not in linked.schema_block
+    assert "TABLE RELATIONSHIPS" not in linked.schema_block
+
+
+def test_bridge_tables_are_added_with_key_columns(catalog):
+    linked = SchemaLinker(catalog).link("Which customers bought Electronics products?")
+    assert linked.tables == ["customers", "products", "orders", "order_items"]
+    assert "shipping_address" not in linked.columns["orders"]
+    assert {"order_id", "customer_id"} <= linked.columns["orders"]
+
+
+def test_enum_values_link_columns(catalog):
+    linked = SchemaLinker(catalog).link("how many cancelled ones are there")
+    assert linked.tables == ["orders"]
+    assert "order_status" in linked.columns["orders"]
+
+
+def test_unrelated_question_falls_back_to_full_schema(catalog):
+    assert SchemaLinker(catalog).link("hello there") is None
+
+
+def test_pruned_block_is_smaller(catalog):
+    linked = SchemaLinker(catalog).link("top 5 most expensive products")
+    assert estimate_tokens(linked.schema_block) < estimate_tokens(catalog.render())
@@ -0,0 +1,88 @@
+"""
+Tests for single-flight coalescing of identical in-flight requests
+"""
+import asyncio
+
+import pytest
+
+from app.utils.singleflight import SingleFlight
+from app.services.text2sql_service import Text2SQLService
+
+
+def test_concurrent_duplicates_share_one_call():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(50)))
+
+    assert asyncio.run(run()) == ["result"] * 50
+    assert calls == 1
+    assert flight.get_stats()["coalesced"] == 49
+    assert flight.in_flight() == 0
+
+
+def test_errors_propagate_to_all_waiters():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def run():
+        first = asyncio.create_task(flight.do("key", work))
+        second = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == 42
+
+
+def test_service_coalesces_identical_questions():
+    class StubLLM:
+        calls = 0
+
+        async def generate_sql(self, natural_query):
+            StubLLM.calls += 1
+            await asyncio.sleep(0.05)
+            return "SELECT * FROM customers;", "stub", 0.9
+
+        def get_stats(self):
+            return {}
+
+    service = Text2SQLService()
+    service.llm = StubLLM()
+
+    async def run():
+        return await asyncio.gather(*(
+            service.generate_sql_from_text(q)
+            for q in ["Customers in Mumbai", "customers in mumbai?"] * 5
+        ))
+
+    responses = asyncio.run(run())
+    assert StubLLM.calls == 1
+    assert all(r.sql_query == "SELECT * FROM customers;" for r in responses)
+    assert service.get_query_analytics()["coalescing"]["generation"]["coalesced"] == 9
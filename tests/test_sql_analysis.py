@@ -0,0 +1,73 @@
+"""
+Tests for the shared parsed-SQL analysis
+"""
+from app.services.llm_service import LLMService
+from app.services.sql_service import SQLService
+from app.services.text2sql_service import Text2SQLService
+from app.utils.sql_analysis import analyze_sql, get_analysis_cache_stats
+
+REVENUE_SQL = (
+    "SELECT p.category, SUM(oi.total_price_inr) AS revenue FROM products p "
+    "JOIN order_items AS oi ON p.product_id = oi.product_id "
+    "WHERE p.category <> 'Books' GROUP BY p.category ORDER BY revenue DESC LIMIT 5;"
+)
+
+
+def test_structural_facts():
+    analysis = analyze_sql(REVENUE_SQL)
+    assert analysis.is_select
+    assert analysis.tables == ("products", "order_items")
+    assert analysis.aliases == {"p": "products", "oi": "order_items"}
+    assert analysis.join_count == 1
+    assert analysis.aggregates == ("SUM",)
+    assert analysis.has_where and analysis.has_group_by and analysis.has_order_by
+    assert analysis.limit == 5
+    assert [token.value for token in analysis.literals] == ["'Books'", "5"]
+    assert analysis.statement_count == 1
+
+
+def test_subqueries_and_comma_joins():
+    analysis = analyze_sql(
+        "SELECT c.first_name FROM customers c, orders o WHERE c.customer_id IN "
+        "(SELECT customer_id FROM orders WHERE order_id IN (SELECT order_id FROM order_items))"
+    )
+    assert set(analysis.tables) == {"customers", "orders", "order_items"}
+    assert analysis.subquery_count == 2
+    assert analysis.max_subquery_depth == 2
+    # LIMIT inside a subquery is not the statement's limit
+    assert analyze_sql("SELECT * FROM (SELECT * FROM orders LIMIT 3) sub").limit is None
+
+
+def test_keywords_in_literals_are_ignored():
+    analysis = analyze_sql("SELECT * FROM products WHERE description = 'JOIN us, GROUP BY fun' LIMIT 2")
+    assert analysis.join_count == 0
+    assert not analysis.has_group_by
+    assert analysis.tables == ("products",)
+
+
+def test_invalid_sql_records_error():
+    analysis = analyze_sql("SELECT 'open")
+    assert analysis.error is not None
+    assert not analysis.is_valid
+
+
+def test_analysis_is_memoized():
+    sql = "SELECT COUNT(*) FROM orders WHERE order_id > 41"
+    first = analyze_sql(sql)
+    hits = get_analysis_cache_stats()["hits"]
+    assert analyze_sql(sql) is first
+    assert get_analysis_cache_stats()["hits"] == hits + 1
+
+
+def test_consumers_read_the_analysis():
+    analysis = analyze_sql(REVENUE_SQL)
+    assert SQLService()._validate_query_safety(REVENUE_SQL, analysis) == (True, None)
+    assert Text2SQLService()._estimate_result_rows(REVENUE_SQL, analysis) == 5
+
+    llm = LLMService()
+    assert llm._calculate_confidence(REVENUE_SQL, "revenue by category", analysis) == 1.0
+    explanation = llm._generate_explanation(REVENUE_SQL, "revenue by category", analysis)
+    assert "combines data from multiple tables" in explanation
+    assert "limits the number of results" in explanation
+    assert llm._extract_sql_from_response("```sql\nSELECT 1\n```") == "SELECT 1;"
+    assert llm._extract_sql_from_response("DELETE FROM orders") is None
@@ -0,0 +1,117 @@
+"""
+Tests for literal-parameterized statement templates
+"""
+import asyncio
+
+import pytest
+
+from app.database.connection import DatabaseManager
+from app.services import sql_service as sql_service_module
+from app.services.result_cache import ResultCache
+from app.services.sql_service import SQLService
+from app.utils.sql_analysis import analyze_sql
+from app.utils.sql_template import TemplateStats, parameterize
+
+
+def template_of(sql):
+    return parameterize(analyze_sql(sql))
+
+
+def test_literals_become_parameters():
+    template = template_of("SELECT name FROM items WHERE label = 'O''Brien' AND price > 2.5 LIMIT 10")
+
+    assert template.sql == "SELECT name FROM items WHERE label = ? AND price > ? LIMIT ?"
+    assert template.params == ("O'Brien", 2.5, 10)
+
+
+def test_same_shape_shares_a_template():
+    first = template_of("SELECT * FROM items WHERE item_id = 1")
+    second = template_of("select * from items  -- lookup\nwhere item_id = 42;")
+
+    assert first.fingerprint != template_of("SELECT * FROM items WHERE item_id > 1").fingerprint
+    assert second.params == (42,)
+    assert template_of("SELECT * FROM items WHERE item_id = 2").fingerprint == first.fingerprint
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT price * 1.18 FROM items",                       # names an unaliased result column
+    "SELECT label FROM items ORDER BY 1",                   # ordinal
+    "SELECT label, COUNT(*) FROM items GROUP BY 1",
+    "SELECT SUM(price) OVER (ORDER BY item_id ROWS 2 PRECEDING) FROM items",
+    "SELECT * FROM (SELECT 'x' AS tag FROM items)",         # subquery select list
+])
+def test_inline_clauses_keep_their_literals(sql):
+    assert template_of(sql).params == ()
+
+
+def test_subqueries_and_function_arguments_are_lifted():
+    template = template_of(
+        "SELECT ROUND(price, 2) FROM items WHERE item_id IN "
+        "(SELECT item_id FROM sales WHERE qty > 3) AND sold_on >= date('now', '-7 days')"
+    )
+    assert template.params == (3, 'now', '-7 days')
+    assert "ROUND(price, 2)" in template.sql
+
+
+def test_statements_with_parameters_are_not_templated():
+    assert template_of("SELECT * FROM items WHERE item_id = ?") is None
+    assert template_of("DELETE FROM items WHERE item_id = 1") is None
+
+
+def test_template_stats_report_percentiles():
+    stats = TemplateStats(max_templates=2)
+    first = template_of("SELECT * FROM items WHERE item_id = 1")
+    for elapsed in range(1, 101):
+        stats.record(first, float(elapsed))
+    stats.record(template_of("SELECT * FROM items WHERE label = 'a'"), 5.0, success=False)
+
+    report = stats.report()
+    assert [entry["executions"] for entry in report] == [100, 1]
+    assert report[0]["template"] == "SELECT * FROM items WHERE item_id = ?"
+    assert report[0]["latency_ms"]["p50"] == pytest.approx(50.5)
+    assert report[1]["failures"] == 1
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    manager = DatabaseManager(str(tmp_path / "template.db"))
+    asyncio.run(manager.execute_script(
+        "CREATE TABLE items (item_id INTEGER PRIMARY KEY, label TEXT, price REAL);"
+        "INSERT INTO items VALUES (1, 'one', 10.5), (2, 'two', 20), (3, 'it''s', 30);"
+    ))
+    monkeypatch.setattr(sql_service_module, "db_manager", manager)
+    service = SQLService()
+    service.cache = ResultCache(max_bytes=1024 * 1024, max_entries=16, ttl_seconds=60)
+    yield service
+    asyncio.run(manager.close())
+
+
+def test_service_executes_templates_with_bound_literals(service):
+    async def run():
+        return [
+            await service.execute_sql_query(sql) for sql in (
+                "SELECT label, price * 2 FROM items WHERE item_id = 1",
+                "SELECT label, price * 2 FROM items WHERE item_id = 3",
+                "SELECT label FROM items WHERE label = 'it''s'",
+                "SELECT COUNT(*) AS n FROM items WHERE price > 15",
+            )
+        ]
+
+    first, second, quoted, count = asyncio.run(run())
+    assert first.data == [{"label": "one", "price * 2": 21.0}]
+    assert second.data == [{"label": "it's", "price * 2": 60.0}]
+    assert quoted.data == [{"label": "it's"}]
+    assert count.data == [{"n": 2}]
+
+    report = service.get_template_stats()
+    shared = next(entry for entry in report if entry["template"].endswith("item_id = ?"))
+    assert shared["executions"] == 2
+    assert set(shared["latency_ms"]) == {"p50", "p95", "p99"}
+
+
+def test_parameterization_can_be_disabled(service):
+    service.parameterize_literals = False
+    result = asyncio.run(service.execute_sql_query("SELECT label FROM items WHERE item_id = 2"))
+
+    assert result.data == [{"label": "two"}]
+    assert service.get_template_stats()[0]["template"] == "SELECT label FROM items WHERE item_id = 2"
@@ -0,0 +1,91 @@
+"""
+Tests for the SQL lexer and the token-based safety validator
+"""
+import time
+
+import pytest
+
+from app.services.sql_service import SQLService
+from app.utils.sql_lexer import SQLLexError, strip_comments, tokenize
+
+
+@pytest.fixture
+def service():
+    return SQLService()
+
+
+def test_tokenizer_handles_literals_and_quoted_identifiers():
+    tokens = tokenize("SELECT \"drop\", [delete] FROM t WHERE note = 'it''s -- fine' AND x >= 1.5e3 -- tail")
+    kinds = [(token.kind, token.value) for token in tokens]
+    assert ("quoted", '"drop"') in kinds
+    assert ("quoted", "[delete]") in kinds
+    assert ("string", "'it''s -- fine'") in kinds
+    assert ("number", "1.5e3") in kinds
+    assert ("op", ">=") in kinds
+    assert all(token.kind != "comment" for token in tokens)
+
+
+@pytest.mark.parametrize("sql", ["SELECT 'open", "SELECT /* open", "SELECT [open", "SELECT #"])
+def test_tokenizer_rejects_malformed_input(sql):
+    with pytest.raises(SQLLexError):
+        tokenize(sql)
+
+
+def test_strip_comments_keeps_literals():
+    sql = "SELECT COUNT(*) -- total\nFROM orders /* all */ WHERE note = '/* not a comment */';;"
+    assert strip_comments(sql) == "SELECT COUNT(*) FROM orders WHERE note = '/* not a comment */'"
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM customers WHERE city = 'Mumbai';",
+    "SELECT * FROM orders WHERE order_status IN ('delivered', 'shipped')",
+    "SELECT * FROM orders WHERE (order_status = 'delivered' OR order_status = 'shipped') AND total_amount_inr > 1000",
+    "SELECT * FROM products WHERE description = 'DROP TABLE is just text here'",
+    "SELECT p.category, SUM(oi.total_price_inr) AS revenue FROM products p "
+    "JOIN order_items oi ON p.product_id = oi.product_id GROUP BY p.category",
+    "SELECT COUNT(*) FROM customers -- trailing comment",
+])
+def test_safe_queries_pass(service, sql):
+    assert service._validate_query_safety(sql) == (True, None)
+
+
+@pytest.mark.parametrize("sql, message", [
+    ("", "Empty or invalid SQL query"),
+    ("DELETE FROM customers", "Only SELECT queries are allowed"),
+    ("SELECT * FROM customers; DROP TABLE customers", "Operation 'DROP' is not allowed"),
+    ("SELECT * FROM customers; SELECT 1", "Query contains suspicious patterns"),
+    ("SELECT * FROM customers WHERE city = 'x' OR 1=1", "Query contains suspicious patterns"),
+    ("SELECT * FROM customers WHERE city = 'x' AND 'a' = 'b'", "Query contains suspicious patterns"),
+    ("SELECT email FROM customers UNION SELECT email FROM customers", "Query contains suspicious patterns"),
+    ("SELECT load_extension('x')", "Function 'LOAD_EXTENSION' is not allowed"),
+    ('SELECT "randomblob"(4)', "Function 'RANDOMBLOB' is not allowed"),
+    ("SELECT [randomblob](4)", "Function 'RANDOMBLOB' is not allowed"),
+    ("SELECT `zeroblob`(1000000000)", "Function 'ZEROBLOB' is not allowed"),
+    ('SELECT "load_extension"(\'x\')', "Function 'LOAD_EXTENSION' is not allowed"),
+    ("SELECT * FROM customers CROSS JOIN orders", "Query is too complex or potentially resource-intensive"),
+    ("SELECT 'unterminated", "Invalid SQL"),
+])
+def test_unsafe_queries_are_rejected(service, sql, message):
+    is_safe, error = service._validate_query_safety(sql)
+    assert not is_safe
+    assert error.startswith(message)
+
+
+def test_subquery_and_join_limits(service):
+    nested = "SELECT * FROM t WHERE a IN (SELECT a FROM t WHERE b IN (SELECT b FROM t WHERE c IN " \
+             "(SELECT c FROM t WHERE d IN (SELECT d FROM t))))"
+    assert not service._validate_query_safety(nested)[0]
+    joins = "SELECT * FROM a " + " ".join(f"JOIN t{i} ON t{i}.id = a.id" for i in range(6))
+    assert not service._validate_query_safety(joins)[0]
+
+
+def test_validation_is_linear_on_adversarial_input(service):
+    def timed(n):
+        sql = "SELECT * FROM customers WHERE " + " OR ".join(f"city = 'c{i}'" for i in range(n))
+        start = time.perf_counter()
+        assert service._validate_query_safety(sql)[0]
+        return time.perf_counter() - start
+
+    small, large = timed(500), timed(5000)
+    # 10x the input should cost roughly 10x, far from the 100x of quadratic scans
+    assert large < small * 30
@@ -0,0 +1,40 @@
+"""
+Tests for lazy, import-time-free service construction
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def test_importing_app_defers_llm_sdk_and_database_work(tmp_path):
+    code = (
+        "import sys, sqlite3\n"
+        "calls = []\n"
+        "real_connect = sqlite3.connect\n"
+        "sqlite3.connect = lambda *a, **k: calls.append(a) or real_connect(*a, **k)\n"
+        "import app.main\n"
+        "print('google.generativeai' in sys.modules, 'openai' in sys.modules, len(calls))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True,
+        env={"DATABASE_URL": f"sqlite:///{tmp_path / 'startup.db'}", "PATH": ""}
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split()[-3:] == ["False", "False", "0"]
+
+
+def test_startup_report_lists_phases():
+    from app.utils.startup import StartupTimer
+
+    timer = StartupTimer()
+    with timer.phase("database_init"):
+        pass
+    timer.record("schema_context", 1.5)
+
+    report = timer.report()
+    assert list(report["phases"]) == ["database_init", "schema_context"]
+    assert report["total_ms"] >= 1.5